@@ -0,0 +1,115 @@
+"""Arranque en frío: costo de `import main` por módulo y tiempo al primer render del login.
+
+Cada medición corre en un proceso nuevo (sin módulos en caché de importación)
+y sobre una copia temporal de la aplicación: las migraciones del arranque y los
+directorios que crea nunca tocan la base ni los adjuntos del árbol de trabajo.
+
+Uso:
+    python -m benchmarks.bench_arranque --repeticiones 3
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Objetivo del primer render de la pantalla de login (ejecución de main.py en un proceso nuevo).
+# pandas sí se carga ahí: el CookieManager de extra_streamlit_components pasa por dataframe_util de Streamlit.
+OBJETIVO_LOGIN_MS = 600
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Lo que necesita `main.py` para arrancar (los __pycache__ se copian: el arranque real los tiene)
+ARCHIVOS_APP = ["main.py", "styles.py", "modules", ".streamlit", "logistics_v2.db"]
+_LINEA = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+_SCRIPT_RENDER = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=120)
+if sys.argv[1] == "sesion":
+    at.session_state['autenticado'] = True
+    at.session_state['usuario'] = {"nombre": "BENCH", "rol": "ADMIN"}
+previos = set(sys.modules)   # AppTest ya trae pandas y protobuf; solo cuenta lo que agrega main.py
+inicio = time.perf_counter()
+at.run()
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({'ms': ms, 'excepciones': [str(e.value) for e in at.exception],
+                  'login': any(t.label == "USER_ID" for t in at.text_input),
+                  'modulos': sorted(m for m in set(sys.modules) - previos if m.split('.')[0] in
+                                    ('pandas', 'plotly', 'matplotlib', 'google', 'pdfplumber', 'PyPDF2', 'fpdf'))}))
+"""
+
+def copiar_app(destino):
+    for nombre in ARCHIVOS_APP:
+        origen = os.path.join(RAIZ, nombre)
+        if os.path.isdir(origen):
+            shutil.copytree(origen, os.path.join(destino, nombre))
+        elif os.path.exists(origen):
+            shutil.copy2(origen, destino)
+    return destino
+
+def tiempos_importacion(directorio):
+    """Corre `python -X importtime -c "import main"`; regresa [(acumulado_us, nivel, módulo)]."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=directorio,
+                       capture_output=True, text=True, check=True)
+    filas = []
+    for linea in r.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if m:
+            filas.append((int(m[2]), len(m[3]) // 2, m[4]))
+    return filas
+
+def desglose(filas):
+    """Acumulado por módulo propio y por paquete externo (la primera vez que se importa cada uno)."""
+    propios, externos = {}, {}
+    for acumulado, _, modulo in filas:
+        raiz = modulo.split('.')[0]
+        if modulo == 'main' or raiz == 'modules':
+            propios[modulo] = acumulado
+        elif modulo == raiz:
+            externos[raiz] = max(externos.get(raiz, 0), acumulado)
+    return propios, externos
+
+def primer_render(modo, directorio):
+    r = subprocess.run([sys.executable, "-c", _SCRIPT_RENDER, modo], cwd=directorio, capture_output=True, text=True, check=True)
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_arranque_") as tmp:
+        medir(args, copiar_app(tmp))
+
+def medir(args, directorio):
+    filas = tiempos_importacion(directorio)
+    propios, externos = desglose(filas)
+    print(f"import main: {propios.get('main', 0) / 1000:.0f} ms (acumulado)")
+    print("  módulos propios:")
+    for modulo, us in sorted(propios.items(), key=lambda x: -x[1]):
+        if modulo != 'main':
+            print(f"    {modulo:<28} {us / 1000:8.1f} ms")
+    print(f"  paquetes externos (top {args.top}):")
+    for paquete, us in sorted(externos.items(), key=lambda x: -x[1])[:args.top]:
+        print(f"    {paquete:<28} {us / 1000:8.1f} ms")
+
+    for modo, etiqueta in (("login", "login (sin sesión)"), ("sesion", "dashboard (con sesión)")):
+        corridas = [primer_render(modo, directorio) for _ in range(args.repeticiones)]
+        ms = statistics.median(c['ms'] for c in corridas)
+        ultima = corridas[-1]
+        print(f"\nprimer render {etiqueta}: {ms:.0f} ms (mediana de {args.repeticiones} procesos nuevos)")
+        if modo == "login":
+            estado = "OK" if ms <= OBJETIVO_LOGIN_MS else "FUERA DE OBJETIVO"
+            print(f"  objetivo {OBJETIVO_LOGIN_MS} ms: {estado} // formulario visible: {ultima['login']}")
+        paquetes = sorted({m.split('.')[0] for m in ultima['modulos']})
+        print(f"  paquetes pesados que importó main.py: {', '.join(paquetes) or 'ninguno'}")
+        if ultima['excepciones']:
+            print(f"  excepciones: {ultima['excepciones']}")
+
+if __name__ == "__main__":
+    main()
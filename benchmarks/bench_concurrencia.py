@@ -0,0 +1,76 @@
+"""Escrituras concurrentes: conexión ad hoc con journal por defecto vs pool WAL.
+
+Uso:
+    python -m benchmarks.bench_concurrencia --hilos 8 --escrituras 200
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from modules import db, migraciones
+
+INSERT = '''
+    INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Fecha, Usuario, Hora)
+    VALUES (?, 'MEX', 'MTY', 'Activo', 1500.0, ?, '2026-01-15', 'BENCH', '10:00')
+'''
+
+def _crear_base(ruta):
+    with db.conexion(ruta) as conn:
+        migraciones.migrar(conn)
+        # Se regresa al journal clásico para que el modo "antes" sea el original
+        conn.execute("PRAGMA journal_mode=DELETE")
+    db.pool(ruta).cerrar()
+
+def _escritor_ad_hoc(ruta, n, hilo, errores):
+    for i in range(n):
+        try:
+            conn = sqlite3.connect(ruta)
+            conn.execute(INSERT, (f"PAX {hilo}-{i}", f"B{hilo}{i}"))
+            conn.commit()
+            conn.close()
+        except sqlite3.OperationalError:
+            errores.append(1)
+
+def _escritor_pool(ruta, n, hilo, errores):
+    for i in range(n):
+        try:
+            with db.transaccion(ruta) as conn:
+                conn.execute(INSERT, (f"PAX {hilo}-{i}", f"B{hilo}{i}"))
+        except sqlite3.OperationalError:
+            errores.append(1)
+
+def medir(escritor, ruta, hilos, escrituras):
+    errores = []
+    trabajadores = [threading.Thread(target=escritor, args=(ruta, escrituras, h, errores)) for h in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores: t.start()
+    for t in trabajadores: t.join()
+    duracion = time.perf_counter() - inicio
+    exitosas = hilos * escrituras - len(errores)
+    return {'segundos': duracion, 'escrituras_s': exitosas / duracion, 'bloqueos': len(errores)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--escrituras", type=int, default=200, help="escrituras por hilo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_antes = os.path.join(tmp, "antes.db")
+        ruta_despues = os.path.join(tmp, "despues.db")
+        _crear_base(ruta_antes)
+        _crear_base(ruta_despues)
+
+        antes = medir(_escritor_ad_hoc, ruta_antes, args.hilos, args.escrituras)
+        despues = medir(_escritor_pool, ruta_despues, args.hilos, args.escrituras)
+        db.pool(ruta_despues).cerrar()
+
+    print(f"{args.hilos} hilos x {args.escrituras} escrituras")
+    for nombre, r in (("ad hoc + rollback journal", antes), ("pool + WAL", despues)):
+        print(f"  {nombre:<28} {r['escrituras_s']:>9.0f} escrituras/s  ({r['segundos']:.2f} s, {r['bloqueos']} bloqueos)")
+
+if __name__ == "__main__":
+    main()
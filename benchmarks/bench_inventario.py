@@ -0,0 +1,72 @@
+"""Tiempo de una página del inventario (conteo + corte en SQLite) sobre una base sintética.
+
+Uso:
+    python -m benchmarks.bench_inventario --filas 100000 --repeticiones 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from modules import almacen, db, migraciones
+from modules.inventory import ORDENES
+
+ESTADOS = ['Activo', 'Abierto (Disponible)', 'Realizado', 'Cancelado', 'Canjeado']
+AEROLINEAS = ['AEROMEXICO', 'VOLARIS', 'VIVA AEROBUS', 'DELTA', 'UNITED', 'AMERICAN', 'COPA']
+
+def _poblar(ruta, filas, semilla=7):
+    rnd = random.Random(semilla)
+    base = date(2024, 1, 1)
+    conn = sqlite3.connect(ruta)
+    migraciones.migrar(conn)
+    conn.executemany(
+        "INSERT INTO vuelos (Pasajero, PNR, Fecha, Origen, Destino, Aerolinea, No_Vuelo, Estado, Costo) VALUES (?,?,?,?,?,?,?,?,?)",
+        ((f"PASAJERO {rnd.randint(1, filas // 3 + 1)}", f"P{i:05d}", (base + timedelta(days=rnd.randint(0, 1000))).isoformat(),
+          'MEX', rnd.choice(['MTY', 'CUN', 'GDL', 'TIJ']), rnd.choice(AEROLINEAS), f"AM{rnd.randint(100, 999)}",
+          rnd.choice(ESTADOS), round(rnd.uniform(800, 12000), 2)) for i in range(filas)))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def pagina(ruta, orden, tamano, numero, busqueda=None):
+    filtros = {'inicio': date(2024, 1, 1), 'fin': date(2026, 12, 31), 'busqueda': busqueda, 'ruta_db': ruta}
+    total = almacen.contar_vuelos(**filtros)
+    df = almacen.consultar_vuelos(**filtros, orden=orden, limite=tamano, desplazamiento=(numero - 1) * tamano)
+    return total, len(df)
+
+def medir(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--tamano", type=int, default=50)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "bench.db")
+        _poblar(ruta, args.filas)
+        ultima = max(1, args.filas // args.tamano)
+        print(f"{args.filas:,} filas, {args.tamano} por página, mediana de {args.repeticiones} corridas")
+        for nombre, orden in ORDENES.items():
+            primera = medir(lambda: pagina(ruta, orden, args.tamano, 1), args.repeticiones)
+            final = medir(lambda: pagina(ruta, orden, args.tamano, ultima), args.repeticiones)
+            print(f"  {nombre:<14} página 1 {primera:7.1f} ms   página {ultima} {final:7.1f} ms")
+        for texto in ("VOLARIS", "PASAJERO 123", "P0999"):
+            busqueda = medir(lambda: pagina(ruta, ORDENES["REGISTRO ↑"], args.tamano, 1, texto), args.repeticiones)
+            print(f"  búsqueda {texto!r:<16} {busqueda:7.1f} ms")
+        db.pool(ruta).cerrar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Tiempo de generación del PDF directivo: gráficos vía pyplot + archivos temporales vs en memoria.
+
+Uso:
+    python -m benchmarks.bench_reporte --filas 5000 --repeticiones 5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from modules import reporting
+
+ESTADOS = ['Activo', 'Abierto (Disponible)', 'Realizado', 'Cancelado', 'Canjeado']
+AEROLINEAS = ['AEROMEXICO', 'VOLARIS', 'VIVA AEROBUS', 'DELTA', 'UNITED', 'AMERICAN', 'COPA']
+
+def _datos(filas, semilla=7):
+    rnd = random.Random(semilla)
+    return pd.DataFrame({
+        'id': range(1, filas + 1),
+        'Pasajero': [f"PASAJERO {rnd.randint(1, filas // 3 + 1)}" for _ in range(filas)],
+        'PNR': [f"PNR{i:06d}" for i in range(filas)],
+        'Fecha': [f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}" for _ in range(filas)],
+        'Aerolinea': [rnd.choice(AEROLINEAS) for _ in range(filas)],
+        'No_Vuelo': [f"AM{rnd.randint(100, 999)}" for _ in range(filas)],
+        'Origen': ['MEX'] * filas,
+        'Destino': [rnd.choice(['MTY', 'CUN', 'GDL', 'TIJ']) for _ in range(filas)],
+        'Estado': [rnd.choice(ESTADOS) for _ in range(filas)],
+        'Boleto_Ligado': [''] * filas,
+        'Extra': ['NO'] * filas,
+        'Costo': [round(rnd.uniform(800, 12000), 2) for _ in range(filas)],
+    })
+
+# --- IMPLEMENTACIÓN ANTERIOR (pyplot global + PNG a disco) ---
+def _graficos_en_disco(df):
+    rutas = []
+    for dibujar in (
+        lambda: plt.pie(df.groupby('Estado')['Costo'].sum(), autopct='%1.1f%%', startangle=140),
+        lambda: plt.bar(*zip(*df.groupby('Aerolinea')['Costo'].sum().nlargest(5).items()), color='#00d4ff'),
+    ):
+        fd, ruta = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        plt.figure(figsize=(6, 4), dpi=150)
+        dibujar()
+        plt.savefig(ruta)
+        plt.close()
+        rutas.append(ruta)
+    return rutas
+
+def reporte_anterior(df):
+    pdf = reporting.ReporteEjecutivo()
+    pdf.add_page()
+    r1, r2 = _graficos_en_disco(df)
+    y = pdf.get_y()
+    pdf.image(r1, x=10, y=y, w=90)
+    pdf.image(r2, x=110, y=y, w=90)
+    os.remove(r1)
+    os.remove(r2)
+    return pdf.output(dest='S').encode('latin-1')
+
+def reporte_actual(df):
+    return reporting.generar_pdf_pro(df, df['Costo'].sum(), 0.0, 0.0, 0.0, "Benchmark")
+
+def medir(funcion, df, repeticiones):
+    funcion(df)  # calentamiento (fuentes, caché de matplotlib)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(df)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=5000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    df = _datos(args.filas)
+    antes = medir(reporte_anterior, df, args.repeticiones)
+    despues = medir(reporte_actual, df, args.repeticiones)
+    print(f"{args.filas} filas, mediana de {args.repeticiones} corridas")
+    print(f"  pyplot + archivos temporales (solo gráficos)  {antes:8.1f} ms")
+    print(f"  Figure/Agg en memoria (PDF completo)         {despues:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
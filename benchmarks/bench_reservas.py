@@ -0,0 +1,62 @@
+"""Alta de un grupo grande: INSERT por pasajero vs `reservas.registrar_reserva` (executemany).
+
+Uso:
+    python -m benchmarks.bench_reservas --pasajeros 10000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from modules import db, migraciones, reservas
+
+def _base(tmp, nombre):
+    ruta = os.path.join(tmp, nombre)
+    conn = sqlite3.connect(ruta)
+    migraciones.migrar(conn)
+    conn.execute("INSERT INTO vuelos (Pasajero, PNR, Estado, Costo) VALUES ('SALDO', 'OLD001', ?, 5000)", (reservas.ESTADO_CANJEABLE,))
+    conn.commit()
+    conn.close()
+    return ruta
+
+def _filas(n):
+    return reservas.filas_grupo([f"PASAJERO {i:05d}" for i in range(n)], 1500.0 * n,
+                                Origen='MEX', Destino='CUN', Estado='Activo', PNR='GRUPO1', Fecha='2025-06-01',
+                                Aerolinea='AEROMEXICO', No_Vuelo='AM500', Usuario='BENCH', Boleto_Ligado='OLD001')
+
+def por_fila(ruta, filas, commit_por_fila):
+    """Como el registrador anterior: un `execute` por pasajero (y opcionalmente un commit por cada uno)."""
+    with db.conexion(ruta) as conn:
+        for fila in filas:
+            conn.execute(reservas._SQL_INSERT, reservas._valores(fila))
+            if commit_por_fila:
+                conn.commit()
+        conn.execute("UPDATE vuelos SET Estado='Canjeado' WHERE id=1")
+
+def masivo(ruta, filas):
+    return reservas.registrar_reserva(filas, id_canje=1, ruta_db=ruta)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pasajeros", type=int, default=10_000)
+    args = parser.parse_args()
+
+    filas = _filas(args.pasajeros)
+    with tempfile.TemporaryDirectory() as tmp:
+        casos = [
+            ("execute + commit por pasajero", lambda r: por_fila(r, filas, True)),
+            ("execute por pasajero, 1 transacción", lambda r: por_fila(r, filas, False)),
+            ("registrar_reserva (executemany)", lambda r: masivo(r, filas)),
+        ]
+        print(f"{args.pasajeros:,} pasajeros en un PNR (con triggers de rev, FTS y resumen diario)")
+        for i, (nombre, funcion) in enumerate(casos):
+            ruta = _base(tmp, f"bench_{i}.db")
+            inicio = time.perf_counter()
+            funcion(ruta)
+            segundos = time.perf_counter() - inicio
+            print(f"  {nombre:<38} {segundos * 1000:9.1f} ms  {args.pasajeros / segundos:10,.0f} filas/s")
+            db.pool(ruta).cerrar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Generador de vuelos sintéticos con forma realista para benchmarks.
+
+Produce PNR de grupo (varios pasajeros con la misma ruta, fecha y tarifa
+por persona), rutas IATA nacionales e internacionales, una mezcla de estados
+parecida a la operación y cadenas de canje: boletos que quedaron "Abierto
+(Disponible)", se canjearon y cuyo vuelo nuevo apunta al PNR original en
+`Boleto_Ligado`. Con la misma semilla siempre salen las mismas filas.
+
+Uso:
+    python -m benchmarks.sinteticos --filas 100000 --salida /tmp/vuelos_100k.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import string
+import time
+from datetime import date, timedelta
+
+from modules import migraciones, reservas
+
+TAMANOS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+SEMILLA = 7
+
+# Aerolínea -> (código IATA, peso en la mezcla)
+AEROLINEAS = {
+    'AEROMEXICO': ('AM', 30), 'VOLARIS': ('Y4', 25), 'VIVA AEROBUS': ('VB', 20), 'DELTA': ('DL', 7),
+    'UNITED': ('UA', 6), 'AMERICAN': ('AA', 6), 'COPA': ('CM', 4), 'IBERIA': ('IB', 2),
+}
+NACIONALES = ['MEX', 'GDL', 'MTY', 'CUN', 'TIJ', 'SJD', 'PVR', 'MID', 'BJX', 'QRO', 'HMO', 'CUU', 'TRC', 'VER', 'OAX']
+INTERNACIONALES = {
+    'LAX': 'ESTADOS UNIDOS', 'JFK': 'ESTADOS UNIDOS', 'MIA': 'ESTADOS UNIDOS', 'DFW': 'ESTADOS UNIDOS',
+    'IAH': 'ESTADOS UNIDOS', 'ORD': 'ESTADOS UNIDOS', 'BOG': 'COLOMBIA', 'PTY': 'PANAMÁ', 'MAD': 'ESPAÑA', 'LHR': 'REINO UNIDO',
+}
+# Estado -> peso; "Canjeado" sale de las cadenas de canje, no de la mezcla
+ESTADOS = {'Realizado': 52, 'Activo': 25, 'Cancelado': 8, 'Abierto (Disponible)': 15}
+PROB_CANJE = 0.45            # de los abiertos, cuántos terminan canjeados por otro vuelo
+PROB_INTERNACIONAL = 0.18
+PESOS_GRUPO = [70, 14, 7, 4, 3, 2]   # pasajeros por PNR: 1..6
+NOMBRES = ['JOSE', 'MARIA', 'JUAN', 'GUADALUPE', 'LUIS', 'ANA', 'CARLOS', 'SOFIA', 'MIGUEL', 'FERNANDA',
+           'JORGE', 'DANIELA', 'RICARDO', 'PAULA', 'ALEJANDRO', 'VALERIA', 'ROBERTO', 'ELENA', 'DIEGO', 'LAURA']
+APELLIDOS = ['HERNANDEZ', 'GARCIA', 'MARTINEZ', 'LOPEZ', 'GONZALEZ', 'PEREZ', 'RODRIGUEZ', 'SANCHEZ', 'RAMIREZ',
+             'CRUZ', 'FLORES', 'GOMEZ', 'MORALES', 'VAZQUEZ', 'REYES', 'JIMENEZ', 'TORRES', 'DIAZ', 'RUIZ', 'MENDOZA']
+MOTIVOS = ['VISITA A CLIENTE', 'AUDITORÍA', 'CAPACITACIÓN', 'ARRANQUE DE PLANTA', 'JUNTA DIRECTIVA', 'NO ESPECIFICADO']
+AUTORIZA = ['DIRECCIÓN GENERAL', 'GERENCIA OPERACIONES', 'FINANZAS', 'PENDIENTE']
+USUARIOS = ['ADMIN', 'VIAJES1', 'VIAJES2', 'COMPRAS']
+EQUIPAJE = ['MANO', 'DOCUMENTADO', 'FULL']
+
+COLUMNAS = reservas.COLUMNAS + ['Correo', 'Tipo_Viaje']
+_SQL_INSERT = f"INSERT INTO vuelos ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+
+
+def _pnr(rnd):
+    return ''.join(rnd.choices(string.ascii_uppercase + string.digits, k=6))
+
+def generar_filas(n, semilla=SEMILLA, inicio=date(2023, 1, 1), dias=1460):
+    """Genera exactamente `n` filas (dicts con las columnas de `vuelos`)."""
+    rnd = random.Random(semilla)
+    aerolineas, pesos_aer = list(AEROLINEAS), [p for _, p in AEROLINEAS.values()]
+    estados, pesos_est = list(ESTADOS), list(ESTADOS.values())
+    # Plantilla de viajeros frecuentes: crece con el volumen pero se repite como en una empresa real
+    personas = [f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}" for _ in range(min(max(50, n // 20), 3000))]
+    abiertos = []   # (PNR, fecha) de boletos disponibles para canje
+    generadas = 0
+    while generadas < n:
+        tamano = min(rnd.choices(range(1, len(PESOS_GRUPO) + 1), PESOS_GRUPO)[0], n - generadas)
+        aerolinea = rnd.choices(aerolineas, pesos_aer)[0]
+        origen = rnd.choice(NACIONALES)
+        if rnd.random() < PROB_INTERNACIONAL:
+            destino = rnd.choice(list(INTERNACIONALES))
+            pais, costo_pp = INTERNACIONALES[destino], rnd.uniform(6000, 28000)
+        else:
+            destino = rnd.choice([d for d in NACIONALES if d != origen])
+            pais, costo_pp = 'MÉXICO', rnd.uniform(900, 9000)
+        fecha = inicio + timedelta(days=rnd.randrange(dias))
+        regreso = fecha + timedelta(days=rnd.randint(1, 10)) if rnd.random() < 0.4 else None
+        estado = rnd.choices(estados, pesos_est)[0]
+        ligado = ''
+        # Cadena de canje: un boleto abierto anterior se usa para este vuelo
+        if estado == 'Activo' and abiertos and rnd.random() < PROB_CANJE:
+            ligado, fecha_abierto = abiertos.pop(rnd.randrange(len(abiertos)))
+            fecha = max(fecha, fecha_abierto + timedelta(days=rnd.randint(7, 120)))
+        pnr = _pnr(rnd)
+        comunes = dict(
+            Origen=origen, Destino=destino, Estado=estado, PNR=pnr, Fecha=fecha.isoformat(),
+            Fecha_Regreso=regreso.isoformat() if regreso else '', Pais=pais, Equipaje=rnd.choice(EQUIPAJE),
+            Soporte='', Usuario=rnd.choice(USUARIOS), Hora=f"{rnd.randint(5, 23):02d}:{rnd.choice([0, 15, 30, 45]):02d}",
+            Aerolinea=aerolinea, No_Vuelo=f"{AEROLINEAS[aerolinea][0]}{rnd.randint(100, 2999)}",
+            Motivo=rnd.choice(MOTIVOS), Autoriza=rnd.choice(AUTORIZA), Boleto_Ligado=ligado,
+            Extra=rnd.choice(['NO'] * 4 + ['SÍ']), Tipo_Viaje='Redondo' if regreso else 'Sencillo',
+        )
+        for pasajero in rnd.sample(personas, tamano):
+            yield dict(comunes, Pasajero=pasajero, Costo=round(costo_pp, 2),
+                       Telefono=f"52{rnd.randint(10**9, 10**10 - 1)}" if rnd.random() < 0.6 else '',
+                       Correo=f"{pasajero.split()[0].lower()}.{pasajero.split()[1].lower()}@empresa.com.mx")
+        if estado == 'Abierto (Disponible)':
+            abiertos.append((pnr, fecha))
+        generadas += tamano
+
+def _valores(fila):
+    return tuple(fila.get(c, '') for c in COLUMNAS)
+
+def marcar_canjeados(conn):
+    """Los boletos abiertos cuyo PNR quedó ligado a otro vuelo pasan a "Canjeado"."""
+    conn.execute("""
+        UPDATE vuelos SET Estado = 'Canjeado'
+        WHERE Estado = ? AND PNR IN (SELECT Boleto_Ligado FROM vuelos WHERE Boleto_Ligado != '')
+    """, (reservas.ESTADO_CANJEABLE,))
+
+def poblar(ruta, n, semilla=SEMILLA, lote=20_000):
+    """Crea (o amplía) la base en `ruta` con el esquema vigente y `n` vuelos sintéticos.
+
+    Inserta con los triggers activos (rev, FTS y resumen diario), igual que la
+    aplicación, y deja estadísticas del planificador con ANALYZE.
+    """
+    conn = sqlite3.connect(ruta)
+    try:
+        migraciones.migrar(conn)
+        filas = generar_filas(n, semilla)
+        conn.execute("BEGIN")
+        while True:
+            bloque = [_valores(f) for _, f in zip(range(lote), filas)]
+            if not bloque:
+                break
+            conn.executemany(_SQL_INSERT, bloque)
+        marcar_canjeados(conn)
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return ruta
+
+def filas_de(texto):
+    """'100k' -> 100000; también acepta números."""
+    return TAMANOS.get(str(texto).lower()) or int(str(texto).replace('_', ''))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", default="100k", help="10k, 100k, 1m o un número")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--salida", required=True, help="ruta de la base SQLite a crear")
+    args = parser.parse_args()
+
+    if os.path.exists(args.salida):
+        parser.error(f"{args.salida} ya existe")
+    n = filas_de(args.filas)
+    inicio = time.perf_counter()
+    poblar(args.salida, n, args.semilla)
+    print(f"{n:,} vuelos en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Suite reproducible: carga, KPIs, BI, Excel, PDF e inventario sobre vuelos sintéticos.
+
+Genera (o reutiliza) una base por tamaño con `benchmarks.sinteticos`, corre
+cada caso sin Streamlit y escribe un reporte JSON comparable entre corridas.
+
+Uso:
+    python -m benchmarks.suite --tamanos 10k 100k --salida reporte.json
+    python -m benchmarks.suite --tamanos 1m --dir-datos /tmp/bench --omitir exportacion_excel
+    python -m benchmarks.suite --tamanos 100k --comparar reporte_anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import sinteticos
+from modules import almacen, db, exportacion, metricas, reporting, reservas, rollups
+from modules.inventory import ORDENES
+
+FORMATO_REPORTE = 1
+RANGO = (date(2023, 1, 1), date(2026, 12, 31))
+TAMANO_PAGINA = 50
+
+
+def medir(funcion, repeticiones):
+    """Una corrida de calentamiento y `repeticiones` medidas; regresa (tiempos_ms, último resultado)."""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos, resultado
+
+# --- CASOS ---
+# Cada caso recibe el contexto de la base y regresa (función a medir, extras para el reporte)
+def caso_carga_tabla(ctx):
+    def cargar():
+        return almacen.AlmacenVuelos(ctx['ruta']).sincronizar()
+    return cargar, lambda df: {'filas': len(df), 'mb_tipado': round(float(df.memory_usage(deep=True).sum()) / 2**20, 1)}
+
+def caso_kpis_dashboard(ctx):
+    return lambda: metricas.calcular_metricas(ctx['df'], hoy=RANGO[1]), lambda m: {'activos': m.n_activos, 'abiertos': m.n_abiertos}
+
+def caso_agregaciones_bi(ctx):
+    def agregar():
+        df_r = rollups.consultar(*RANGO, ruta_db=ctx['ruta'])
+        df_p = rollups.consultar_pasajeros(*RANGO, ruta_db=ctx['ruta'])
+        return {
+            'por_estado': df_r.groupby('Estado')['Costo'].sum(),
+            'top_aerolineas': df_r.groupby('Aerolinea')['Costo'].sum().nlargest(5),
+            'top_pasajeros': df_p.groupby('Pasajero')['Costo'].sum().nlargest(10),
+            'canjes': almacen.consultar_canjes(*RANGO, ruta_db=ctx['ruta']),
+            'filas_resumen': len(df_r),
+            'filas_resumen_pasajero': len(df_p),
+        }
+    return agregar, lambda r: {'filas_resumen': r['filas_resumen'], 'filas_resumen_pasajero': r['filas_resumen_pasajero'],
+                               'canjes': len(r['canjes'])}
+
+def caso_exportacion_excel(ctx):
+    # El botón "Exportar Activos" del dashboard: recorte completo a .xlsx
+    activos = metricas.calcular_metricas(ctx['df'], hoy=RANGO[1]).detalle('activos')
+    return lambda: exportacion.excel_bytes(activos, 'Dashboard_Export'), \
+        lambda libro: {'filas': len(activos), 'mb_xlsx': round(len(libro) / 2**20, 2)}
+
+def caso_pdf_directivo(ctx):
+    boletos = almacen.consultar_vuelos(*RANGO, ruta_db=ctx['ruta'])
+    por_estado = boletos.groupby('Estado')['Costo'].sum()
+    total = float(boletos['Costo'].sum())
+    riesgo = float(por_estado.get(reservas.ESTADO_CANJEABLE, 0.0))
+    args = (boletos, total, riesgo, riesgo / total * 100 if total else 0, float(por_estado.get('Canjeado', 0.0)),
+            "Diagnóstico de referencia para benchmark.")
+    return lambda: reporting.generar_pdf_pro(*args), lambda pdf: {'filas': len(boletos), 'kb_pdf': round(len(pdf) / 1024, 1)}
+
+def caso_filtrado_inventario(ctx):
+    ruta = ctx['ruta']
+    ultima = max(1, len(ctx['df']) // TAMANO_PAGINA)
+
+    def filtrar():
+        filtros = {'inicio': RANGO[0], 'fin': RANGO[1], 'ruta_db': ruta}
+        total = almacen.contar_vuelos(**filtros)
+        for orden in (ORDENES["FECHA ↓"], ORDENES["COSTO ↓"]):
+            almacen.consultar_vuelos(**filtros, orden=orden, limite=TAMANO_PAGINA)
+            almacen.consultar_vuelos(**filtros, orden=orden, limite=TAMANO_PAGINA, desplazamiento=(ultima - 1) * TAMANO_PAGINA)
+        encontrados = 0
+        for texto in ("VOLARIS", "GARCIA LOPEZ", "CUN"):
+            encontrados += almacen.contar_vuelos(**filtros, busqueda=texto)
+            almacen.consultar_vuelos(**filtros, busqueda=texto, orden=ORDENES["REGISTRO ↓"], limite=TAMANO_PAGINA)
+        return total, encontrados
+    return filtrar, lambda r: {'total': r[0], 'coincidencias_busqueda': r[1], 'consultas': 12}
+
+CASOS = {
+    'carga_tabla': caso_carga_tabla,
+    'kpis_dashboard': caso_kpis_dashboard,
+    'agregaciones_bi': caso_agregaciones_bi,
+    'exportacion_excel': caso_exportacion_excel,
+    'pdf_directivo': caso_pdf_directivo,
+    'filtrado_inventario': caso_filtrado_inventario,
+}
+
+# --- EJECUCIÓN ---
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def metadatos(args):
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semilla': args.semilla,
+        'repeticiones': args.repeticiones,
+    }
+
+def preparar_base(n, semilla, directorio):
+    ruta = os.path.join(directorio, f"vuelos_{n}_s{semilla}.db")
+    if os.path.exists(ruta):
+        return ruta, 0.0
+    inicio = time.perf_counter()
+    sinteticos.poblar(ruta, n, semilla)
+    return ruta, time.perf_counter() - inicio
+
+def correr(args, directorio):
+    reporte = {'formato': FORMATO_REPORTE, 'meta': metadatos(args), 'bases': {}, 'resultados': []}
+    casos = [c for c in CASOS if c not in args.omitir]
+    for etiqueta in args.tamanos:
+        n = sinteticos.filas_de(etiqueta)
+        ruta, generacion_s = preparar_base(n, args.semilla, directorio)
+        reporte['bases'][str(n)] = {'generacion_s': round(generacion_s, 2), 'mb_db': round(os.path.getsize(ruta) / 2**20, 1)}
+        print(f"\n{n:,} vuelos ({ruta}; generada en {generacion_s:.1f} s)" if generacion_s else f"\n{n:,} vuelos ({ruta}, reutilizada)")
+        ctx = {'ruta': ruta, 'df': almacen.AlmacenVuelos(ruta).sincronizar()}
+        for nombre in casos:
+            funcion, extras = CASOS[nombre](ctx)
+            tiempos, resultado = medir(funcion, args.repeticiones)
+            fila = {'filas': n, 'caso': nombre, 'mediana_ms': round(statistics.median(tiempos), 2),
+                    'min_ms': round(min(tiempos), 2), 'max_ms': round(max(tiempos), 2), 'extra': extras(resultado)}
+            reporte['resultados'].append(fila)
+            print(f"  {nombre:<20} {fila['mediana_ms']:10.1f} ms  (min {fila['min_ms']:.1f} / max {fila['max_ms']:.1f})  {fila['extra']}")
+        db.pool(ruta).cerrar()
+    return reporte
+
+def comparar(reporte, anterior):
+    """Imprime la razón actual/anterior por (filas, caso); >1 es más lento."""
+    previos = {(r['filas'], r['caso']): r['mediana_ms'] for r in anterior['resultados']}
+    print(f"\nComparación contra {anterior['meta'].get('commit') or '?'} ({anterior['meta']['fecha']}):")
+    for r in reporte['resultados']:
+        previo = previos.get((r['filas'], r['caso']))
+        if previo:
+            print(f"  {r['filas']:>9,} {r['caso']:<20} {previo:10.1f} -> {r['mediana_ms']:10.1f} ms  x{r['mediana_ms'] / previo:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", nargs="+", default=["10k", "100k"], help="10k, 100k, 1m o números")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=sinteticos.SEMILLA)
+    parser.add_argument("--omitir", nargs="*", default=[], choices=list(CASOS))
+    parser.add_argument("--dir-datos", help="carpeta para conservar y reutilizar las bases generadas")
+    parser.add_argument("--salida", help="ruta del reporte JSON")
+    parser.add_argument("--comparar", help="reporte JSON anterior para calcular la variación")
+    args = parser.parse_args()
+
+    if args.dir_datos:
+        os.makedirs(args.dir_datos, exist_ok=True)
+        reporte = correr(args, args.dir_datos)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            reporte = correr(args, tmp)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"\nReporte: {args.salida}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(reporte, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
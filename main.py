@@ -1,9 +1,10 @@
 import streamlit as st
-import pandas as pd
 import sqlite3
 import os
-from datetime import date
-from modules import auth, dashboard, inventory, registrar, reporting, audit
+from contextlib import nullcontext
+# Solo lo que necesita la pantalla de login; las vistas (y pandas, plotly, matplotlib,
+# PDF e IA) se importan al abrirlas. Medición: python -m benchmarks.bench_arranque
+from modules import auth, instrumentacion, migraciones, navegacion
 
 # --- CONFIGURACIÓN DE PÁGINA ---
 st.set_page_config(page_title="LOGISTICS ENGINE v2.0", layout="wide")
@@ -61,79 +62,12 @@ if (document.readyState === 'loading') {
 
 
 def init_db():
-    """Inicializa y actualiza la base de datos de forma segura."""
-    conn = sqlite3.connect('logistics_v2.db')
-    cursor = conn.cursor()
-    
+    """Prepara el esquema una sola vez por proceso; en los reruns no toca la base."""
     try:
-        # 1. Crear tabla principal si no existe
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vuelos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                Pasajero TEXT NOT NULL,
-                Origen TEXT,
-                Destino TEXT,
-                Estado TEXT,
-                Costo REAL,
-                PNR TEXT,
-                Equipaje TEXT,
-                Extra TEXT,
-                Fecha TEXT,
-                Soporte TEXT,
-                Usuario TEXT,
-                Hora TEXT
-            )
-        ''')
-
-        # 2. Crear tabla de configuración para la API KEY y otros ajustes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS configuracion (
-                clave TEXT PRIMARY KEY,
-                valor TEXT
-            )
-        ''')
-        
-        # 3. MIGRACIONES: Verificar y agregar columnas faltantes una por una
-        cursor.execute("PRAGMA table_info(vuelos)")
-        columnas = [columna[1] for columna in cursor.fetchall()]
-        
-        migraciones = {
-            'Pais': 'ALTER TABLE vuelos ADD COLUMN Pais TEXT DEFAULT "N/A"',
-            'deleted_at': 'ALTER TABLE vuelos ADD COLUMN deleted_at TEXT DEFAULT NULL',
-            'Correo': 'ALTER TABLE vuelos ADD COLUMN Correo TEXT DEFAULT ""',
-            'Telefono': 'ALTER TABLE vuelos ADD COLUMN Telefono TEXT DEFAULT ""',
-            'Aerolinea': 'ALTER TABLE vuelos ADD COLUMN Aerolinea TEXT DEFAULT "N/A"',
-            'Boleto_Ligado': 'ALTER TABLE vuelos ADD COLUMN Boleto_Ligado TEXT DEFAULT ""',
-            'Motivo': 'ALTER TABLE vuelos ADD COLUMN Motivo TEXT DEFAULT "NO ESPECIFICADO"',
-            'Autoriza': 'ALTER TABLE vuelos ADD COLUMN Autoriza TEXT DEFAULT "PENDIENTE"',
-            'Fecha_Regreso': 'ALTER TABLE vuelos ADD COLUMN Fecha_Regreso TEXT DEFAULT ""',
-            'Tipo_Viaje': 'ALTER TABLE vuelos ADD COLUMN Tipo_Viaje TEXT DEFAULT "Sencillo"'
-        }
-        
-
-        for col, query in migraciones.items():
-            if col not in columnas:
-                cursor.execute(query)
-        
-        conn.commit()
-        
-        # 4. INSERTAR DATOS DEMO (Solo si la tabla está vacía)
-        cursor.execute("SELECT COUNT(*) FROM vuelos")
-        if cursor.fetchone()[0] == 0:
-            vuelos_demo = [
-                ("ALEXANDER PIERCE", "JFK", "LHR", "Activo", 2450.0, "XP-992", "FULL", "NO", "2024-05-10", "", "ADMIN", "22:15", "ESTADOS UNIDOS", "528100000000", "DELTA", ""),
-                ("SARAH JENKINS", "MEX", "CDG", "Abierto (Disponible)", 1800.0, "FR-112", "MANO", "SÍ", "2024-05-15", "", "ADMIN", "11:00", "MÉXICO", "", "AEROMEXICO", "")
-            ]
-            cursor.executemany('''
-                INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Equipaje, Extra, Fecha, Soporte, Usuario, Hora, Pais, Telefono, Aerolinea, Boleto_Ligado)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', vuelos_demo)
-            conn.commit()
-            
+        with instrumentacion.tramo("arranque.migraciones"):
+            migraciones.preparar_base()
     except sqlite3.Error as e:
         st.error(f"Error crítico en la base de datos: {e}")
-    finally:
-        conn.close()
 
 def init_session_state():
     """Carga la configuración inicial de la sesión."""
@@ -158,16 +92,22 @@ def init_session_state():
     if 'logs' not in st.session_state:
         st.session_state['logs'] = []
 
-    # Carga de datos optimizada
+    # Una sola copia de los vuelos por proceso: la sesión solo toma una vista nueva
+    # cuando cambia la versión de los datos (escrituras avisadas con almacen.marcar_cambio).
+    # Antes del login no se cargan (ni se importa pandas).
+    if not st.session_state['autenticado']:
+        return
+    from modules import almacen
     try:
-        conn = sqlite3.connect('logistics_v2.db')
-        st.session_state['db_vuelos'] = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-        conn.close()
+        with instrumentacion.tramo("sesion.instantanea"):
+            version, vista = almacen.instantanea(st.session_state.get('db_vuelos_version'))
+        if vista is not None:
+            st.session_state['db_vuelos'] = vista
+            st.session_state['db_vuelos_version'] = version
     except:
+        import pandas as pd
         st.session_state['db_vuelos'] = pd.DataFrame()
-
-# --- INICIALIZACIÓN ---
-init_session_state()
+        st.session_state.pop('db_vuelos_version', None)
 
 # --- ESTILOS VISUALES (MODO DARK ENTERPRISE) ---
 st.markdown("""
@@ -246,26 +186,67 @@ def main():
             </div>
         """, unsafe_allow_html=True)
         
+        arranque = migraciones.estado_arranque()
+        if rol_user == 'ADMIN' and arranque:
+            st.sidebar.caption(f"ESQUEMA v{arranque['version']} // MIGRACIÓN {arranque['duracion_ms']:.1f} ms (solo al arrancar el proceso)")
+        from modules import almacen
+        mem = almacen.memoria(st.session_state.get('db_vuelos'))
+        if rol_user == 'ADMIN' and mem:
+            st.sidebar.caption(f"VUELOS EN MEMORIA: {mem['filas']:,} filas // {mem['bytes_compartidos'] / 2**20:.1f} MB compartidos "
+                               f"(sin tipar {mem['bytes_sin_tipar'] / 2**20:.1f} MB) // sesión: {mem['bytes_propios'] / 2**20:.2f} MB propios")
+            sinc = almacen.estadisticas()
+            st.sidebar.caption(f"DATOS v{sinc['version']} // {sinc['revisiones']} lecturas a la base · {sinc['omitidas']} reruns sin consultarla")
+        if rol_user == 'ADMIN' and navegacion.tiempos():
+            st.sidebar.caption("RENDER POR VISTA (ÚLTIMO / MÁX): " + " · ".join(
+                f"{nombre} {t['ultimo_ms']:.0f}/{t['max_ms']:.0f} ms" for nombre, t in navegacion.tiempos().items()))
+        if rol_user == 'ADMIN':
+            panel_instrumentacion()
+
         if c_nav2.button("SALIR", use_container_width=True):
             st.session_state.autenticado = False
             st.session_state.usuario = None
             st.query_params.clear()
             st.rerun()
 
-        # Menú Principal
-        tabs = st.tabs([
-            "📈 DASHBOARD", 
-            "📦 INVENTARIO", 
-            "📝 REGISTRO", 
-            "🤖 INTELIGENCIA", 
-            # "🛡️ AUDITORÍA"
-        ])
-        
-        with tabs[0]: dashboard.render()
-        with tabs[1]: inventory.render()
-        with tabs[2]: registrar.render()
-        with tabs[3]: reporting.render()
-        # with tabs[4]: audit.render() # Asegúrate de tener audit.py con la función render()
-
+        # Menú Principal: solo corre la vista elegida (cada una es un fragmento con su propio rerun)
+        navegacion.ejecutar({
+            "📈 DASHBOARD": "modules.dashboard",
+            "📦 INVENTARIO": "modules.inventory",
+            "📝 REGISTRO": "modules.registrar",
+            "🤖 INTELIGENCIA": "modules.reporting",
+            # "🛡️ AUDITORÍA": "modules.audit",  # Asegúrate de tener audit.py con la función render()
+        })
+
+def _leer_bytes(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+def panel_instrumentacion():
+    """Solo admin: p50/p95 por tramo del proceso y perfil cProfile de un rerun."""
+    with st.sidebar.expander("⏱️ INSTRUMENTACIÓN", expanded=False):
+        resumen = instrumentacion.resumen()
+        if resumen:
+            st.dataframe(resumen, hide_index=True, use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ('p50_ms', 'p95_ms', 'max_ms', 'sql_prom', 'sql_ms_prom', 'filas_prom')})
+            st.caption(f"Últimos {len(instrumentacion.recientes()):,} tramos de este proceso // log: {instrumentacion.RUTA_LOG}")
+        if st.button("🔬 PERFILAR SIGUIENTE RERUN", use_container_width=True, key="btn_perfilar"):
+            st.session_state['perfilar_rerun'] = True
+            st.rerun()
+        ultimo = st.session_state.get('ultimo_perfil')
+        if ultimo and 'error' in ultimo:
+            st.warning(f"No se pudo perfilar: {ultimo['error']}")
+        elif ultimo:
+            st.download_button("⬇️ PERFIL (.prof)", data=lambda: _leer_bytes(ultimo['ruta']),
+                               file_name=os.path.basename(ultimo['ruta']), use_container_width=True, key="dl_perfil")
+            st.code(ultimo['texto'], language=None)
+
+# --- INICIALIZACIÓN Y RERUN (MEDIDOS; PERFIL cProfile SI EL ADMIN LO PIDIÓ) ---
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    perfilar = st.session_state.pop('perfilar_rerun', False)
+    with (instrumentacion.perfil() if perfilar else nullcontext()) as perfil_rerun:
+        with instrumentacion.tramo("rerun"):
+            with instrumentacion.tramo("sesion.inicializar"):
+                init_session_state()
+            main()
+    if perfilar:
+        st.session_state['ultimo_perfil'] = perfil_rerun
\ No newline at end of file
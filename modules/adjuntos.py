@@ -0,0 +1,282 @@
+"""Almacén de adjuntos direccionado por contenido.
+
+Cada archivo se guarda una sola vez en `attachments/blobs/ab/cd/<sha256>`; la
+tabla `adjuntos` liga los blobs con los vuelos (con el nombre original), así
+que subir el mismo PDF para varios pasajeros o varias veces no lo duplica.
+
+Uso desde consola:
+    python -m modules.adjuntos gc            # borra blobs sin referencias
+    python -m modules.adjuntos migrar        # pasa al almacén las rutas que sigan en Soporte
+    python -m modules.adjuntos gc --legado   # además borra los archivos planos ya migrados
+"""
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+from modules import db, instrumentacion
+
+# --- VISTAS PREVIAS (OPCIONALES; SE IMPORTAN AL GENERAR LA PRIMERA) ---
+MINIATURAS_DISPONIBLES = importlib.util.find_spec("PIL") is not None
+PREVIA_PDF_DISPONIBLE = MINIATURAS_DISPONIBLES and importlib.util.find_spec("pypdfium2") is not None
+
+logger = logging.getLogger(__name__)
+
+RAIZ = "attachments"
+DIR_BLOBS = os.path.join(RAIZ, "blobs")
+DIR_MINIATURAS = os.path.join(RAIZ, "miniaturas")
+TAMANO_BLOQUE = 1024 * 1024
+ANCHO_MINIATURA = 320
+EXT_IMAGEN = ('jpg', 'jpeg', 'png')
+# Un blob recién escrito sin referencia puede ser de una transacción en curso: se respeta este margen
+GRACIA_GC_S = 3600
+
+# --- BLOBS EN DISCO ---
+def ruta_blob(sha256, raiz=DIR_BLOBS):
+    return os.path.join(raiz, sha256[:2], sha256[2:4], sha256)
+
+def _bloques(contenido):
+    """Itera bytes o un archivo abierto (p. ej. `UploadedFile`) en bloques de `TAMANO_BLOQUE`."""
+    if isinstance(contenido, (bytes, bytearray, memoryview)):
+        vista = memoryview(contenido)
+        for i in range(0, len(vista), TAMANO_BLOQUE):
+            yield vista[i:i + TAMANO_BLOQUE]
+        return
+    if hasattr(contenido, "seek"):
+        contenido.seek(0)
+    while bloque := contenido.read(TAMANO_BLOQUE):
+        yield bloque
+
+@instrumentacion.medido("adjuntos.guardar_blob")
+def guardar_blob(contenido, raiz=DIR_BLOBS):
+    """Escribe el contenido por bloques y regresa `(sha256, tamano)`.
+
+    La huella se calcula mientras se copia a un temporal, así que un escaneo
+    grande nunca está completo en memoria; si el blob ya existía el temporal se descarta
+    y se renueva su mtime para que el GC le vuelva a dar el periodo de gracia.
+    """
+    os.makedirs(raiz, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=raiz, prefix=".subida_")
+    try:
+        suma, tamano = hashlib.sha256(), 0
+        with os.fdopen(fd, "wb") as f:
+            for bloque in _bloques(contenido):
+                suma.update(bloque)
+                f.write(bloque)
+                tamano += len(bloque)
+        sha = suma.hexdigest()
+        destino = ruta_blob(sha, raiz)
+        try:
+            os.utime(destino)
+            os.remove(temporal)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.replace(temporal, destino)
+        return sha, tamano
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+def leer(sha256):
+    """Contenido completo de un blob; pensado como `data=` diferido de `st.download_button`."""
+    with open(ruta_blob(sha256), "rb") as f:
+        return f.read()
+
+# --- REFERENCIAS (TABLAS blobs / adjuntos) ---
+def vincular(conn, vuelo_ids, sha256, nombre, tamano):
+    """Liga un blob ya escrito con uno o varios vuelos dentro de la transacción de `conn`."""
+    ahora = datetime.now().isoformat(timespec="seconds")
+    conn.execute("INSERT OR IGNORE INTO blobs (sha256, tamano, creado_en) VALUES (?, ?, ?)", (sha256, tamano, ahora))
+    conn.executemany("INSERT OR IGNORE INTO adjuntos (vuelo_id, sha256, nombre, creado_en) VALUES (?, ?, ?, ?)",
+                     [(int(v), sha256, nombre, ahora) for v in vuelo_ids])
+
+def adjuntar(vuelo_ids, archivos, conn=None, ruta_db=db.DB_PATH):
+    """Guarda `archivos` [(nombre, bytes o archivo)] y los liga con `vuelo_ids`; regresa los sha256.
+
+    Con `conn` se usa la transacción del llamador (p. ej. el alta de la reserva).
+    """
+    blobs = [(*guardar_blob(contenido), nombre) for nombre, contenido in archivos]
+    if conn is not None:
+        for sha, tamano, nombre in blobs:
+            vincular(conn, vuelo_ids, sha, nombre, tamano)
+    else:
+        with db.transaccion(ruta_db) as conn:
+            for sha, tamano, nombre in blobs:
+                vincular(conn, vuelo_ids, sha, nombre, tamano)
+    return [sha for sha, _, _ in blobs]
+
+def copiar_referencias(conn, de_vuelo, a_vuelo):
+    """El nuevo vuelo comparte los mismos documentos (sin copiar archivos)."""
+    conn.execute("INSERT OR IGNORE INTO adjuntos (vuelo_id, sha256, nombre, creado_en) "
+                 "SELECT ?, sha256, nombre, creado_en FROM adjuntos WHERE vuelo_id=?", (int(a_vuelo), int(de_vuelo)))
+
+def listar(vuelo_id, ruta_db=db.DB_PATH):
+    """Documentos del vuelo: dicts con sha256, nombre, tamano y ruta en disco."""
+    filas = db.consultar_df(
+        "SELECT a.sha256, a.nombre, b.tamano FROM adjuntos a JOIN blobs b ON b.sha256 = a.sha256 "
+        "WHERE a.vuelo_id=? ORDER BY a.id", (int(vuelo_id),), ruta_db=ruta_db)
+    return [dict(f, ruta=ruta_blob(f['sha256'])) for f in filas.to_dict('records')]
+
+def desvincular(vuelo_id, sha256, ruta_db=db.DB_PATH):
+    """Quita el documento del vuelo; el blob queda para el recolector si nadie más lo usa."""
+    return db.ejecutar("DELETE FROM adjuntos WHERE vuelo_id=? AND sha256=?", (int(vuelo_id), sha256), ruta_db=ruta_db)
+
+# --- MINIATURAS EN CACHÉ ---
+def ruta_miniatura(sha256, ancho=ANCHO_MINIATURA):
+    return os.path.join(DIR_MINIATURAS, sha256[:2], f"{sha256}_{ancho}.jpg")
+
+def miniatura(sha256, nombre, ancho=ANCHO_MINIATURA):
+    """Ruta de una vista previa JPEG (imagen reducida o primera página del PDF), o None.
+
+    Se genera una sola vez por contenido y ancho; las siguientes aperturas del
+    modal solo leen el archivo chico de `attachments/miniaturas`.
+    """
+    destino = ruta_miniatura(sha256, ancho)
+    if os.path.exists(destino):
+        return destino
+    ext = nombre.rsplit('.', 1)[-1].lower()
+    try:
+        with instrumentacion.tramo("adjuntos.miniatura"):
+            if ext in EXT_IMAGEN and MINIATURAS_DISPONIBLES:
+                from PIL import Image
+                with Image.open(ruta_blob(sha256)) as img:
+                    img.draft("RGB", (ancho, ancho))  # JPEG: decodifica ya reducido
+                    previa = img.convert("RGB")
+            elif ext == 'pdf' and PREVIA_PDF_DISPONIBLE:
+                import pypdfium2 as pdfium
+                documento = pdfium.PdfDocument(ruta_blob(sha256))
+                try:
+                    pagina = documento[0]
+                    previa = pagina.render(scale=ancho / pagina.get_width()).to_pil().convert("RGB")
+                finally:
+                    documento.close()
+            else:
+                return None
+            previa.thumbnail((ancho, ancho * 2))
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), prefix=".previa_")
+            with os.fdopen(fd, "wb") as f:
+                previa.save(f, "JPEG", quality=80)
+            os.replace(temporal, destino)
+        return destino
+    except Exception as e:
+        logger.warning("No se pudo generar la vista previa de %s (%s): %s", nombre, sha256[:12], e)
+        return None
+
+# --- RECOLECCIÓN DE BASURA ---
+def recolectar_basura(ruta_db=db.DB_PATH, raiz=DIR_BLOBS, gracia_s=GRACIA_GC_S):
+    """Borra los blobs sin ninguna referencia (en tabla y disco), los archivos huérfanos y sus miniaturas.
+
+    La lista de la transacción solo propone candidatos: antes de borrar cada
+    archivo se vuelve a revisar que siga fuera de `blobs` y fuera del periodo de
+    gracia, porque una subida del mismo contenido puede haberlo reutilizado entretanto.
+    """
+    limite = time.time() - gracia_s
+    with db.transaccion(ruta_db) as conn:
+        sin_uso = [r[0] for r in conn.execute(
+            "SELECT sha256 FROM blobs b WHERE NOT EXISTS (SELECT 1 FROM adjuntos a WHERE a.sha256 = b.sha256)")]
+        conn.executemany("DELETE FROM blobs WHERE sha256=?", [(s,) for s in sin_uso])
+        conocidos = {r[0] for r in conn.execute("SELECT sha256 FROM blobs")}
+    # Candidatos: los blobs recién dados de baja y los archivos que no estaban en la tabla
+    candidatos = {s: ruta_blob(s, raiz) for s in sin_uso}
+    for directorio, _, nombres in os.walk(raiz):
+        for nombre in nombres:
+            if nombre not in conocidos:
+                candidatos.setdefault(nombre, os.path.join(directorio, nombre))
+    borrados, liberados = 0, 0
+    for sha, ruta in candidatos.items():
+        try:
+            if os.path.getmtime(ruta) > limite:
+                continue
+            if db.consultar_uno("SELECT 1 FROM blobs WHERE sha256=?", (sha,), ruta_db=ruta_db):
+                continue
+            tamano = os.path.getsize(ruta)
+            os.remove(ruta)
+        except FileNotFoundError:
+            continue
+        liberados += tamano
+        borrados += 1
+    for directorio, _, nombres in os.walk(DIR_MINIATURAS):
+        for nombre in nombres:
+            if nombre.split('_')[0] not in conocidos:
+                os.remove(os.path.join(directorio, nombre))
+    return {'blobs_sin_referencia': len(sin_uso), 'archivos_borrados': borrados, 'bytes_liberados': liberados}
+
+# --- MIGRACIÓN DE RUTAS EN `Soporte` ---
+# Prefijos que agregaban las versiones anteriores: "{id}_", "{AAAAMMDD_HHMMSS}_"
+_PREFIJO_LEGADO = re.compile(r'^(\d{8}_\d{6}_|\d+_)')
+
+def migrar_soportes(conn, raiz=DIR_BLOBS, desde_id=0):
+    """Pasa al almacén los archivos listados en `vuelos.Soporte` (separados por '|').
+
+    Los vuelos cuyos archivos quedaron todos ligados se limpian de `Soporte`;
+    si falta alguno en disco, la cadena se conserva para no perder la pista.
+    Con `desde_id` solo se revisan los vuelos con id mayor (p. ej. los recién importados).
+    Regresa {'archivos', 'blobs', 'faltantes'}. No borra los archivos originales.
+    """
+    vistos, faltantes, archivos = set(), 0, 0
+    filas = conn.execute("SELECT id, Soporte FROM vuelos WHERE id > ? AND TRIM(COALESCE(Soporte, '')) != ''",
+                         (int(desde_id),)).fetchall()
+    for vuelo_id, soporte in filas:
+        completos = True
+        for ruta in [r.strip() for r in soporte.split('|') if r.strip()]:
+            ruta_local = ruta.replace('\\', os.sep).replace('/', os.sep)
+            if not os.path.isfile(ruta_local):
+                logger.warning("Adjunto no encontrado para el vuelo %s: %s", vuelo_id, ruta)
+                faltantes += 1
+                completos = False
+                continue
+            with open(ruta_local, "rb") as f:
+                sha, tamano = guardar_blob(f, raiz)
+            vincular(conn, [vuelo_id], sha, _PREFIJO_LEGADO.sub('', os.path.basename(ruta_local)), tamano)
+            vistos.add(sha)
+            archivos += 1
+        if completos:
+            conn.execute("UPDATE vuelos SET Soporte='' WHERE id=?", (vuelo_id,))
+    return {'archivos': archivos, 'blobs': len(vistos), 'faltantes': faltantes}
+
+def borrar_legado(raiz_legado=RAIZ, raiz=DIR_BLOBS):
+    """Borra los archivos planos de `attachments/` cuyo contenido ya está en el almacén."""
+    borrados = 0
+    for nombre in os.listdir(raiz_legado):
+        ruta = os.path.join(raiz_legado, nombre)
+        if os.path.isfile(ruta):
+            suma = hashlib.sha256()
+            with open(ruta, "rb") as f:
+                for bloque in _bloques(f):
+                    suma.update(bloque)
+            if os.path.exists(ruta_blob(suma.hexdigest(), raiz)):
+                os.remove(ruta)
+                borrados += 1
+    return borrados
+
+# --- ENTRADA DE CONSOLA ---
+def main(argv=None):
+    from modules import migraciones
+
+    parser = argparse.ArgumentParser(description="Mantenimiento del almacén de adjuntos.")
+    parser.add_argument("accion", choices=["gc", "migrar"])
+    parser.add_argument("--legado", action="store_true", help="con gc: borrar archivos planos ya migrados")
+    args = parser.parse_args(argv)
+
+    migraciones.preparar_base()
+    if args.accion == "migrar":
+        with db.transaccion() as conn:
+            r = migrar_soportes(conn)
+        print(f"{r['archivos']} archivos ligados ({r['blobs']} blobs distintos), {r['faltantes']} no encontrados.")
+    else:
+        r = recolectar_basura()
+        print(f"{r['blobs_sin_referencia']} blobs sin referencia, {r['archivos_borrados']} archivos borrados "
+              f"({r['bytes_liberados'] / 2**20:.1f} MB).")
+        if args.legado:
+            print(f"{borrar_legado()} archivos planos ya migrados borrados.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
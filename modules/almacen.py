@@ -0,0 +1,311 @@
+import re
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from modules import archivo, db, instrumentacion
+
+# Con Copy-on-Write las copias superficiales que recibe cada sesión comparten los
+# arreglos del almacén y solo duplican una columna si la sesión la modifica.
+# (Siempre activo desde pandas 3.0; en 2.x hay que encenderlo.)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# --- REPRESENTACIÓN COMPACTA DEL DATAFRAME ---
+COLUMNAS_CATEGORICAS = ['Estado', 'Aerolinea', 'Origen', 'Destino', 'Pais', 'Equipaje', 'Extra',
+                        'Usuario', 'Motivo', 'Autoriza', 'Tipo_Viaje']
+COLUMNAS_FECHA = ['Fecha', 'Fecha_Regreso']
+COLUMNAS_ENTERAS = ['id', 'rev']
+# Tolerancia para guardar Costo en float32: cada importe debe sobrevivir al centavo
+TOLERANCIA_FLOAT32 = 0.005
+
+def tipar(df):
+    """Convierte el DataFrame crudo de `vuelos` a tipos compactos.
+
+    Columnas de pocos valores a `category`, fechas a datetime64, ids a enteros
+    pequeños y Costo a float32 solo si ningún importe pierde centavos.
+    """
+    tipos = {}
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns:
+            tipos[columna] = df[columna].astype('category')
+    for columna in COLUMNAS_FECHA:
+        if columna in df.columns:
+            tipos[columna] = pd.to_datetime(df[columna], errors='coerce', format='ISO8601')
+    for columna in COLUMNAS_ENTERAS:
+        if columna in df.columns and df[columna].notna().all():
+            tipos[columna] = pd.to_numeric(df[columna], downcast='integer')
+    if 'Costo' in df.columns:
+        costo = pd.to_numeric(df['Costo'], errors='coerce').astype('float64')
+        costo32 = costo.astype('float32')
+        if (np.abs(costo32.astype('float64') - costo) <= TOLERANCIA_FLOAT32).where(costo.notna(), True).all():
+            costo = costo32
+        tipos['Costo'] = costo
+    return df.assign(**tipos)
+
+# Cada cuánto se revisa la base aunque nadie de este proceso haya escrito
+INTERVALO_REVISION_S = 5.0
+
+def _bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _posiciones(ids_ordenados, buscados):
+    """Posición de cada id buscado en el arreglo ordenado de ids; -1 si no está."""
+    pos = np.searchsorted(ids_ordenados, buscados)
+    encontrado = pos < len(ids_ordenados)
+    encontrado[encontrado] = ids_ordenados[pos[encontrado]] == buscados[encontrado]
+    return np.where(encontrado, pos, -1)
+
+def _alinear_tipos(base, delta):
+    """Lleva base y delta a los mismos dtypes sin re-tipar la base.
+
+    Las categorías se unen (la base solo agrega las que trae el delta) y los
+    numéricos suben al tipo común (p. ej. un id que ya no cabe en int16).
+    """
+    base = base.copy(deep=False)
+    cambios_delta = {}
+    for columna in delta.columns:
+        tipo_base, tipo_delta = base[columna].dtype, delta[columna].dtype
+        if isinstance(tipo_base, pd.CategoricalDtype):
+            faltantes = pd.Index(delta[columna].dropna().unique()).difference(tipo_base.categories)
+            if len(faltantes):
+                base[columna] = base[columna].cat.add_categories(faltantes)
+            cambios_delta[columna] = delta[columna].astype(base[columna].dtype)
+        elif tipo_base == tipo_delta:
+            continue
+        elif pd.api.types.is_numeric_dtype(tipo_base) and pd.api.types.is_numeric_dtype(tipo_delta):
+            comun = np.result_type(tipo_base, tipo_delta)
+            if comun != tipo_base:
+                base[columna] = base[columna].astype(comun)
+            cambios_delta[columna] = delta[columna].astype(comun)
+        elif delta[columna].isna().all():
+            cambios_delta[columna] = delta[columna].astype(tipo_base)
+        else:
+            base[columna] = base[columna].astype(object)
+            cambios_delta[columna] = delta[columna].astype(object)
+    return base, delta.assign(**cambios_delta)
+
+
+class AlmacenVuelos:
+    """Copia en memoria de los vuelos vivos, compartida por todo el proceso.
+
+    La tabla se lee completa una sola vez; a partir de ahí cada sincronización
+    trae únicamente las filas cuyo `rev` supera el último cursor visto
+    (altas, ediciones y bajas lógicas), así que el costo depende de los
+    cambios y no del tamaño de la tabla. Los borrados físicos (el archivado)
+    no dejan `rev`: suben la generación y provocan una recarga completa.
+    """
+
+    def __init__(self, ruta_db=db.DB_PATH):
+        self.ruta_db = ruta_db
+        self._lock = threading.Lock()
+        self._df = None
+        self._cursor = 0
+        self._generacion = None
+        self._version = 0   # cambia con cada DataFrame nuevo; el cursor puede bajar tras archivar
+        self._bytes_sin_tipar = 0
+        self.intervalo_s = INTERVALO_REVISION_S
+        self._pendiente = True
+        self._ultima_revision = 0.0
+        self._estadisticas = {'revisiones': 0, 'omitidas': 0}
+
+    def _carga_completa(self, conn):
+        # El cursor se lee ANTES que los datos: si alguien escribe en medio, la
+        # fila vuelve a llegar en la siguiente sincronización (el upsert es idempotente).
+        self._generacion = archivo.generacion(conn)
+        self._cursor = conn.execute("SELECT COALESCE(MAX(rev), 0) FROM vuelos").fetchone()[0]
+        crudo = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL ORDER BY id", conn)
+        self._bytes_sin_tipar = _bytes(crudo)
+        self._df = tipar(crudo)
+        self._version += 1
+
+    def _aplicar_cambios(self, cambios):
+        # Solo se tipa el delta: las filas existentes se reescriben en su lugar
+        # (posición por búsqueda binaria sobre `id`, que se mantiene ordenado) y
+        # las nuevas se anexan, así que nada recorre ni re-tipa la tabla completa.
+        vivos = tipar(cambios[cambios['deleted_at'].isna()])
+        df, vivos = _alinear_tipos(self._df, vivos)
+        ids = df['id'].to_numpy()
+
+        pos_bajas = _posiciones(ids, cambios.loc[cambios['deleted_at'].notna(), 'id'].to_numpy())
+        pos_vivos = _posiciones(ids, vivos['id'].to_numpy())
+        existentes = pos_vivos >= 0
+        if existentes.any():
+            for columna in vivos.columns:
+                df.iloc[pos_vivos[existentes], df.columns.get_loc(columna)] = vivos[columna].array[existentes]
+        if (pos_bajas >= 0).any():
+            df = df.drop(index=df.index[pos_bajas[pos_bajas >= 0]])
+        altas = vivos[~existentes]
+        if not altas.empty:
+            ordenado = df.empty or altas['id'].min() > df['id'].iloc[-1]
+            df = pd.concat([df, altas[df.columns]], ignore_index=True)
+            if not ordenado or not altas['id'].is_monotonic_increasing:
+                # Una baja lógica revertida regresa con un id intermedio
+                df = df.sort_values('id', kind='stable')
+        self._df = df.reset_index(drop=True)
+        self._cursor = int(cambios['rev'].max())
+        self._version += 1
+
+    def _revisar(self):
+        # Sin escrituras propias avisadas y con una revisión reciente no se toca la base;
+        # el intervalo solo acota cuánto tarda en verse lo escrito por otro proceso (p. ej. el CLI de lotes).
+        if self._df is not None and not self._pendiente and time.monotonic() - self._ultima_revision < self.intervalo_s:
+            self._estadisticas['omitidas'] += 1
+            return
+        with instrumentacion.tramo("almacen.revisar") as t, db.conexion(self.ruta_db) as conn:
+            if self._df is None or archivo.generacion(conn) != self._generacion:
+                self._carga_completa(conn)
+                t.filas = len(self._df)
+            else:
+                cambios = pd.read_sql_query("SELECT * FROM vuelos WHERE rev > ? ORDER BY rev", conn, params=(self._cursor,))
+                t.filas = len(cambios)
+                if not cambios.empty:
+                    self._aplicar_cambios(cambios)
+        self._pendiente = False
+        self._ultima_revision = time.monotonic()
+        self._estadisticas['revisiones'] += 1
+
+    def sincronizar(self):
+        """Aplica los cambios pendientes y devuelve una vista del DataFrame vigente.
+
+        Cada llamada recibe su propia copia superficial: comparte la memoria del
+        almacén y, por Copy-on-Write, lo que una sesión modifique no toca a las demás.
+        """
+        return self.instantanea()[1]
+
+    def instantanea(self, version_sesion=None):
+        """(versión, vista) tomadas juntas; la vista es None si la sesión ya tiene esa versión."""
+        with self._lock:
+            self._revisar()
+            if version_sesion == self._version:
+                return self._version, None
+            return self._version, self._df.copy(deep=False)
+
+    def marcar_cambio(self):
+        """Avisa que este proceso escribió en `vuelos`: la próxima sincronización consulta la base."""
+        with self._lock:
+            self._pendiente = True
+
+    def version(self):
+        """Versión del DataFrame vigente; cambia con cada escritura aplicada."""
+        return self._version
+
+    def estadisticas(self):
+        with self._lock:
+            return dict(self._estadisticas, version=self._version)
+
+    def memoria(self, df_sesion=None):
+        """Reporte de memoria: tabla compartida vs. su tamaño sin tipar y lo propio de una sesión."""
+        df = self._df
+        if df is None:
+            return None
+        reporte = {
+            'filas': len(df),
+            'bytes_compartidos': _bytes(df),
+            'bytes_sin_tipar': self._bytes_sin_tipar,
+            'por_columna': df.memory_usage(deep=True, index=False).to_dict(),
+            'columnas_propias': [],
+            'bytes_propios': 0,
+        }
+        if df_sesion is not None:
+            # Columnas que la sesión agregó o reemplazó por un tipo distinto: esas ya no se comparten
+            propias = [c for c in df_sesion.columns if c not in df.columns or df_sesion[c].dtype != df[c].dtype]
+            reporte['columnas_propias'] = propias
+            reporte['bytes_propios'] = int(df_sesion[propias].memory_usage(deep=True, index=False).sum()) if propias else 0
+        return reporte
+
+    def invalidar(self):
+        """Fuerza una recarga completa en la próxima sincronización."""
+        with self._lock:
+            self._df = None
+            self._cursor = 0
+            self._pendiente = True
+
+
+# --- INSTANCIA ÚNICA POR PROCESO ---
+_almacen = AlmacenVuelos()
+
+def sincronizar():
+    return _almacen.sincronizar()
+
+def instantanea(version_sesion=None):
+    return _almacen.instantanea(version_sesion)
+
+def marcar_cambio():
+    _almacen.marcar_cambio()
+
+def version():
+    return _almacen.version()
+
+def estadisticas():
+    return _almacen.estadisticas()
+
+def memoria(df_sesion=None):
+    return _almacen.memoria(df_sesion)
+
+def invalidar():
+    _almacen.invalidar()
+
+
+# --- CONSULTAS FILTRADAS EN SQL ---
+def expresion_busqueda(texto):
+    """Convierte lo tecleado en una consulta FTS5: cada palabra como prefijo y todas requeridas.
+
+    Las palabras se citan para que comillas, guiones u operadores (`OR`, `NEAR`)
+    del usuario no se interpreten como sintaxis de FTS5.
+    """
+    palabras = re.findall(r"\w+", texto or "")
+    return " ".join(f'"{p}"*' for p in palabras)
+
+def _filtros_sql(inicio=None, fin=None, estados=None, pasajeros=None, aerolineas=None, busqueda=None):
+    # Todas las condiciones incluyen `deleted_at IS NULL`, así que el planificador
+    # puede usar los índices parciales sobre filas vivas en lugar de recorrer la tabla.
+    condiciones = ["deleted_at IS NULL"]
+    params = []
+    if inicio:
+        condiciones.append("Fecha >= ?")
+        params.append(str(inicio))
+    if fin:
+        # Fecha es texto ISO; el límite abierto del día siguiente incluye horas dentro de `fin`
+        condiciones.append("Fecha < ?")
+        params.append(str(fin + timedelta(days=1)))
+    for columna, valores in (("Estado", estados), ("Pasajero", pasajeros), ("Aerolinea", aerolineas)):
+        if valores:
+            condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+            params.extend(valores)
+    consulta_fts = expresion_busqueda(busqueda)
+    if consulta_fts:
+        condiciones.append("id IN (SELECT rowid FROM vuelos_fts WHERE vuelos_fts MATCH ?)")
+        params.append(consulta_fts)
+    return " AND ".join(condiciones), params
+
+def consultar_vuelos(inicio=None, fin=None, estados=None, pasajeros=None, aerolineas=None, busqueda=None,
+                     orden="id", limite=None, desplazamiento=0, incluir_archivo=False, ruta_db=db.DB_PATH):
+    """Vuelos vivos filtrados, ordenados y (opcionalmente) paginados directamente en SQLite.
+
+    `orden` se interpola tal cual: debe venir de una lista blanca del llamador.
+    Con `incluir_archivo` (centro BI) también se leen los vuelos archivados si
+    el rango los alcanza; la búsqueda de texto solo cubre la tabla caliente.
+    """
+    where, params = _filtros_sql(inicio, fin, estados, pasajeros, aerolineas, busqueda)
+    tabla, adjuntas = archivo.origen_vuelos(inicio, ruta_db) if incluir_archivo else ("vuelos", ())
+    if not limite:
+        return db.consultar_df(f"SELECT * FROM {tabla} WHERE {where} ORDER BY {orden}", params, ruta_db=ruta_db, adjuntas=adjuntas)
+    # Paginado diferido: el OFFSET recorre solo ids y las filas completas se leen
+    # por clave primaria, así que las páginas profundas no arrastran `SELECT *`.
+    sql = (f"SELECT * FROM {tabla} WHERE id IN ("
+           f"SELECT id FROM {tabla} WHERE {where} ORDER BY {orden} LIMIT ? OFFSET ?) ORDER BY {orden}")
+    return db.consultar_df(sql, params + [int(limite), int(desplazamiento)], ruta_db=ruta_db, adjuntas=adjuntas)
+
+def contar_vuelos(inicio=None, fin=None, estados=None, pasajeros=None, aerolineas=None, busqueda=None, ruta_db=db.DB_PATH):
+    where, params = _filtros_sql(inicio, fin, estados, pasajeros, aerolineas, busqueda)
+    return db.consultar_uno(f"SELECT COUNT(*) FROM vuelos WHERE {where}", params, ruta_db=ruta_db)[0]
+
+def consultar_canjes(inicio=None, fin=None, pasajeros=None, aerolineas=None, incluir_archivo=False, ruta_db=db.DB_PATH):
+    """Vuelos vivos que reutilizaron el saldo de otro PNR (Boleto_Ligado con valor)."""
+    where, params = _filtros_sql(inicio, fin, None, pasajeros, aerolineas)
+    tabla, adjuntas = archivo.origen_vuelos(inicio, ruta_db) if incluir_archivo else ("vuelos", ())
+    return db.consultar_df(f"SELECT * FROM {tabla} WHERE {where} AND TRIM(COALESCE(Boleto_Ligado, '')) != '' ORDER BY id",
+                           params, ruta_db=ruta_db, adjuntas=adjuntas)
@@ -0,0 +1,245 @@
+"""Archivo histórico: saca de `vuelos` los boletos cerrados viejos y las bajas vencidas.
+
+Las filas pasan con el mismo id a una base aparte (`<base>_archivo.db`) que se
+adjunta con ATTACH solo cuando una consulta la necesita. La tabla caliente
+conserva lo operativo; el centro BI sigue viendo la historia completa porque
+sus resúmenes y sus boletos se leen de ambas bases cuando el rango empieza
+antes del último día archivado. Las referencias a adjuntos no se tocan (los ids
+no se reutilizan), así que la recolección de basura conserva esos blobs.
+
+Uso desde consola:
+    python -m modules.archivo --simular
+    python -m modules.archivo --horizonte-dias 730 --retencion-dias 90 --guardar-politica
+    python -m modules.archivo --compactar
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from modules import db, instrumentacion, migraciones
+
+ALIAS = "archivo"
+# Política por defecto; se puede fijar por base en `configuracion` (ver `politica`)
+HORIZONTE_DIAS = 730          # boletos cerrados con Fecha más vieja que esto
+RETENCION_BAJAS_DIAS = 90     # bajas lógicas con deleted_at más viejo que esto (cualquier fecha de vuelo)
+ESTADOS_CERRADOS = ('Realizado', 'Cancelado', 'Canjeado')
+LOTE = 5000                   # filas por transacción: el candado de escritura se suelta entre lotes
+
+CLAVE_HORIZONTE = 'archivo_horizonte_dias'
+CLAVE_RETENCION = 'archivo_retencion_dias'
+CLAVE_LIMITE = 'archivo_hasta'            # último día con boletos vivos en el archivo
+CLAVE_GENERACION = 'vuelos_generacion'    # sube cada vez que se borran filas de `vuelos` (ver almacen)
+
+# Candidatos: bajas vencidas o boletos vivos cerrados antes del horizonte
+_CRITERIO = (f"(deleted_at IS NOT NULL AND deleted_at < ?) OR "
+             f"(deleted_at IS NULL AND Estado IN ({', '.join('?' * len(ESTADOS_CERRADOS))}) AND Fecha < ?)")
+
+
+def ruta_archivo(ruta_db=db.DB_PATH):
+    return os.path.splitext(ruta_db)[0] + "_archivo.db"
+
+def adjuntas(ruta_db=db.DB_PATH):
+    """Pares (alias, ruta) para `db.consultar_df(..., adjuntas=...)`."""
+    return ((ALIAS, ruta_archivo(ruta_db)),)
+
+def _config(conn, clave):
+    fila = conn.execute("SELECT valor FROM configuracion WHERE clave=?", (clave,)).fetchone()
+    return fila[0] if fila else None
+
+def generacion(conn):
+    """Contador de borrados físicos en `vuelos`; el cursor `rev` no los ve."""
+    return _config(conn, CLAVE_GENERACION)
+
+def politica(ruta_db=db.DB_PATH):
+    """(horizonte_dias, retencion_dias) guardados en la base o los valores por defecto."""
+    with db.conexion(ruta_db) as conn:
+        horizonte, retencion = _config(conn, CLAVE_HORIZONTE), _config(conn, CLAVE_RETENCION)
+    return int(horizonte or HORIZONTE_DIAS), int(retencion or RETENCION_BAJAS_DIAS)
+
+def guardar_politica(horizonte_dias, retencion_dias, ruta_db=db.DB_PATH):
+    with db.transaccion(ruta_db) as conn:
+        conn.executemany("INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)",
+                         [(CLAVE_HORIZONTE, str(int(horizonte_dias))), (CLAVE_RETENCION, str(int(retencion_dias)))])
+
+# --- LECTURA A TRAVÉS DE AMBAS BASES ---
+def limite(ruta_db=db.DB_PATH):
+    """Último día ('AAAA-MM-DD') con boletos vivos archivados; None si no hay archivo."""
+    fila = db.consultar_uno("SELECT valor FROM configuracion WHERE clave=?", (CLAVE_LIMITE,), ruta_db=ruta_db)
+    return fila[0] if fila else None
+
+def necesario(inicio=None, ruta_db=db.DB_PATH):
+    """¿Un rango que empieza en `inicio` (None = sin límite) alcanza filas archivadas?"""
+    hasta = limite(ruta_db)
+    return bool(hasta) and (inicio is None or str(inicio) <= hasta)
+
+def origen_vuelos(inicio=None, ruta_db=db.DB_PATH):
+    """(FROM, adjuntas) para leer vuelos desde `inicio`: la tabla caliente sola o unida al archivo.
+
+    El archivo puede ir detrás en columnas si una migración las agregó después
+    del último archivado; esas salen como NULL.
+    """
+    if not necesario(inicio, ruta_db):
+        return "vuelos", ()
+    with db.conexion(ruta_db) as conn, db.con_adjuntas(conn, adjuntas(ruta_db)):
+        columnas = [c[1] for c in conn.execute("PRAGMA main.table_info(vuelos)")]
+        archivadas = {c[1] for c in conn.execute(f"PRAGMA {ALIAS}.table_info(vuelos)")}
+    lista = ", ".join(columnas)
+    desde_archivo = ", ".join(c if c in archivadas else f"NULL AS {c}" for c in columnas)
+    return f"(SELECT {lista} FROM main.vuelos UNION ALL SELECT {desde_archivo} FROM {ALIAS}.vuelos)", adjuntas(ruta_db)
+
+# --- ESQUEMA DEL ARCHIVO ---
+def preparar(conn):
+    """Crea o alinea las tablas del archivo (ya adjunto en `conn`) con el esquema vigente de `vuelos`."""
+    conn.execute(f"PRAGMA {ALIAS}.journal_mode=WAL")
+    columnas = conn.execute("PRAGMA main.table_info(vuelos)").fetchall()   # (cid, nombre, tipo, notnull, default, pk)
+    existentes = {c[1] for c in conn.execute(f"PRAGMA {ALIAS}.table_info(vuelos)")}
+    if not existentes:
+        definiciones = ", ".join(f"{c[1]} {c[2]}" + (" PRIMARY KEY" if c[5] else "") for c in columnas)
+        conn.execute(f"CREATE TABLE {ALIAS}.vuelos ({definiciones}, archivado_en TEXT)")
+        conn.execute(f"CREATE INDEX {ALIAS}.idx_archivo_vivos_fecha ON vuelos(Fecha) WHERE deleted_at IS NULL")
+    else:
+        for c in columnas:
+            if c[1] not in existentes:
+                conn.execute(f"ALTER TABLE {ALIAS}.vuelos ADD COLUMN {c[1]} {c[2]}")
+    for tabla in migraciones.ROLLUPS:
+        conn.execute(migraciones.sql_tabla_rollup(ALIAS, tabla))
+    return [c[1] for c in columnas]
+
+# --- ARCHIVADO ---
+def _cortes(hoy, horizonte_dias, retencion_dias):
+    corte_fecha = (hoy - timedelta(days=horizonte_dias)).isoformat()
+    corte_bajas = (datetime.combine(hoy, datetime.min.time()) - timedelta(days=retencion_dias)).strftime("%Y-%m-%d %H:%M:%S")
+    return [corte_bajas, *ESTADOS_CERRADOS, corte_fecha]
+
+def contar_candidatos(horizonte_dias=None, retencion_dias=None, hoy=None, ruta_db=db.DB_PATH):
+    """{'cerrados', 'bajas', 'calientes'} sin mover nada."""
+    predeterminada = politica(ruta_db)
+    params = _cortes(hoy or date.today(), horizonte_dias or predeterminada[0], retencion_dias or predeterminada[1])
+    fila = db.consultar_uno(f"""
+        SELECT COALESCE(SUM(deleted_at IS NULL), 0), COALESCE(SUM(deleted_at IS NOT NULL), 0),
+               (SELECT COUNT(*) FROM vuelos)
+        FROM vuelos WHERE {_CRITERIO}
+    """, params, ruta_db=ruta_db)
+    return {'cerrados': fila[0], 'bajas': fila[1], 'calientes': fila[2]}
+
+def _mover_lote(conn, columnas, ahora):
+    # Los ids van en una tabla TEMP: cada paso del lote los toma de ahí sin volver a enlazar la lista.
+    cols = ", ".join(columnas)
+    vivos, bajas, fecha_max = conn.execute(
+        "SELECT COALESCE(SUM(deleted_at IS NULL), 0), COALESCE(SUM(deleted_at IS NOT NULL), 0), "
+        "MAX(CASE WHEN deleted_at IS NULL THEN substr(Fecha, 1, 10) END) "
+        "FROM main.vuelos WHERE id IN (SELECT id FROM temp.lote_archivo)").fetchone()
+    dias = [r[0] for r in conn.execute(
+        "SELECT DISTINCT substr(Fecha, 1, 10) FROM main.vuelos "
+        "WHERE deleted_at IS NULL AND id IN (SELECT id FROM temp.lote_archivo)")]
+    conn.execute(f"INSERT OR REPLACE INTO {ALIAS}.vuelos ({cols}, archivado_en) "
+                 f"SELECT {cols}, ? FROM main.vuelos WHERE id IN (SELECT id FROM temp.lote_archivo)", (ahora,))
+    # Los triggers de `vuelos` quitan las filas del índice FTS y de los resúmenes calientes
+    conn.execute("DELETE FROM main.vuelos WHERE id IN (SELECT id FROM temp.lote_archivo)")
+    if dias:
+        migraciones.reconstruir_rollup(conn, esquema=ALIAS, dias=dias)
+    return vivos, bajas, fecha_max
+
+def _registrar_borrado(conn, fecha_max=None):
+    # En la misma transacción que el DELETE: ningún almacén puede ver el borrado sin la nueva generación
+    conn.execute("INSERT INTO configuracion (clave, valor) VALUES (?, '1') "
+                 "ON CONFLICT(clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1", (CLAVE_GENERACION,))
+    if fecha_max:
+        conn.execute("INSERT INTO configuracion (clave, valor) VALUES (?, ?) "
+                     "ON CONFLICT(clave) DO UPDATE SET valor = MAX(valor, excluded.valor)", (CLAVE_LIMITE, fecha_max))
+
+def _reparar(conn):
+    """Quita de la tabla caliente lo que ya quedó en el archivo.
+
+    Con WAL la transacción es atómica por archivo, no entre ambas bases: si una
+    corrida se interrumpe entre los dos commits, la fila queda duplicada.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    borradas = conn.execute(
+        f"DELETE FROM main.vuelos WHERE EXISTS (SELECT 1 FROM {ALIAS}.vuelos a WHERE a.id = main.vuelos.id)").rowcount
+    if borradas:
+        _registrar_borrado(conn)
+    conn.commit()
+    return borradas
+
+@instrumentacion.medido("archivo.archivar")
+def archivar(horizonte_dias=None, retencion_dias=None, hoy=None, lote=LOTE, ruta_db=db.DB_PATH):
+    """Mueve al archivo los boletos cerrados más viejos que el horizonte y las bajas vencidas.
+
+    Trabaja por lotes de `lote` filas, cada uno en su propia transacción.
+    """
+    predeterminada = politica(ruta_db)
+    horizonte_dias, retencion_dias = horizonte_dias or predeterminada[0], retencion_dias or predeterminada[1]
+    params = _cortes(hoy or date.today(), horizonte_dias, retencion_dias)
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    resultado = {'cerrados': 0, 'bajas': 0, 'lotes': 0, 'reparadas': 0,
+                 'horizonte_dias': horizonte_dias, 'retencion_dias': retencion_dias}
+    # El archivo se adjunta solo durante la corrida: adjunto, cada BEGIN IMMEDIATE de la conexión lo bloquearía también
+    with db.conexion(ruta_db) as conn, db.con_adjuntas(conn, adjuntas(ruta_db)):
+        columnas = preparar(conn)
+        resultado['reparadas'] = _reparar(conn)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS lote_archivo (id INTEGER PRIMARY KEY)")
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM temp.lote_archivo")
+            n = conn.execute(f"INSERT INTO temp.lote_archivo SELECT id FROM main.vuelos WHERE {_CRITERIO} ORDER BY id LIMIT ?",
+                             params + [int(lote)]).rowcount
+            if not n:
+                conn.rollback()
+                break
+            vivos, bajas, fecha_max = _mover_lote(conn, columnas, ahora)
+            _registrar_borrado(conn, fecha_max)
+            conn.commit()
+            resultado['cerrados'] += vivos
+            resultado['bajas'] += bajas
+            resultado['lotes'] += 1
+        if resultado['lotes']:
+            conn.execute("PRAGMA optimize")
+    resultado['hasta'] = limite(ruta_db)
+    return resultado
+
+def compactar(ruta_db=db.DB_PATH):
+    """Reescribe la base caliente (VACUUM) para devolver al disco el espacio liberado; bytes antes y después."""
+    antes = os.path.getsize(ruta_db)
+    with db.conexion(ruta_db) as conn:
+        conn.execute("INSERT INTO vuelos_fts(vuelos_fts) VALUES ('optimize')")
+        conn.commit()
+        conn.execute("VACUUM")
+    return antes, os.path.getsize(ruta_db)
+
+# --- ENTRADA DE CONSOLA ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo histórico de vuelos.")
+    parser.add_argument("--horizonte-dias", type=int, help=f"boletos cerrados más viejos que esto (def. {HORIZONTE_DIAS})")
+    parser.add_argument("--retencion-dias", type=int, help=f"bajas lógicas más viejas que esto (def. {RETENCION_BAJAS_DIAS})")
+    parser.add_argument("--lote", type=int, default=LOTE)
+    parser.add_argument("--simular", action="store_true", help="solo contar lo que se movería")
+    parser.add_argument("--guardar-politica", action="store_true", help="guardar horizonte y retención en la base")
+    parser.add_argument("--compactar", action="store_true", help="VACUUM de la base caliente al terminar")
+    parser.add_argument("--db", default=db.DB_PATH)
+    args = parser.parse_args(argv)
+
+    migraciones.preparar_base(args.db)
+    horizonte, retencion = politica(args.db)
+    horizonte, retencion = args.horizonte_dias or horizonte, args.retencion_dias or retencion
+    if args.guardar_politica:
+        guardar_politica(horizonte, retencion, args.db)
+    if args.simular:
+        c = contar_candidatos(horizonte, retencion, ruta_db=args.db)
+        print(f"Se moverían {c['cerrados']:,} boletos cerrados (> {horizonte} días) y {c['bajas']:,} bajas "
+              f"(> {retencion} días) de {c['calientes']:,} filas calientes.")
+        return 0
+    inicio = time.perf_counter()
+    r = archivar(horizonte, retencion, lote=args.lote, ruta_db=args.db)
+    print(f"{r['cerrados']:,} boletos cerrados y {r['bajas']:,} bajas archivados en {r['lotes']} lotes "
+          f"({time.perf_counter() - inicio:.1f} s) -> {ruta_archivo(args.db)}. Archivo hasta: {r['hasta'] or '-'}.")
+    if r['reparadas']:
+        print(f"{r['reparadas']:,} filas que ya estaban en el archivo se quitaron de la tabla caliente.")
+    if args.compactar:
+        antes, despues = compactar(args.db)
+        print(f"Base caliente: {antes / 2**20:.1f} MB -> {despues / 2**20:.1f} MB.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
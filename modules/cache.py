@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """Caché en memoria con desalojo LRU, acotada por número de entradas y por bytes.
+
+    Se comparte entre sesiones (vive a nivel de proceso), por eso todas las
+    operaciones van bajo un candado.
+    """
+
+    def __init__(self, max_entradas=32, max_bytes=64 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def _tamano(valor):
+        return len(valor) if isinstance(valor, (bytes, bytearray)) else 0
+
+    def obtener(self, clave):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            if clave in self._datos:
+                self._bytes -= self._tamano(self._datos.pop(clave))
+            self._datos[clave] = valor
+            self._bytes += self._tamano(valor)
+            while self._datos and (len(self._datos) > self.max_entradas or self._bytes > self.max_bytes):
+                _, desalojado = self._datos.popitem(last=False)
+                self._bytes -= self._tamano(desalojado)
+
+    def obtener_o_generar(self, clave, generador):
+        valor = self.obtener(clave)
+        if valor is None:
+            valor = generador()
+            self.guardar(clave, valor)
+        return valor
+
+    def estadisticas(self):
+        with self._lock:
+            return {'entradas': len(self._datos), 'bytes': self._bytes,
+                    'aciertos': self.aciertos, 'fallos': self.fallos}
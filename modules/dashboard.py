@@ -1,22 +1,16 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import io
 from datetime import datetime
+from modules import exportacion, metricas, navegacion
 
-# Función auxiliar para exportar datos del dashboard
+# Función auxiliar para exportar datos del dashboard (el recorte y el libro se generan al hacer clic)
 def descargar_datos(df_descarga, nombre_archivo):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df_descarga.to_excel(writer, index=False, sheet_name='Dashboard_Export')
-    return output.getvalue()
+    return exportacion.excel_diferido(df_descarga, 'Dashboard_Export', (nombre_archivo, datetime.now().date()))
 
+@navegacion.vista("DASHBOARD")
 def render():
-    df = st.session_state.db_vuelos
-    
-    # Asegurar que la fecha sea objeto datetime para cálculos
-    df['Fecha'] = pd.to_datetime(df['Fecha'])
-    hoy = datetime.now().date()
+    # Todos los KPIs salen de una sola pasada; aquí solo se muestran
+    m = metricas.calcular_metricas(st.session_state.db_vuelos)
 
     st.markdown("<h4 style='letter-spacing:2px; font-weight:300;'>DASHBOARD_ESTADÍSTICO</h4>", unsafe_allow_html=True)
 
@@ -24,19 +18,16 @@ def render():
     c1, c2, c3 = st.columns(3)
     
     with c1:
-        activos = df[df['Estado'] == 'Activo']
-        st.metric("TICKETS ACTIVOS", len(activos))
-        st.download_button("💾 Exportar Activos", descargar_datos(activos, "Activos"), "activos.xlsx", key="dl_act")
+        st.metric("TICKETS ACTIVOS", m.n_activos)
+        st.download_button("💾 Exportar Activos", descargar_datos(lambda: m.detalle('activos'), "Activos"), "activos.xlsx", key="dl_act")
 
     with c2:
-        abiertos = df[df['Estado'].str.contains('Abierto', na=False)]
-        st.metric("TICKETS ABIERTOS", len(abiertos))
-        st.download_button("💾 Exportar Abiertos", descargar_datos(abiertos, "Abiertos"), "abiertos.xlsx", key="dl_abi")
+        st.metric("TICKETS ABIERTOS", m.n_abiertos)
+        st.download_button("💾 Exportar Abiertos", descargar_datos(lambda: m.detalle('abiertos'), "Abiertos"), "abiertos.xlsx", key="dl_abi")
 
     with c3:
-        cancelados = df[df['Estado'] == 'Cancelado']
-        st.metric("TICKETS CANCELADOS", len(cancelados))
-        st.download_button("💾 Exportar Cancelados", descargar_datos(cancelados, "Cancelados"), "cancelados.xlsx", key="dl_can")
+        st.metric("TICKETS CANCELADOS", m.n_cancelados)
+        st.download_button("💾 Exportar Cancelados", descargar_datos(lambda: m.detalle('cancelados'), "Cancelados"), "cancelados.xlsx", key="dl_can")
 
     st.divider()
 
@@ -44,39 +35,32 @@ def render():
     c_costo1, c_costo2 = st.columns(2)
     
     with c_costo1:
-        costo_anual = df[df['Fecha'].dt.year == datetime.now().year]['Costo'].sum()
-        st.markdown(f"<small>COSTO TOTAL AÑO {datetime.now().year}</small>", unsafe_allow_html=True)
-        st.markdown(f"<h2 style='color:#4CD964;'>${costo_anual:,.2f} </h2>", unsafe_allow_html=True)
-        st.download_button("📊 Reporte Anual", descargar_datos(df[df['Fecha'].dt.year == datetime.now().year], "Anual"), "costo_anual.xlsx")
+        st.markdown(f"<small>COSTO TOTAL AÑO {m.fecha_corte.year}</small>", unsafe_allow_html=True)
+        st.markdown(f"<h2 style='color:#4CD964;'>${m.costo_anual:,.2f} </h2>", unsafe_allow_html=True)
+        st.download_button("📊 Reporte Anual", descargar_datos(lambda: m.detalle('anual'), "Anual"), "costo_anual.xlsx")
 
     with c_costo2:
-        costo_mes = df[(df['Fecha'].dt.month == datetime.now().month) & (df['Fecha'].dt.year == datetime.now().year)]['Costo'].sum()
         st.markdown(f"<small>COSTO TOTAL MES ACTUAL</small>", unsafe_allow_html=True)
-        st.markdown(f"<h2 style='color:#00d4ff;'>${costo_mes:,.2f} </h2>", unsafe_allow_html=True)
+        st.markdown(f"<h2 style='color:#00d4ff;'>${m.costo_mes:,.2f} </h2>", unsafe_allow_html=True)
 
     st.divider()
 
     # --- FILA 3: PRÓXIMOS VUELOS Y EXPORTACIÓN ---
     st.markdown("##### ✈️ PRÓXIMOS VUELOS")
-    proximos = df[df['Fecha'].dt.date >= hoy].sort_values('Fecha')
-    
     col_p1, col_p2 = st.columns([3, 1])
-    col_p1.dataframe(proximos[['Pasajero', 'PNR', 'Fecha', 'Origen', 'Destino', 'Estado']].head(5), use_container_width=True)
+    col_p1.dataframe(m.top_proximos[['Pasajero', 'PNR', 'Fecha', 'Origen', 'Destino', 'Estado']], use_container_width=True)
     col_p2.markdown("<br>", unsafe_allow_html=True)
-    col_p2.download_button("🛫 Exportar Próximos", descargar_datos(proximos, "Proximos"), "proximos_vuelos.xlsx", use_container_width=True)
+    col_p2.download_button("🛫 Exportar Próximos", descargar_datos(lambda: m.detalle('proximos'), "Proximos"), "proximos_vuelos.xlsx", use_container_width=True)
 
     st.divider()
 
     # --- FILA 3.5: TICKETS ABIERTOS Y EXPORTACIÓN ---
     st.markdown("##### ⚠️ TICKETS ABIERTOS (DISPONIBLES)")
-    # Ordenamos por Costo descendente para ver los de mayor valor primero
-    abiertos_df = df[df['Estado'].str.contains('Abierto', na=False)].sort_values('Costo', ascending=False)
-    
     col_a1, col_a2 = st.columns([3, 1])
-    # Mostramos las columnas más relevantes, incluyendo el Costo
-    col_a1.dataframe(abiertos_df[['Pasajero', 'PNR', 'Costo', 'Fecha', 'Origen', 'Destino']].head(5), use_container_width=True)
+    # Mostramos las columnas más relevantes (ya vienen ordenados por Costo descendente)
+    col_a1.dataframe(m.top_abiertos[['Pasajero', 'PNR', 'Costo', 'Fecha', 'Origen', 'Destino']], use_container_width=True)
     col_a2.markdown("<br>", unsafe_allow_html=True)
-    col_a2.download_button("📥 Exportar Abiertos", descargar_datos(abiertos_df, "Abiertos_Detalle"), "tickets_abiertos_detalle.xlsx", use_container_width=True)
+    col_a2.download_button("📥 Exportar Abiertos", descargar_datos(lambda: m.detalle('abiertos'), "Abiertos_Detalle"), "tickets_abiertos_detalle.xlsx", use_container_width=True)
 
     st.divider()
 
@@ -86,7 +70,7 @@ def render():
     with g1:
         st.markdown("<small>VUELOS POR CIUDAD DE DESTINO</small>", unsafe_allow_html=True)
         # Gráfica de número de vuelos por ciudad
-        vuelos_ciudad = df['Destino'].value_counts().reset_index()
+        vuelos_ciudad = m.por_destino.reset_index()
         vuelos_ciudad.columns = ['Ciudad', 'Cantidad']
         fig_ciudad = px.bar(vuelos_ciudad, x='Ciudad', y='Cantidad', template="plotly_dark", color_discrete_sequence=['#00d4ff'])
         fig_ciudad.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
@@ -95,7 +79,7 @@ def render():
     with g2:
         st.markdown("<small>DISTRIBUCIÓN POR ESTADO</small>", unsafe_allow_html=True)
         # Gráfica de activos, cancelados, realizados y abiertos
-        fig_estado = px.pie(df, names='Estado', hole=0.4, template="plotly_dark", 
+        fig_estado = px.pie(names=list(m.conteo_estado), values=list(m.conteo_estado.values()), hole=0.4, template="plotly_dark", 
                             color_discrete_map={'Activo':'#00d4ff', 'Cancelado':'#FF3B30', 'Realizado':'#4CD964', 'Abierto (Disponible)':'#FFCC00'})
         fig_estado.update_layout(paper_bgcolor='rgba(0,0,0,0)')
         st.plotly_chart(fig_estado, use_container_width=True)
\ No newline at end of file
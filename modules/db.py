@@ -0,0 +1,158 @@
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+from modules import instrumentacion
+
+DB_PATH = 'logistics_v2.db'
+
+# --- AJUSTES DE CONEXIÓN ---
+# WAL permite que los lectores no bloqueen al escritor (y viceversa); con WAL,
+# synchronous=NORMAL sigue siendo seguro ante caídas de la aplicación.
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-20000",      # ~20 MB de páginas en caché por conexión
+    "PRAGMA mmap_size=268435456",    # 256 MB mapeados en memoria
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+TAMANO_POOL = 8
+SENTENCIAS_EN_CACHE = 256
+
+
+class PoolConexiones:
+    """Pool de conexiones SQLite reutilizables y seguro entre hilos.
+
+    Cada conexión conserva su caché de sentencias preparadas, así que las
+    consultas repetidas (las de cada rerun) no se vuelven a compilar.
+    """
+
+    def __init__(self, ruta_db=DB_PATH, tamano=TAMANO_POOL):
+        self.ruta_db = ruta_db
+        self.tamano = tamano
+        self._libres = queue.LifoQueue()
+
+    def _nueva(self):
+        conn = sqlite3.connect(self.ruta_db, timeout=BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False, cached_statements=SENTENCIAS_EN_CACHE,
+                               factory=instrumentacion.ConexionMedida if instrumentacion.ACTIVA else sqlite3.Connection)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def tomar(self):
+        try:
+            return self._libres.get_nowait()
+        except queue.Empty:
+            return self._nueva()
+
+    def devolver(self, conn):
+        if self._libres.qsize() < self.tamano:
+            self._libres.put(conn)
+        else:
+            conn.close()
+
+    def cerrar(self):
+        while True:
+            try:
+                self._libres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_lock = threading.Lock()
+
+def pool(ruta_db=DB_PATH):
+    with _lock:
+        if ruta_db not in _pools:
+            _pools[ruta_db] = PoolConexiones(ruta_db)
+        return _pools[ruta_db]
+
+# --- API DE ACCESO ---
+@contextmanager
+def conexion(ruta_db=DB_PATH):
+    """Presta una conexión del pool; confirma al salir o revierte si hubo error."""
+    p = pool(ruta_db)
+    conn = p.tomar()
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        p.devolver(conn)
+
+@contextmanager
+def transaccion(ruta_db=DB_PATH):
+    """Como `conexion`, pero toma el candado de escritura desde el inicio (BEGIN IMMEDIATE)
+    para que dos operadores no choquen a mitad de la transacción."""
+    with conexion(ruta_db) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+
+def adjuntar(conn, alias, ruta):
+    """ATTACH idempotente; regresa True si la adjuntó en esta llamada."""
+    if any(fila[1] == alias for fila in conn.execute("PRAGMA database_list")):
+        return False
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (ruta,))
+    return True
+
+@contextmanager
+def con_adjuntas(conn, adjuntas):
+    """Adjunta `adjuntas` (pares alias, ruta) solo mientras dura el bloque.
+
+    Una base adjunta entra en cada `BEGIN IMMEDIATE` de la conexión (también se
+    toma su candado), así que no se deja adjunta en las conexiones del pool.
+    """
+    nuevas = [alias for alias, ruta in adjuntas if adjuntar(conn, alias, ruta)]
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    else:
+        if conn.in_transaction:
+            conn.commit()
+    finally:
+        for alias in nuevas:
+            conn.execute(f"DETACH DATABASE {alias}")
+
+def consultar_df(sql, params=(), ruta_db=DB_PATH, adjuntas=()):
+    """DataFrame de la consulta; `adjuntas` son pares (alias, ruta) que la consulta necesita adjuntos."""
+    import pandas as pd  # diferido: la pantalla de login solo migra y no necesita pandas
+    with instrumentacion.tramo("sql.consultar_df") as t, conexion(ruta_db) as conn, con_adjuntas(conn, adjuntas):
+        df = pd.read_sql_query(sql, conn, params=params)
+        t.filas = len(df)
+        return df
+
+def consultar_uno(sql, params=(), ruta_db=DB_PATH, adjuntas=()):
+    with instrumentacion.tramo("sql.consultar_uno"), conexion(ruta_db) as conn, con_adjuntas(conn, adjuntas):
+        cursor = conn.execute(sql, params)
+        fila = cursor.fetchone()
+        cursor.close()   # un cursor abierto sobre la base adjunta impide el DETACH
+        return fila
+
+def ejecutar(sql, params=(), ruta_db=DB_PATH):
+    with instrumentacion.tramo("sql.ejecutar"), transaccion(ruta_db) as conn:
+        return conn.execute(sql, params).rowcount
+
+# --- CONFIGURACIÓN (API KEY Y OTROS AJUSTES) ---
+def obtener_config(clave):
+    try:
+        res = consultar_uno("SELECT valor FROM configuracion WHERE clave=?", (clave,))
+        return res[0] if res else ""
+    except sqlite3.Error:
+        return ""
+
+def guardar_config(clave, valor):
+    try:
+        ejecutar("INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)", (clave, valor))
+    except sqlite3.Error:
+        pass
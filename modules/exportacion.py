@@ -0,0 +1,61 @@
+import io
+import pandas as pd
+import xlsxwriter
+from modules import almacen, instrumentacion
+from modules.cache import CacheLRU
+
+# Libros ya generados, por (vista, filtros, versión de datos); se comparten entre sesiones
+_cache_excel = CacheLRU(max_entradas=24, max_bytes=96 * 1024 * 1024)
+
+def excel_bytes(df, hoja='Datos'):
+    """Serializa el DataFrame a .xlsx fila por fila.
+
+    Con `constant_memory` xlsxwriter vuelca cada fila a disco en cuanto se
+    escribe, así que los inventarios grandes no se construyen completos en RAM.
+    """
+    output = io.BytesIO()
+    libro = xlsxwriter.Workbook(output, {'constant_memory': True})
+    hoja_xl = libro.add_worksheet(hoja[:31])
+    fmt_titulo = libro.add_format({'bold': True, 'border': 1})
+    fmt_fecha = libro.add_format({'num_format': 'yyyy-mm-dd'})
+
+    columnas = list(df.columns)
+    hoja_xl.write_row(0, 0, [str(c) for c in columnas], fmt_titulo)
+
+    es_fecha = [pd.api.types.is_datetime64_any_dtype(df[c]) for c in columnas]
+    es_numero = [pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c]) for c in columnas]
+
+    for r, fila in enumerate(df.itertuples(index=False, name=None), start=1):
+        for c, valor in enumerate(fila):
+            if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+                continue
+            if es_fecha[c]:
+                hoja_xl.write_datetime(r, c, valor.to_pydatetime(), fmt_fecha)
+            elif es_numero[c]:
+                hoja_xl.write_number(r, c, float(valor))
+            else:
+                hoja_xl.write_string(r, c, str(valor))
+
+    libro.close()
+    return output.getvalue()
+
+def excel_diferido(datos, hoja, clave):
+    """Regresa un callable para `st.download_button(data=...)`.
+
+    `datos` puede ser un DataFrame o una función que lo produzca (p. ej. la
+    consulta completa detrás de un listado paginado). Streamlit solo lo ejecuta
+    cuando el usuario presiona el botón, y el resultado queda en caché por
+    `clave` + versión de datos para los clics siguientes.
+    """
+    clave_cache = (hoja, clave, almacen.version())
+
+    def generar():
+        with instrumentacion.tramo("exportacion.excel") as t:
+            df = datos() if callable(datos) else datos
+            t.filas = len(df)
+            return excel_bytes(df, hoja)
+
+    return lambda: _cache_excel.obtener_o_generar(clave_cache, generar)
+
+def estadisticas():
+    return _cache_excel.estadisticas()
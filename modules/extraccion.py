@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from datetime import datetime
+from modules import db, ia
+
+# Subir este número invalida la caché cuando cambie el prompt o el formato del JSON
+PROMPT_VERSION = 1
+MAX_BYTES_CACHE = 50 * 1024 * 1024
+
+# --- EXTRACCIÓN DE TEXTO Y DATOS ---
+def extraer_texto_pdf(archivos):
+    import pdfplumber
+    texto_total = ""
+    for archivo in archivos:
+        try:
+            with pdfplumber.open(archivo) as pdf:
+                for pagina in pdf.pages:
+                    texto_total += (pagina.extract_text() or "") + "\n"
+        except: pass
+    return texto_total
+
+def construir_prompt(texto):
+    # PROMPT MEJORADO PARA MÚLTIPLES PASAJEROS Y FECHAS
+    return f"""
+        Extrae los datos de viaje del siguiente texto y entrégalos en un JSON estricto.
+
+        ### ESTRUCTURA JSON OBLIGATORIA:
+        {{
+        "pasajeros": ["Nombre completo 1", "Nombre completo 2"], 
+        "pnr": "Código de 6 caracteres",
+        "origen": "Ciudad origen",
+        "destino": "Ciudad destino",
+        "aerolinea": "Nombre aerolínea",
+        "fecha_salida": "YYYY-MM-DD",
+        "fecha_regreso": "YYYY-MM-DD",
+        "costo": 0.0,
+        "no_vuelo": "Número de vuelo",
+        "autoriza": "Persona que aprueba",
+        "motivo": "Razón del viaje"
+        }}
+
+        ### REGLAS DE ORO:
+        1. "pasajeros" DEBE ser una lista (array) de nombres, incluso si es solo una persona (ej: ["Juan Perez"]).
+        2. FECHAS: Identifica el año principal del documento (ej. 2026). Si el mes viene en palabras, conviértelo a número. Formato final: YYYY-MM-DD.
+        3. Si no encuentras una fecha de regreso clara o es vuelo "Sencillo", deja "fecha_regreso" como "".
+        4. El costo debe ser un número decimal, el valor total a pagar (busca en la Factura si existe).
+        5. Si hay varios archivos mezclados, únelos lógicamente usando el PNR como guía.
+
+        Texto a analizar:
+        {texto}
+        """
+
+def extraer_datos(texto, api_key):
+    """Envía el texto a Gemini y regresa el JSON interpretado (lanza excepción si falla)."""
+    # Selección dinámica de modelo (descubierta una vez por llave) para evitar Error 404
+    texto_respuesta = ia.generar(api_key, construir_prompt(texto), preferencias=('flash',), respaldo="models/gemini-1.5-flash")
+    res_text = texto_respuesta.replace('```json', '').replace('```', '').strip()
+    datos = json.loads(res_text)
+
+    # Si la IA envuelve el JSON en una lista, extraemos el primer elemento
+    if isinstance(datos, list) and len(datos) > 0: datos = datos[0]
+    return datos
+
+# --- CACHÉ PERSISTENTE POR CONTENIDO ---
+_contadores = {'aciertos': 0, 'fallos': 0}
+_lock = threading.Lock()
+
+def clave_documentos(contenidos):
+    """Huella de los archivos (en orden) más la versión del prompt."""
+    h = hashlib.sha256(f"prompt-v{PROMPT_VERSION}".encode())
+    for contenido in contenidos:
+        h.update(hashlib.sha256(contenido).digest())
+    return h.hexdigest()
+
+def buscar_en_cache(clave):
+    fila = db.consultar_uno("SELECT texto, datos_json FROM cache_extraccion_ia WHERE clave=?", (clave,))
+    with _lock:
+        _contadores['aciertos' if fila else 'fallos'] += 1
+    if not fila:
+        return None
+    db.ejecutar("UPDATE cache_extraccion_ia SET ultimo_uso=?, usos=usos+1 WHERE clave=?",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"), clave))
+    return {'texto': fila[0], 'datos': json.loads(fila[1])}
+
+def guardar_en_cache(clave, texto, datos):
+    datos_json = json.dumps(datos, ensure_ascii=False)
+    tamano = len(texto.encode('utf-8')) + len(datos_json.encode('utf-8'))
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+    with db.transaccion() as conn:
+        conn.execute('''INSERT OR REPLACE INTO cache_extraccion_ia (clave, texto, datos_json, tamano, creado_en, ultimo_uso, usos)
+                        VALUES (?, ?, ?, ?, ?, ?, 0)''', (clave, texto, datos_json, tamano, ahora, ahora))
+        # Desalojo por tamaño: se conservan las entradas más recientes hasta MAX_BYTES_CACHE
+        conn.execute('''DELETE FROM cache_extraccion_ia WHERE clave IN (
+                            SELECT clave FROM (
+                                SELECT clave, SUM(tamano) OVER (ORDER BY ultimo_uso DESC) AS acumulado
+                                FROM cache_extraccion_ia)
+                            WHERE acumulado > ?)''', (MAX_BYTES_CACHE,))
+
+def estadisticas_cache():
+    fila = db.consultar_uno("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM cache_extraccion_ia")
+    with _lock:
+        return dict(_contadores, entradas=fila[0], bytes=fila[1])
@@ -0,0 +1,57 @@
+import threading
+import zlib
+from typing import NamedTuple
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# --- PALETA COMPARTIDA CON EL PDF ---
+COLORES_ESTADO = {'Activo':'#00aeef', 'Abierto (Disponible)':'#FFCC00', 'Realizado':'#4CD964', 'Cancelado':'#FF3B30', 'Canjeado':'#888888'}
+
+
+class Raster(NamedTuple):
+    """Imagen RGB lista para incrustar en el PDF (datos ya comprimidos con Flate)."""
+    nombre: str
+    ancho: int
+    alto: int
+    datos: bytes
+
+
+# --- PLANTILLA DE FIGURA REUTILIZABLE ---
+# Figure + canvas Agg (API orientada a objetos, sin el estado global de pyplot).
+# Una por hilo: las figuras no son seguras para dibujarse desde varios hilos a la vez.
+_local = threading.local()
+
+def _plantilla():
+    fig = getattr(_local, 'figura', None)
+    if fig is None:
+        fig = Figure(figsize=(6, 4), dpi=150)
+        FigureCanvasAgg(fig)
+        _local.figura = fig
+    fig.clear()
+    return fig
+
+def _rasterizar(fig, nombre):
+    fig.canvas.draw()
+    rgba = np.asarray(fig.canvas.buffer_rgba())
+    alto, ancho = rgba.shape[:2]
+    return Raster(nombre, ancho, alto, zlib.compress(rgba[:, :, :3].tobytes(), 6))
+
+# --- GRÁFICOS DEL REPORTE EJECUTIVO ---
+def grafico_estado_cartera(df):
+    fig = _plantilla()
+    ax = fig.add_subplot()
+    datos_estado = df.groupby('Estado')['Costo'].sum()
+    ax.pie(datos_estado, labels=datos_estado.index, autopct='%1.1f%%', startangle=140, colors=[COLORES_ESTADO.get(x, '#999') for x in datos_estado.index])
+    ax.set_title("SALUD DE CARTERA", fontweight='bold')
+    return _rasterizar(fig, 'grafico_estado_cartera')
+
+def grafico_top_aerolineas(df):
+    fig = _plantilla()
+    ax = fig.add_subplot()
+    datos_aero = df.groupby('Aerolinea')['Costo'].sum().sort_values(ascending=False).head(5)
+    ax.bar(datos_aero.index, datos_aero.values, color='#00d4ff')
+    ax.set_title("TOP 5 PROVEEDORES (AEROLINEAS)", fontweight='bold')
+    ax.tick_params(axis='x', labelrotation=15, labelsize=8)
+    fig.tight_layout()
+    return _rasterizar(fig, 'grafico_top_aerolineas')
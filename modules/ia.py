@@ -0,0 +1,113 @@
+import importlib.util
+import threading
+import time
+from modules import instrumentacion
+
+# --- LIBRERÍA DE IA (SE IMPORTA AL PRIMER USO: ~1 s DE ARRANQUE) ---
+try:
+    IA_DISPONIBLE = importlib.util.find_spec("google.generativeai") is not None
+except ImportError:
+    IA_DISPONIBLE = False
+
+def _cargar_api():
+    if not IA_DISPONIBLE:
+        return None
+    import google.generativeai as genai
+    return genai
+
+TTL_MODELO_S = 6 * 3600
+
+
+class ClienteIA:
+    """Cliente Gemini compartido por el registrador y el centro BI.
+
+    Descubre el modelo una sola vez por (API key, preferencias) y lo guarda con
+    TTL, reutilizando la instancia de `GenerativeModel`. Recibe el módulo de la
+    API como parámetro para poder probarse contra un doble local de `genai`.
+    """
+
+    def __init__(self, api=None, ttl_s=TTL_MODELO_S):
+        self._api = api
+        self.ttl_s = ttl_s
+        self._modelos = {}
+        self._clave_configurada = None
+        self._lock = threading.Lock()
+        self._metricas = {'descubrimientos': 0, 'descubrimiento_ms': 0.0,
+                          'generaciones': 0, 'generacion_ms': 0.0, 'aciertos_cache': 0}
+
+    @property
+    def api(self):
+        if self._api is None:
+            self._api = _cargar_api()
+        return self._api
+
+    @property
+    def disponible(self):
+        return self._api is not None or IA_DISPONIBLE
+
+    def _configurar(self, api_key):
+        # `genai.configure` es estado global del SDK: solo se toca si cambia la llave
+        if api_key != self._clave_configurada:
+            self.api.configure(api_key=api_key)
+            self._clave_configurada = api_key
+
+    def _descubrir(self, preferencias, respaldo):
+        primero = None
+        for m in self.api.list_models():
+            if 'generateContent' not in m.supported_generation_methods:
+                continue
+            if any(p in m.name for p in preferencias):
+                return m.name
+            if primero is None:
+                primero = m.name
+        return respaldo or primero
+
+    def modelo(self, api_key, preferencias=('flash',), respaldo=None):
+        clave = (api_key, tuple(preferencias), respaldo)
+        with self._lock:
+            self._configurar(api_key)
+            guardado = self._modelos.get(clave)
+            if guardado and time.monotonic() - guardado[0] < self.ttl_s:
+                self._metricas['aciertos_cache'] += 1
+                return guardado[1]
+            inicio = time.perf_counter()
+            nombre = self._descubrir(preferencias, respaldo)
+            self._metricas['descubrimientos'] += 1
+            self._metricas['descubrimiento_ms'] += (time.perf_counter() - inicio) * 1000
+            instancia = self.api.GenerativeModel(nombre)
+            self._modelos[clave] = (time.monotonic(), instancia)
+            return instancia
+
+    def generar(self, api_key, prompt, preferencias=('flash',), respaldo=None):
+        """Genera texto con el modelo en caché; regresa `response.text`."""
+        model = self.modelo(api_key, preferencias, respaldo)
+        inicio = time.perf_counter()
+        with instrumentacion.tramo("ia.generar"):
+            respuesta = model.generate_content(prompt)
+        with self._lock:
+            self._metricas['generaciones'] += 1
+            self._metricas['generacion_ms'] += (time.perf_counter() - inicio) * 1000
+        return respuesta.text
+
+    def olvidar(self, api_key=None):
+        """Descarta los modelos en caché (todos, o solo los de una llave)."""
+        with self._lock:
+            for clave in [c for c in self._modelos if api_key is None or c[0] == api_key]:
+                del self._modelos[clave]
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self._metricas)
+        m['descubrimiento_prom_ms'] = m['descubrimiento_ms'] / m['descubrimientos'] if m['descubrimientos'] else 0.0
+        m['generacion_prom_ms'] = m['generacion_ms'] / m['generaciones'] if m['generaciones'] else 0.0
+        return m
+
+
+# --- INSTANCIA ÚNICA POR PROCESO ---
+cliente = ClienteIA()
+
+def generar(api_key, prompt, preferencias=('flash',), respaldo=None):
+    return cliente.generar(api_key, prompt, preferencias, respaldo)
+
+def metricas():
+    return cliente.metricas()
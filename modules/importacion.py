@@ -0,0 +1,244 @@
+"""Importación masiva de históricos (CSV / XLSX) a `vuelos`, por bloques.
+
+Uso desde consola:
+    python -m modules.importacion data_vuelos.csv
+    python -m modules.importacion historico.xlsx --bloque 2000 --errores rechazos.csv --simular
+"""
+import argparse
+import csv
+import sys
+import time
+import unicodedata
+import numpy as np
+import pandas as pd
+from modules import adjuntos, almacen, db, reservas
+
+TAMANO_BLOQUE = 1000
+COLUMNAS = reservas.COLUMNAS + ['Correo', 'Tipo_Viaje']
+_SQL_INSERT = f"INSERT INTO vuelos ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+
+# Mismos valores por omisión que las columnas agregadas por migraciones
+DEFAULTS = {
+    'Origen': '', 'Destino': '', 'Estado': 'Activo', 'Equipaje': '', 'Extra': 'NO', 'Soporte': '', 'Hora': '',
+    'Pais': 'N/A', 'Correo': '', 'Telefono': '', 'Aerolinea': 'N/A', 'Boleto_Ligado': '', 'Motivo': 'NO ESPECIFICADO',
+    'Autoriza': 'PENDIENTE', 'Fecha_Regreso': '', 'Tipo_Viaje': 'Sencillo', 'No_Vuelo': 'S/N',
+}
+MAYUSCULAS = ['Pasajero', 'PNR', 'Origen', 'Destino', 'Aerolinea', 'No_Vuelo', 'Motivo', 'Autoriza', 'Pais', 'Extra', 'Equipaje']
+ESTADOS = {
+    'activo': 'Activo', 'abierto': 'Abierto (Disponible)', 'abiertodisponible': 'Abierto (Disponible)',
+    'disponible': 'Abierto (Disponible)', 'realizado': 'Realizado', 'cancelado': 'Cancelado', 'canjeado': 'Canjeado',
+}
+
+# --- NORMALIZACIÓN DE ENCABEZADOS ---
+def _canonica(texto):
+    sin_acentos = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ''.join(c for c in sin_acentos.lower() if c.isalnum())
+
+ALIAS = {_canonica(c): c for c in COLUMNAS}
+ALIAS.update({
+    'nombre': 'Pasajero', 'pasajeros': 'Pasajero', 'localizador': 'PNR', 'clavedereservacion': 'PNR',
+    'precio': 'Costo', 'importe': 'Costo', 'monto': 'Costo', 'fechasalida': 'Fecha', 'salida': 'Fecha',
+    'regreso': 'Fecha_Regreso', 'fecharegreso': 'Fecha_Regreso', 'aerolinea': 'Aerolinea', 'linea': 'Aerolinea',
+    'novuelo': 'No_Vuelo', 'vuelo': 'No_Vuelo', 'numerodevuelo': 'No_Vuelo', 'whatsapp': 'Telefono',
+    'email': 'Correo', 'tipo': 'Tipo_Viaje', 'tipodeviaje': 'Tipo_Viaje', 'canje': 'Boleto_Ligado',
+})
+
+def mapear_columnas(encabezados):
+    """{encabezado del archivo: columna de `vuelos`}; los que no se reconocen (p. ej. `id`) se ignoran."""
+    return {e: ALIAS[_canonica(e)] for e in encabezados if _canonica(e) in ALIAS}
+
+# --- LECTURA POR BLOQUES ---
+def leer_bloques(fuente, nombre, tamano=TAMANO_BLOQUE):
+    """Itera DataFrames de hasta `tamano` filas sin cargar el archivo completo.
+
+    El índice de cada bloque es el número de línea/renglón en el archivo original.
+    """
+    if nombre.lower().endswith(('.xlsx', '.xlsm')):
+        import openpyxl
+        libro = openpyxl.load_workbook(fuente, read_only=True, data_only=True)
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezados = [str(c if c is not None else '').strip() for c in next(filas, ())]
+            bloque, lineas = [], []
+            for n, fila in enumerate(filas, start=2):
+                if all(v is None or str(v).strip() == '' for v in fila):
+                    continue
+                bloque.append(fila[:len(encabezados)])
+                lineas.append(n)
+                if len(bloque) >= tamano:
+                    yield pd.DataFrame(bloque, columns=encabezados, index=lineas, dtype=object)
+                    bloque, lineas = [], []
+            if bloque:
+                yield pd.DataFrame(bloque, columns=encabezados, index=lineas, dtype=object)
+        finally:
+            libro.close()
+    else:
+        for bloque in pd.read_csv(fuente, dtype=str, keep_default_na=False, chunksize=tamano, encoding='utf-8-sig'):
+            bloque.index = bloque.index + 2
+            yield bloque
+
+# --- NORMALIZACIÓN Y VALIDACIÓN DE UN BLOQUE ---
+def _texto(serie):
+    return serie.map(lambda v: '' if v is None or (isinstance(v, float) and np.isnan(v)) else str(v)).str.strip()
+
+def _fechas(serie):
+    texto = _texto(serie)
+    fechas = pd.to_datetime(texto, format='ISO8601', errors='coerce')
+    faltantes = fechas.isna() & (texto != '')
+    if faltantes.any():
+        fechas[faltantes] = pd.to_datetime(texto[faltantes], format='%d/%m/%Y', errors='coerce')
+    return texto, fechas
+
+def normalizar(bloque, mapa, usuario):
+    """Regresa (filas normalizadas al esquema de `vuelos`, motivo de rechazo por fila; '' = válida)."""
+    datos = pd.DataFrame(index=bloque.index)
+    for origen, destino in mapa.items():
+        if destino not in datos:
+            datos[destino] = _texto(bloque[origen])
+    for columna in COLUMNAS:
+        if columna not in datos:
+            datos[columna] = DEFAULTS.get(columna, '')
+        elif columna in DEFAULTS:
+            datos[columna] = datos[columna].mask(datos[columna] == '', DEFAULTS[columna])
+    for columna in MAYUSCULAS:
+        datos[columna] = datos[columna].str.upper()
+    datos['Extra'] = datos['Extra'].replace({'SI': 'SÍ', 'S': 'SÍ', 'N': 'NO'})
+    datos['Usuario'] = datos['Usuario'].mask(datos['Usuario'] == '', usuario)
+
+    motivos = pd.Series('', index=bloque.index)
+    def rechazar(mascara, texto):
+        motivos[mascara] = motivos[mascara] + texto + '; '
+
+    rechazar(datos['Pasajero'] == '', 'falta Pasajero')
+    rechazar(datos['PNR'] == '', 'falta PNR')
+
+    estado = datos['Estado'].map(lambda e: ESTADOS.get(_canonica(e)))
+    rechazar(estado.isna(), 'Estado desconocido')
+    datos['Estado'] = estado.fillna(datos['Estado'])
+
+    costo_txt = datos['Costo'].str.replace(r'[$,\s]', '', regex=True).replace('', '0')
+    costo = pd.to_numeric(costo_txt, errors='coerce')
+    rechazar(costo.isna() | (costo < 0), 'Costo inválido')
+    datos['Costo'] = costo.fillna(0.0).astype(float)
+
+    texto, fecha = _fechas(datos['Fecha'])
+    rechazar(texto == '', 'falta Fecha')
+    rechazar(fecha.isna() & (texto != ''), 'Fecha inválida')
+    datos['Fecha'] = fecha.dt.strftime('%Y-%m-%d').fillna('')
+
+    texto, regreso = _fechas(datos['Fecha_Regreso'])
+    rechazar(regreso.isna() & (texto != ''), 'Fecha_Regreso inválida')
+    datos['Fecha_Regreso'] = regreso.dt.strftime('%Y-%m-%d').fillna('')
+
+    return datos[COLUMNAS], motivos.str.rstrip('; ')
+
+def _existentes(conn, claves):
+    """Llaves PNR+Pasajero+Fecha del bloque que ya están vivas en la base (usa el índice de PNR)."""
+    pnrs = sorted({pnr for pnr, _, _ in claves})
+    if not pnrs:
+        return set()
+    filas = conn.execute(
+        f"SELECT PNR, Pasajero, substr(Fecha, 1, 10) FROM vuelos "
+        f"WHERE deleted_at IS NULL AND PNR IN ({', '.join('?' * len(pnrs))})", pnrs).fetchall()
+    # Mayúsculas en Python, igual que el bloque: UPPER() de SQLite solo cubre ASCII (no "ñ" ni acentos)
+    return {(pnr.upper(), (pasajero or '').upper(), fecha) for pnr, pasajero, fecha in filas}
+
+# --- PIPELINE COMPLETO ---
+def importar(fuente, nombre, errores=None, tamano=TAMANO_BLOQUE, usuario="IMPORTACION", simular=False,
+             progreso=None, ruta_db=db.DB_PATH):
+    """Importa el archivo por bloques; cada bloque válido se escribe en su propia transacción.
+
+    `errores` (texto, opcional) recibe en CSV las filas rechazadas con su línea y motivo.
+    `progreso(metricas)` se llama después de cada bloque. Regresa las métricas finales.
+    """
+    inicio = time.perf_counter()
+    m = {'leidas': 0, 'insertadas': 0, 'rechazadas': 0, 'duplicadas': 0, 'bloques': 0, 'columnas_ignoradas': [],
+         'adjuntos': 0, 'adjuntos_faltantes': 0}
+    escritor = None
+    vistas = set()
+    for bloque in leer_bloques(fuente, nombre, tamano):
+        if m['bloques'] == 0:
+            mapa = mapear_columnas(bloque.columns)
+            m['columnas_ignoradas'] = [c for c in bloque.columns if c not in mapa]
+            faltantes = {'Pasajero', 'PNR', 'Fecha'} - set(mapa.values())
+            if faltantes:
+                raise ValueError(f"El archivo no trae las columnas obligatorias: {', '.join(sorted(faltantes))}")
+        datos, motivos = normalizar(bloque, mapa, usuario)
+
+        claves = list(zip(datos['PNR'], datos['Pasajero'], datos['Fecha']))
+        with db.conexion(ruta_db) as conn:
+            en_base = _existentes(conn, [c for c, mot in zip(claves, motivos) if not mot])
+        duplicada = []
+        for clave, motivo in zip(claves, motivos):
+            repetida = not motivo and (clave in en_base or clave in vistas)
+            duplicada.append(repetida)
+            if not motivo and not repetida:
+                vistas.add(clave)
+        duplicada = pd.Series(duplicada, index=datos.index)
+        motivos = motivos.mask(duplicada & (motivos == ''), 'duplicado (PNR+Pasajero+Fecha ya registrado)')
+
+        validas = datos[motivos == '']
+        if not validas.empty and not simular:
+            with db.transaccion(ruta_db) as conn:
+                ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM vuelos").fetchone()[0]
+                conn.executemany(_SQL_INSERT, validas.itertuples(index=False, name=None))
+                if (validas['Soporte'] != '').any():
+                    # Las rutas de `Soporte` pasan al almacén de adjuntos (solo de ahí se leen);
+                    # las que no existen en disco se quedan en la columna como pista
+                    r = adjuntos.migrar_soportes(conn, desde_id=ultimo_id)
+                    m['adjuntos'] += r['archivos']
+                    m['adjuntos_faltantes'] += r['faltantes']
+
+        rechazadas = bloque[motivos != '']
+        if errores is not None and not rechazadas.empty:
+            if escritor is None:
+                escritor = csv.writer(errores)
+                escritor.writerow(['linea'] + list(bloque.columns) + ['motivo'])
+            for n, fila in zip(rechazadas.index, rechazadas.itertuples(index=False, name=None)):
+                escritor.writerow([n, *fila, motivos[n]])
+
+        m['leidas'] += len(bloque)
+        m['insertadas'] += len(validas)
+        m['duplicadas'] += int(duplicada.sum())
+        m['rechazadas'] += len(rechazadas) - int(duplicada.sum())
+        m['bloques'] += 1
+        m['segundos'] = time.perf_counter() - inicio
+        m['filas_por_s'] = m['leidas'] / m['segundos'] if m['segundos'] > 0 else 0.0
+        if progreso:
+            progreso(dict(m))
+
+    m.setdefault('segundos', time.perf_counter() - inicio)
+    m.setdefault('filas_por_s', 0.0)
+    if m['insertadas'] and not simular and ruta_db == db.DB_PATH:
+        almacen.marcar_cambio()
+    return m
+
+# --- ENTRADA DE CONSOLA ---
+def main(argv=None):
+    from modules import migraciones
+
+    parser = argparse.ArgumentParser(description="Importa vuelos históricos desde CSV o XLSX.")
+    parser.add_argument("archivo")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="filas por transacción")
+    parser.add_argument("--errores", help="CSV para las filas rechazadas (por omisión <archivo>.errores.csv)")
+    parser.add_argument("--usuario", default="IMPORTACION")
+    parser.add_argument("--simular", action="store_true", help="validar sin escribir en la base")
+    args = parser.parse_args(argv)
+
+    migraciones.preparar_base()
+    ruta_errores = args.errores or f"{args.archivo}.errores.csv"
+    with open(ruta_errores, "w", newline="", encoding="utf-8-sig") as salida:
+        m = importar(args.archivo, args.archivo, salida, args.bloque, args.usuario, args.simular,
+                     progreso=lambda p: print(f"  {p['leidas']:,} filas leídas ({p['filas_por_s']:,.0f} filas/s)", file=sys.stderr))
+    if m['columnas_ignoradas']:
+        print(f"Columnas ignoradas: {', '.join(m['columnas_ignoradas'])}")
+    if m['adjuntos'] or m['adjuntos_faltantes']:
+        print(f"Adjuntos: {m['adjuntos']:,} pasados al almacén · {m['adjuntos_faltantes']:,} no encontrados en disco")
+    print(f"{m['leidas']:,} leídas · {m['insertadas']:,} {'válidas (simulación)' if args.simular else 'insertadas'} · "
+          f"{m['duplicadas']:,} duplicadas · {m['rechazadas']:,} rechazadas en {m['segundos']:.1f} s ({m['filas_por_s']:,.0f} filas/s)")
+    if m['rechazadas'] or m['duplicadas']:
+        print(f"Detalle de rechazos: {ruta_errores}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Instrumentación de reruns: tramos cronometrados, conteo de SQL y perfiles bajo demanda.
+
+Cada `tramo("nombre")` mide su duración, cuántas sentencias SQL se ejecutaron
+dentro y cuánto tardaron (vía el cursor de las conexiones del pool) y, si el
+llamador lo indica, cuántas filas se leyeron. Los tramos terminados quedan en un búfer en
+memoria (para el panel de p50/p95) y en un log JSONL rotativo en `logs/`.
+
+    with instrumentacion.tramo("exportacion.excel") as t:
+        ...
+        t.filas = len(df)
+"""
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+ACTIVA = os.environ.get("LOGISTICS_INSTRUMENTACION", "1") != "0"
+DIR_LOGS = "logs"
+RUTA_LOG = os.path.join(DIR_LOGS, "instrumentacion.jsonl")
+MAX_BYTES_LOG = 5 * 1024 * 1024   # al pasarlo, el log actual pasa a `.1` (se conserva uno)
+MAX_TRAMOS_MEMORIA = 5000
+LOTE_ESCRITURA = 200
+
+
+class Tramo:
+    __slots__ = ('nombre', 'padre', 'ms', 'sql', 'sql_ms', 'filas')
+
+    def __init__(self, nombre, padre):
+        self.nombre = nombre
+        self.padre = padre
+        self.ms = 0.0
+        self.sql = 0
+        self.sql_ms = 0.0
+        self.filas = None
+
+
+_actual = contextvars.ContextVar('tramo_actual', default=None)
+_recientes = deque(maxlen=MAX_TRAMOS_MEMORIA)
+_pendientes = []
+_lock = threading.Lock()
+
+# --- TRAMOS ---
+@contextmanager
+def tramo(nombre, filas=None):
+    """Mide el bloque; los tramos anidados acumulan su SQL en el tramo padre."""
+    t = Tramo(nombre, _actual.get())
+    t.filas = filas
+    token = _actual.set(t)
+    inicio = time.perf_counter()
+    try:
+        yield t
+    finally:
+        t.ms = (time.perf_counter() - inicio) * 1000
+        _actual.reset(token)
+        if t.padre is not None:
+            t.padre.sql += t.sql
+            t.padre.sql_ms += t.sql_ms
+        if ACTIVA:
+            _registrar(t)
+
+def medido(nombre):
+    """Decorador equivalente a envolver la función en `tramo(nombre)`."""
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with tramo(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+# --- SQL: CONTEO Y TIEMPO POR SENTENCIA ---
+# Se mide en el cursor y no con set_trace_callback: el trace callback se dispara
+# también por cada sentencia de los triggers y Python expande el SQL con sus
+# parámetros en cada llamada (un executemany de 30k filas contaba ~500k "SQL").
+def _sumar_sql(inicio):
+    t = _actual.get()
+    if t is not None:
+        t.sql += 1
+        t.sql_ms += (time.perf_counter() - inicio) * 1000
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cuenta y cronometra cada execute/executemany en el tramo activo.
+
+    En un SELECT el tiempo llega hasta la primera fila; lo que se lea después
+    queda en la duración del tramo.
+    """
+
+    def execute(self, sql, parametros=(), /):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            _sumar_sql(inicio)
+
+    def executemany(self, sql, filas, /):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, filas)
+        finally:
+            _sumar_sql(inicio)
+
+
+class ConexionMedida(sqlite3.Connection):
+    """`factory=` de sqlite3.connect; `conn.execute` no pasa por `cursor()`, por eso se redirige."""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=(), /):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, filas, /):
+        return self.cursor().executemany(sql, filas)
+
+# --- BÚFER Y LOG ROTATIVO ---
+def _registrar(t):
+    registro = {'ts': round(time.time(), 3), 'nombre': t.nombre, 'ms': round(t.ms, 3),
+                'padre': t.padre.nombre if t.padre else None, 'sql': t.sql, 'sql_ms': round(t.sql_ms, 3), 'filas': t.filas, 'pid': os.getpid()}
+    with _lock:
+        _recientes.append(registro)
+        _pendientes.append(registro)
+        # Se escribe al cerrar un tramo raíz (fin del rerun) o si el lote crece demasiado
+        if t.padre is None or len(_pendientes) >= LOTE_ESCRITURA:
+            _volcar()
+
+def _volcar():
+    lote = list(_pendientes)
+    _pendientes.clear()
+    try:
+        os.makedirs(DIR_LOGS, exist_ok=True)
+        if os.path.exists(RUTA_LOG) and os.path.getsize(RUTA_LOG) > MAX_BYTES_LOG:
+            os.replace(RUTA_LOG, RUTA_LOG + ".1")
+        with open(RUTA_LOG, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in lote)
+    except OSError as e:
+        logger.warning("No se pudo escribir el log de instrumentación: %s", e)
+
+def recientes():
+    with _lock:
+        return list(_recientes)
+
+def resumen():
+    """Por nombre de tramo: n, p50/p95/máx en ms, SQL (sentencias y ms) y filas promedio (búfer en memoria)."""
+    import numpy as np
+    grupos = {}
+    for r in recientes():
+        grupos.setdefault(r['nombre'], []).append(r)
+    filas = []
+    for nombre, registros in grupos.items():
+        ms = np.array([r['ms'] for r in registros])
+        leidas = [r['filas'] for r in registros if r['filas'] is not None]
+        filas.append({
+            'tramo': nombre, 'n': len(registros),
+            'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)), 'max_ms': float(ms.max()),
+            'sql_prom': sum(r['sql'] for r in registros) / len(registros),
+            'sql_ms_prom': sum(r.get('sql_ms', 0.0) for r in registros) / len(registros),
+            'filas_prom': sum(leidas) / len(leidas) if leidas else None,
+        })
+    return sorted(filas, key=lambda f: f['p95_ms'], reverse=True)
+
+def leer_log(ruta=RUTA_LOG):
+    """Registros del log en disco (incluye otros procesos y reinicios)."""
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+# --- PERFIL DE UN RERUN ---
+@contextmanager
+def perfil(nombre="rerun", lineas=30):
+    """cProfile del bloque; al salir deja en el dict `ruta` del .prof y `texto` con las funciones más costosas."""
+    resultado = {}
+    perfilador = cProfile.Profile()
+    try:
+        perfilador.enable()
+    except ValueError as e:  # ya hay otro perfilador activo en el proceso
+        resultado['error'] = str(e)
+        yield resultado
+        return
+    try:
+        yield resultado
+    finally:
+        perfilador.disable()
+        os.makedirs(DIR_LOGS, exist_ok=True)
+        ruta = os.path.join(DIR_LOGS, f"perfil_{nombre}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+        perfilador.dump_stats(ruta)
+        texto = io.StringIO()
+        pstats.Stats(perfilador, stream=texto).strip_dirs().sort_stats("cumulative").print_stats(lineas)
+        resultado.update(ruta=ruta, texto=texto.getvalue())
@@ -1,36 +1,31 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
-import sqlite3
-import io
-import os
+from modules import adjuntos, almacen, db, exportacion, navegacion
+import hashlib
+import math
+import time
 import urllib.parse
 import re
 
 # --- DIÁLOGO DE SEGURIDAD PARA ACCIONES RÁPIDAS ---
 @st.dialog("🔐 AUTORIZACIÓN REQUERIDA")
-def dialog_cambiar_estado(id_vuelo, nuevo_estado):
-    st.markdown(f"Se cambiará el estado de este activo a: **{nuevo_estado}**")
+def dialog_cambiar_estado(ids_vuelos, nuevo_estado):
+    st.markdown(f"Se cambiará el estado de {len(ids_vuelos)} activo(s) a: **{nuevo_estado}**")
     clave = st.text_input("Ingresa la clave de administrador para continuar:", type="password")
     
     if st.button("CONFIRMAR ACCIÓN", type="primary", use_container_width=True):
         if clave == "ADMIN123":  # <-- CONTRASEÑA MAESTRA AQUÍ
-            conn = sqlite3.connect('logistics_v2.db')
-            cursor = conn.cursor()
-            cursor.execute("UPDATE vuelos SET Estado=? WHERE id=?", (nuevo_estado, id_vuelo))
-            conn.commit()
-            st.session_state.db_vuelos = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-            conn.close()
+            with db.transaccion() as conn:
+                conn.executemany("UPDATE vuelos SET Estado=? WHERE id=?", [(nuevo_estado, i) for i in ids_vuelos])
+            almacen.marcar_cambio()
             st.rerun()
         else:
             st.error("❌ Clave incorrecta. Operación denegada.")
 
-# --- EXPORTADOR EXCEL ---
-def generar_excel_inventario(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Inventario_Activos')
-    return output.getvalue()
+# --- EXPORTADOR EXCEL (DIFERIDO HASTA EL CLIC) ---
+def generar_excel_inventario(datos, f_ini, f_fin, busqueda=""):
+    return exportacion.excel_diferido(datos, 'Inventario_Activos', (f_ini, f_fin, busqueda))
 
 # --- CONTENIDO DEL MODAL GESTIÓN ---
 @st.dialog("GESTIÓN DE ACTIVO")
@@ -78,28 +73,28 @@ def modal_gestion(vuelo):
     st.markdown("---")
     st.markdown("#### 📎 PORTAFOLIO DE DOCUMENTOS")
     
-    archivos_actuales = str(vuelo['Soporte']).split('|') if vuelo['Soporte'] else []
-    archivos_validos = [f for f in archivos_actuales if os.path.exists(f)]
+    # Solo se consulta la lista; los archivos se leen al descargar y las vistas previas salen de caché en disco
+    documentos = adjuntos.listar(vuelo['id'])
     
-    if archivos_validos:
+    if documentos:
+        ver_previas = st.toggle("🖼️ VISTA PREVIA", key=f"previa_{vuelo['id']}")
         cols_galeria = st.columns(4)
-        for idx, ruta in enumerate(archivos_validos):
+        for idx, doc in enumerate(documentos):
             with cols_galeria[idx % 4]:
                 with st.container(border=True):
-                    nombre_arch = os.path.basename(ruta)
-                    ext = nombre_arch.split('.')[-1].lower()
-                    if ext in ['jpg', 'jpeg', 'png']: st.image(ruta, use_container_width=True)
+                    nombre_arch = doc['nombre']
+                    previa = adjuntos.miniatura(doc['sha256'], nombre_arch) if ver_previas else None
+                    if previa: st.image(previa, use_container_width=True)
                     else: st.markdown(f"<div style='text-align:center; font-size:40px;'>📄</div>", unsafe_allow_html=True)
                     st.caption(nombre_arch[:15] + "...")
-                    with open(ruta, "rb") as file:
-                        st.download_button("⬇️", data=file, file_name=nombre_arch, key=f"dl_{vuelo['id']}_{idx}", use_container_width=True)
+                    st.download_button("⬇️", data=lambda sha=doc['sha256']: adjuntos.leer(sha), file_name=nombre_arch, key=f"dl_{vuelo['id']}_{idx}", use_container_width=True)
     else:
         st.info("No hay documentos adjuntos a este registro.")
 
     archivos_nuevos = st.file_uploader("Agregar documentos", type=['pdf', 'jpg', 'png'], accept_multiple_files=True, key=f"file_{vuelo['id']}", disabled=esta_bloqueado)
     
     # --- LÓGICA DE WHATSAPP ---
-    if archivos_validos and nuevo_tel:
+    if documentos and nuevo_tel:
         tel_limpio = re.sub(r'\D', '', nuevo_tel)
         aerolinea_txt = f" por {nuevo_aer}" if nuevo_aer != "N/A" and nuevo_aer != "" else ""
         vuelo_txt = f" (Vuelo: {nuevo_nvv})" if nuevo_nvv != "S/N" else ""
@@ -135,126 +130,125 @@ def modal_gestion(vuelo):
 
     if c2.button("✂️ DIVIDIR", use_container_width=True, disabled=esta_bloqueado, key=f"spl_{vuelo['id']}"):
         costo_mitad = vuelo['Costo'] / 2
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
-        cursor.execute("UPDATE vuelos SET Estado='Realizado', Costo=?, Pasajero=? WHERE id=?", (costo_mitad, f"{vuelo['Pasajero']} (IDA)", vuelo['id']))
-        cursor.execute('''INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Equipaje, Extra, Fecha, Soporte, Usuario, Hora, Pais, Telefono, Aerolinea, Boleto_Ligado, No_Vuelo, Motivo, Autoriza)
-                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
-                       (f"{vuelo['Pasajero']} (VUELTA)", vuelo['Destino'], vuelo['Origen'], "Abierto (Disponible)", costo_mitad, vuelo['PNR'], vuelo['Equipaje'], vuelo['Extra'], str(fecha_dt), vuelo['Soporte'], st.session_state.usuario['nombre'], datetime.now().strftime("%H:%M"), vuelo.get('Pais', 'N/A'), vuelo.get('Telefono', ''), vuelo.get('Aerolinea', 'N/A'), "", vuelo.get('No_Vuelo', 'S/N'), vuelo.get('Motivo', 'NO ESPECIFICADO'), vuelo.get('Autoriza', 'PENDIENTE')))
-        conn.commit()
-        st.session_state.db_vuelos = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-        conn.close()
+        with db.transaccion() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE vuelos SET Estado='Realizado', Costo=?, Pasajero=? WHERE id=?", (costo_mitad, f"{vuelo['Pasajero']} (IDA)", vuelo['id']))
+            cursor.execute('''INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Equipaje, Extra, Fecha, Soporte, Usuario, Hora, Pais, Telefono, Aerolinea, Boleto_Ligado, No_Vuelo, Motivo, Autoriza)
+                              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', 
+                           (f"{vuelo['Pasajero']} (VUELTA)", vuelo['Destino'], vuelo['Origen'], "Abierto (Disponible)", costo_mitad, vuelo['PNR'], vuelo['Equipaje'], vuelo['Extra'], str(fecha_dt), vuelo['Soporte'], st.session_state.usuario['nombre'], datetime.now().strftime("%H:%M"), vuelo.get('Pais', 'N/A'), vuelo.get('Telefono', ''), vuelo.get('Aerolinea', 'N/A'), "", vuelo.get('No_Vuelo', 'S/N'), vuelo.get('Motivo', 'NO ESPECIFICADO'), vuelo.get('Autoriza', 'PENDIENTE')))
+            # La vuelta comparte los documentos de la ida (mismas referencias, sin copiar archivos)
+            adjuntos.copiar_referencias(cursor, vuelo['id'], cursor.lastrowid)
+        almacen.marcar_cambio()
         st.rerun()
 
     if c3.button("🗑️ ELIMINAR", use_container_width=True, disabled=esta_bloqueado, key=f"del_{vuelo['id']}"):
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cursor.execute("UPDATE vuelos SET deleted_at=? WHERE id=?", (timestamp, vuelo['id']))
-        conn.commit()
-        st.session_state.db_vuelos = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-        conn.close()
+        db.ejecutar("UPDATE vuelos SET deleted_at=? WHERE id=?", (timestamp, vuelo['id']))
+        almacen.marcar_cambio()
         st.session_state[llave_edicion] = False
         st.rerun()
 
     if c4.button("GUARDAR", type="primary", use_container_width=True, disabled=esta_bloqueado, key=f"sav_{vuelo['id']}"):
-        rutas_finales = archivos_validos.copy()
-        if archivos_nuevos:
-            if not os.path.exists("attachments"): os.makedirs("attachments")
-            for archivo in archivos_nuevos:
-                ruta_nueva = f"attachments/{vuelo['id']}_{archivo.name}"
-                with open(ruta_nueva, "wb") as f: f.write(archivo.getbuffer())
-                rutas_finales.append(ruta_nueva)
-                
-        cadena_soportes = "|".join(rutas_finales)
-
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
-        cursor.execute('''UPDATE vuelos SET 
-            Pasajero=?, PNR=?, Costo=?, Estado=?, Fecha=?, Origen=?, Destino=?, 
-            Soporte=?, Pais=?, Telefono=?, Aerolinea=?, No_Vuelo=?, Motivo=?, Autoriza=?
-            WHERE id=?''',
-            (nuevo_pax, nuevo_pnr, nuevo_costo, nuevo_estado, str(nueva_fecha), 
-             nuevo_ori, nuevo_des, cadena_soportes, nuevo_pais, nuevo_tel, 
-             nuevo_aer, nuevo_nvv, nuevo_motivo, nuevo_aut, vuelo['id']))
-        conn.commit()
-        
-        st.session_state.db_vuelos = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-        conn.close()
+        with db.transaccion() as conn:
+            conn.execute('''UPDATE vuelos SET 
+                Pasajero=?, PNR=?, Costo=?, Estado=?, Fecha=?, Origen=?, Destino=?, 
+                Pais=?, Telefono=?, Aerolinea=?, No_Vuelo=?, Motivo=?, Autoriza=?
+                WHERE id=?''',
+                (nuevo_pax, nuevo_pnr, nuevo_costo, nuevo_estado, str(nueva_fecha), 
+                 nuevo_ori, nuevo_des, nuevo_pais, nuevo_tel, 
+                 nuevo_aer, nuevo_nvv, nuevo_motivo, nuevo_aut, vuelo['id']))
+            if archivos_nuevos:
+                adjuntos.adjuntar([vuelo['id']], [(a.name, a) for a in archivos_nuevos], conn=conn)
+
+        almacen.marcar_cambio()
         st.session_state[llave_edicion] = False
         st.rerun()
 
+# --- LISTADO PAGINADO ---
+TAMANOS_PAGINA = [25, 50, 100, 200]
+ORDENES = {
+    "REGISTRO ↑": "id ASC",
+    "REGISTRO ↓": "id DESC",
+    "FECHA ↑": "Fecha ASC, id ASC",
+    "FECHA ↓": "Fecha DESC, id DESC",
+    "PASAJERO A-Z": "Pasajero COLLATE NOCASE ASC, id ASC",
+    "COSTO ↓": "Costo DESC, id DESC",
+}
+ICONOS_ESTADO = {"Activo": "🔵", "Cancelado": "🔴", "Realizado": "🟢", "Canjeado": "⚪"}
+# Objetivo de render del listado con 100k boletos en la base (medido con benchmarks/bench_inventario.py)
+OBJETIVO_RENDER_MS = 250
+
+def _vista_pagina(df_pag):
+    vista = df_pag[['id', 'Pasajero', 'PNR', 'Fecha', 'Origen', 'Destino', 'Aerolinea', 'No_Vuelo', 'Estado', 'Boleto_Ligado', 'Costo']].copy()
+    vista['Estado'] = vista['Estado'].map(lambda e: f"{ICONOS_ESTADO.get(e, '🟡')} {str(e).upper()}")
+    vista['Boleto_Ligado'] = vista['Boleto_Ligado'].fillna('').replace({'nan': '', 'None': ''})
+    return vista
+
+@navegacion.vista("INVENTARIO")
 def render():
+    t_inicio = time.perf_counter()
     st.markdown("<h4 style='letter-spacing:2px; font-weight:300;'>INVENTARIO DE VUELOS</h4>", unsafe_allow_html=True)
     
-    df = st.session_state.db_vuelos.copy()
-    df['Fecha_DT'] = pd.to_datetime(df['Fecha']).dt.date
-
     with st.container(border=True):
         c1, c2, c3 = st.columns([2, 2, 1.5])
         f_ini = c1.date_input("DESDE", value=date(2024, 1, 1), key="inv_f_ini")
         f_fin = c2.date_input("HASTA", value=date(2026, 12, 31), key="inv_f_fin")
-        df_f = df[(df['Fecha_DT'] >= f_ini) & (df['Fecha_DT'] <= f_fin)].copy()
-        
-        excel = generar_excel_inventario(df_f.drop(columns=['Fecha_DT']))
-        c3.markdown("<br>", unsafe_allow_html=True)
-        c3.download_button("📊 EXCEL", data=excel, file_name=f"Inventario_{f_ini}.xlsx", key="btn_exp_inv", use_container_width=True)
-
-    busqueda = st.text_input("BUSCAR ACTIVO", placeholder="PASAJERO / PNR / AEROLÍNEA / NO. VUELO...", key="inv_search").upper()
-    
-    st.markdown("""
-        <div style='display:grid; grid-template-columns: 2fr 1fr 1fr 1.2fr 1fr 1.8fr; padding: 10px; border-bottom: 1px solid #1A1A1A; color: #444; font-size: 10px; letter-spacing: 2px;'>
-            <div>PASAJERO / PNR</div><div>FECHA</div><div>RUTA</div><div>AEROLÍNEA</div><div>ESTADO</div><div>ACCIÓN</div>
-        </div>
-    """, unsafe_allow_html=True)
 
-    if df_f.empty:
+    busqueda = st.text_input("BUSCAR ACTIVO", placeholder="PASAJERO / PNR / AEROLÍNEA / VUELO / RUTA / MOTIVO...", key="inv_search").upper().strip()
+    filtros = {'inicio': f_ini, 'fin': f_fin, 'busqueda': busqueda}
+
+    # La exportación consulta el rango completo (no solo la página) y únicamente al hacer clic
+    excel = generar_excel_inventario(lambda: almacen.consultar_vuelos(**filtros), f_ini, f_fin, busqueda)
+    c3.markdown("<br>", unsafe_allow_html=True)
+    c3.download_button("📊 EXCEL", data=excel, file_name=f"Inventario_{f_ini}.xlsx", key="btn_exp_inv", use_container_width=True)
+
+    # --- CONTROLES DE PAGINACIÓN (EL CORTE SE HACE EN SQLITE) ---
+    total = almacen.contar_vuelos(**filtros)
+    p1, p2, p3, p4 = st.columns([1.5, 1, 1, 2.5])
+    orden = p1.selectbox("ORDENAR POR", list(ORDENES), key="inv_orden")
+    tamano = p2.selectbox("POR PÁGINA", TAMANOS_PAGINA, index=1, key="inv_tamano")
+    paginas = max(1, math.ceil(total / tamano))
+    # La página vive solo en session_state (sin `value=`): se siembra una vez y se recorta si los filtros la dejan fuera
+    if "inv_pagina" not in st.session_state:
+        st.session_state["inv_pagina"] = 1
+    elif st.session_state["inv_pagina"] > paginas:
+        st.session_state["inv_pagina"] = paginas
+    pagina = p3.number_input("PÁGINA", min_value=1, max_value=paginas, step=1, key="inv_pagina")
+    p4.markdown(f"<div style='margin-top:34px; color:#666; font-size:11px; letter-spacing:1px;'>{total:,} ACTIVOS // PÁGINA {pagina} DE {paginas}</div>", unsafe_allow_html=True)
+
+    if total == 0:
         st.info("No hay registros en este rango.")
-    else:
-        for _, fila in df_f.iterrows():
-            aerolinea_str = str(fila.get('Aerolinea', 'N/A'))
-            nvv_str = str(fila.get('No_Vuelo', 'S/N'))
-            
-            # Búsqueda ampliada (ahora busca también por número de vuelo)
-            busqueda_condicion = not busqueda or (
-                busqueda in str(fila['Pasajero']).upper() or 
-                busqueda in str(fila['PNR']).upper() or 
-                busqueda in aerolinea_str.upper() or
-                busqueda in nvv_str.upper()
-            )
-            
-            if busqueda_condicion:
-                if fila['Estado'] == "Activo": color = "#00d4ff"
-                elif fila['Estado'] == "Cancelado": color = "#FF3B30"
-                elif fila['Estado'] == "Realizado": color = "#4CD964"
-                elif fila['Estado'] == "Canjeado": color = "#888888"
-                else: color = "#FFCC00" 
-                
-                boleto_ligado_str = str(fila.get('Boleto_Ligado', ''))
-                etiqueta_canje = f"<br><span style='background-color:#332b00; color:#FFCC00; font-size:9px; padding:2px 4px; border-radius:3px;'>🔄 CANJE: {boleto_ligado_str}</span>" if boleto_ligado_str and boleto_ligado_str not in ["nan", "None", ""] else ""
-                
-                c = st.columns([2, 1, 1, 1.2, 1, 1.8])
-                c[0].markdown(f"**{fila['Pasajero']}**<br><small>{fila['PNR']}</small>{etiqueta_canje}", unsafe_allow_html=True)
-                c[1].markdown(f"<div style='margin-top:10px;'>{fila['Fecha']}</div>", unsafe_allow_html=True)
-                c[2].markdown(f"<div style='margin-top:10px;'>{fila['Origen']}→{fila['Destino']}</div>", unsafe_allow_html=True)
-                
-                aerolinea_display = aerolinea_str if aerolinea_str != "N/A" else "-"
-                vuelo_display = f"<br><small>{nvv_str}</small>" if nvv_str != "S/N" else ""
-                c[3].markdown(f"<div style='margin-top:2px; font-weight:600;'>{aerolinea_display}{vuelo_display}</div>", unsafe_allow_html=True)
-                
-                c[4].markdown(f"<div style='margin-top:10px; color:{color};'>● {fila['Estado'].upper()}</div>", unsafe_allow_html=True)
-                
-                # Botonera
-                b_gest, b_real, b_canc, b_abri = c[5].columns([2.5, 1, 1, 1])
-                
-                if b_gest.button("GESTIONAR", key=f"inv_btn_{fila['id']}"):
-                    modal_gestion(fila)
-                    
-                if b_real.button("✅", key=f"btn_real_{fila['id']}", help="Marcar como Realizado"):
-                    dialog_cambiar_estado(fila['id'], "Realizado")
-                    
-                if b_canc.button("❌", key=f"btn_canc_{fila['id']}", help="Marcar como Cancelado"):
-                    dialog_cambiar_estado(fila['id'], "Cancelado")
-                    
-                if b_abri.button("🔓", key=f"btn_abri_{fila['id']}", help="Marcar como Abierto (Disponible)"):
-                    dialog_cambiar_estado(fila['id'], "Abierto (Disponible)")
\ No newline at end of file
+        return
+
+    df_pag = almacen.consultar_vuelos(**filtros, orden=ORDENES[orden], limite=tamano, desplazamiento=(pagina - 1) * tamano)
+    # La selección se guarda por posición: la llave cambia con todo lo que cambia las filas
+    # de la página, para que una selección vieja nunca se aplique a otros boletos.
+    llave_tabla = "inv_tabla_" + hashlib.sha1(repr((f_ini, f_fin, busqueda, orden, tamano, pagina, almacen.version())).encode()).hexdigest()[:12]
+    evento = st.dataframe(
+        _vista_pagina(df_pag), hide_index=True, use_container_width=True, key=llave_tabla,
+        on_select="rerun", selection_mode="multi-row",
+        column_config={
+            "id": st.column_config.NumberColumn("ID", width="small"),
+            "No_Vuelo": "NO. VUELO",
+            "Aerolinea": "AEROLÍNEA",
+            "Boleto_Ligado": "🔄 CANJE DE",
+            "Costo": st.column_config.NumberColumn("COSTO", format="$%.2f"),
+        },
+    )
+    filas_sel = [i for i in (evento.selection.rows if evento else []) if 0 <= i < len(df_pag)]
+    seleccion = df_pag.iloc[filas_sel]
+
+    # --- BARRA DE ACCIONES SOBRE LA SELECCIÓN ---
+    b_gest, b_real, b_canc, b_abri, b_info = st.columns([1.2, 1, 1, 1, 2])
+    ids_sel = [int(i) for i in seleccion['id']]
+    if b_gest.button("GESTIONAR", use_container_width=True, disabled=len(ids_sel) != 1, key="inv_btn_gestionar"):
+        modal_gestion(seleccion.iloc[0])
+    if b_real.button("✅ REALIZADO", use_container_width=True, disabled=not ids_sel, key="inv_btn_real", help="Marcar como Realizado"):
+        dialog_cambiar_estado(ids_sel, "Realizado")
+    if b_canc.button("❌ CANCELADO", use_container_width=True, disabled=not ids_sel, key="inv_btn_canc", help="Marcar como Cancelado"):
+        dialog_cambiar_estado(ids_sel, "Cancelado")
+    if b_abri.button("🔓 ABIERTO", use_container_width=True, disabled=not ids_sel, key="inv_btn_abri", help="Marcar como Abierto (Disponible)"):
+        dialog_cambiar_estado(ids_sel, "Abierto (Disponible)")
+
+    render_ms = (time.perf_counter() - t_inicio) * 1000
+    b_info.markdown(f"<div style='margin-top:8px; color:#666; font-size:10px; letter-spacing:1px;'>{len(ids_sel)} SELECCIONADOS // RENDER {render_ms:.0f} ms (OBJETIVO {OBJETIVO_RENDER_MS} ms)</div>", unsafe_allow_html=True)
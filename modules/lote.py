@@ -0,0 +1,202 @@
+"""Ingesta por lote: muchos PDF de itinerarios -> registros de vuelo listos para revisión.
+
+Uso desde consola:
+    python -m modules.lote confirmaciones/ --procesos 4 --concurrencia 4
+    python -m modules.lote a.pdf b.pdf --insertar --usuario ADMIN
+"""
+import argparse
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from modules import db, extraccion, reservas
+
+logger = logging.getLogger(__name__)
+
+PROCESOS = min(4, os.cpu_count() or 1)
+CONCURRENCIA_IA = 4
+
+# Localizadores de 6 caracteres junto a las etiquetas habituales de confirmaciones y facturas.
+# Solo la etiqueta ignora mayúsculas: el código va en mayúsculas, así que "Confirmation number"
+# no toma "number" como PNR. Entre etiqueta y código puede ir "de reserva" / "number" / "número".
+_PATRON_PNR = re.compile(
+    r'(?i:PNR|LOCALIZADOR|CLAVE DE RESERVACI[OÓ]N|C[OÓ]DIGO DE RESERVA(?:CI[OÓ]N)?|BOOKING (?:REF(?:ERENCE)?|CODE)|CONFIRMATION(?: CODE)?)'
+    r'(?:\s+(?i:DE RESERVA(?:CI[OÓ]N)?|NUMBER|N[UÚ]MERO|NO\.))?'
+    r'\W{0,20}(?!(?:NUMBER|NUMERO|CODIGO)\b)([A-Z0-9]{6})\b')
+
+# --- ETAPA 1: TEXTO (POOL DE PROCESOS, pdfplumber ES CPU) ---
+def _extraer_uno(documento):
+    _, contenido = documento
+    return extraccion.extraer_texto_pdf([io.BytesIO(contenido)])
+
+def extraer_textos(documentos, procesos=PROCESOS):
+    """`documentos`: lista de (nombre, bytes). Regresa los textos en el mismo orden.
+
+    Por posición y no por nombre: dos subidas pueden llamarse igual (p. ej. dos `confirmacion.pdf`).
+    """
+    if procesos <= 1 or len(documentos) <= 1:
+        return list(map(_extraer_uno, documentos))
+    # spawn y no fork: el servidor de Streamlit tiene hilos y un fork copiaría sus candados tomados
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(_extraer_uno, documentos))
+
+# --- ETAPA 2: AGRUPACIÓN POR PNR ---
+def detectar_pnr(texto):
+    m = _PATRON_PNR.search(texto or "")
+    return m.group(1) if m else None
+
+def agrupar_por_pnr(documentos, textos):
+    """Une confirmación/factura/correo del mismo PNR; lo que no trae PNR va solo."""
+    grupos = {}
+    for i, ((nombre, contenido), texto) in enumerate(zip(documentos, textos)):
+        pnr = detectar_pnr(texto)
+        clave = pnr or f"SIN_PNR::{i}"
+        grupo = grupos.setdefault(clave, {'pnr_detectado': pnr, 'archivos': [], 'contenidos': [], 'texto': ""})
+        grupo['archivos'].append(nombre)
+        grupo['contenidos'].append(contenido)
+        grupo['texto'] += texto
+    return list(grupos.values())
+
+# --- ETAPA 3: IA CON CONCURRENCIA ACOTADA ---
+async def _analizar_grupo(grupo, api_key, semaforo):
+    """Nunca lanza: una falla queda en `error` de su grupo y el resto del `gather` conserva lo ya pagado."""
+    try:
+        clave = extraccion.clave_documentos(grupo['contenidos'])
+        try:
+            en_cache = await asyncio.to_thread(extraccion.buscar_en_cache, clave)
+        except Exception as e:   # p. ej. base ocupada: se trata como fallo de caché
+            logger.warning("No se pudo consultar la caché de IA: %s", e)
+            en_cache = None
+        if en_cache and isinstance(en_cache['datos'], dict):
+            return dict(grupo, datos=en_cache['datos'], desde_cache=True, error=None)
+        async with semaforo:
+            datos = await asyncio.to_thread(extraccion.extraer_datos, grupo['texto'], api_key)
+        if not isinstance(datos, dict):
+            return dict(grupo, datos=None, desde_cache=False, error=f"La IA respondió {type(datos).__name__}, no un objeto JSON")
+    except Exception as e:
+        return dict(grupo, datos=None, desde_cache=False, error=str(e))
+    try:
+        await asyncio.to_thread(extraccion.guardar_en_cache, clave, grupo['texto'], datos)
+    except Exception as e:   # los datos ya se pagaron: se entregan aunque no queden en caché
+        logger.warning("No se pudo guardar en la caché de IA: %s", e)
+    return dict(grupo, datos=datos, desde_cache=False, error=None)
+
+async def _analizar_grupos(grupos, api_key, concurrencia):
+    semaforo = asyncio.Semaphore(concurrencia)
+    return await asyncio.gather(*(_analizar_grupo(g, api_key, semaforo) for g in grupos))
+
+# --- ETAPA 4: PROPUESTAS DE REGISTRO ---
+def filas_desde_resultado(resultado, usuario="SISTEMA"):
+    """Una fila por pasajero, con las mismas reglas que el formulario del registrador."""
+    datos = resultado.get('datos') or {}
+    nombres = datos.get('pasajeros') or [datos.get('pasajero', '')]
+    if not isinstance(nombres, list): nombres = [str(nombres)]
+    nombres = [str(n).upper().strip() for n in nombres if str(n).strip()]
+    try:
+        costo_total = float(datos.get('costo', 0.0) or 0.0)
+    except (TypeError, ValueError):
+        costo_total = 0.0
+    costo_individual = costo_total / len(nombres) if nombres else 0
+    pnr = str(datos.get('pnr') or resultado.get('pnr_detectado') or '').upper().strip()
+    return [{
+        'Pasajero': pax,
+        'Origen': str(datos.get('origen', '')).upper().strip(),
+        'Destino': str(datos.get('destino', '')).upper().strip(),
+        'Estado': 'Activo',
+        'Costo': costo_individual,
+        'PNR': pnr,
+        'Fecha': str(datos.get('fecha_salida', '') or ''),
+        'Fecha_Regreso': str(datos.get('fecha_regreso', '') or ''),
+        'Pais': 'MÉXICO',
+        'Soporte': '',
+        'Usuario': usuario,
+        'Hora': datetime.now().strftime("%H:%M"),
+        'Telefono': '',
+        'Aerolinea': str(datos.get('aerolinea', '')).upper().strip(),
+        'No_Vuelo': str(datos.get('no_vuelo', '')).upper().strip(),
+        'Motivo': str(datos.get('motivo', '')).upper().strip() or "NO ESPECIFICADO",
+        'Autoriza': str(datos.get('autoriza', '')).upper().strip() or "PENDIENTE",
+        'Boleto_Ligado': '',
+        'Extra': 'NO',
+        'Archivos': ", ".join(resultado['archivos']),
+    } for pax in nombres]
+
+def procesar_lote(documentos, api_key, usuario="SISTEMA", procesos=PROCESOS, concurrencia=CONCURRENCIA_IA):
+    """Corre las cuatro etapas y regresa (filas propuestas, resultados por grupo, métricas)."""
+    inicio = time.perf_counter()
+    textos = extraer_textos(documentos, procesos)
+    t_texto = time.perf_counter()
+    grupos = agrupar_por_pnr(documentos, textos)
+    resultados = asyncio.run(_analizar_grupos(grupos, api_key, concurrencia))
+    filas = [f for r in resultados if r['datos'] for f in filas_desde_resultado(r, usuario)]
+    duracion = time.perf_counter() - inicio
+    metricas = {
+        'documentos': len(documentos),
+        'grupos': len(grupos),
+        'desde_cache': sum(1 for r in resultados if r['desde_cache']),
+        'errores': sum(1 for r in resultados if r['error']),
+        'texto_s': t_texto - inicio,
+        'total_s': duracion,
+        'docs_por_minuto': len(documentos) / duracion * 60 if duracion > 0 else 0.0,
+    }
+    return filas, resultados, metricas
+
+def insertar_filas(filas):
+    """Inserta todas las filas aprobadas en una sola transacción (ver `reservas.registrar_reserva`)."""
+    return len(reservas.registrar_reserva(filas))
+
+# --- ENTRADA DE CONSOLA ---
+def _leer_documentos(rutas):
+    documentos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos = sorted(os.path.join(ruta, n) for n in os.listdir(ruta) if n.lower().endswith('.pdf'))
+        else:
+            archivos = [ruta]
+        for archivo in archivos:
+            with open(archivo, "rb") as f:
+                documentos.append((os.path.basename(archivo), f.read()))
+    return documentos
+
+def main(argv=None):
+    from modules import migraciones
+
+    parser = argparse.ArgumentParser(description="Ingesta por lote de itinerarios PDF.")
+    parser.add_argument("rutas", nargs="+", help="PDF o carpetas con PDF")
+    parser.add_argument("--procesos", type=int, default=PROCESOS)
+    parser.add_argument("--concurrencia", type=int, default=CONCURRENCIA_IA)
+    parser.add_argument("--usuario", default="SISTEMA")
+    parser.add_argument("--insertar", action="store_true", help="guardar las propuestas (sin esto solo se muestran)")
+    args = parser.parse_args(argv)
+
+    migraciones.preparar_base()
+    api_key = os.environ.get("GEMINI_API_KEY") or db.obtener_config("gemini_api_key")
+    if not api_key:
+        print("Falta la API Key (variable GEMINI_API_KEY o configuración del sistema).", file=sys.stderr)
+        return 1
+
+    documentos = _leer_documentos(args.rutas)
+    filas, resultados, m = procesar_lote(documentos, api_key, args.usuario, args.procesos, args.concurrencia)
+    for r in resultados:
+        estado = f"ERROR: {r['error']}" if r['error'] else ("caché" if r['desde_cache'] else "IA")
+        print(f"[{estado}] {r['pnr_detectado'] or 'SIN PNR'}: {', '.join(r['archivos'])}")
+    for f in filas:
+        print(f"  {f['PNR']:<8} {f['Pasajero']:<35} {f['Origen']}->{f['Destino']} {f['Fecha']} ${f['Costo']:,.2f}")
+    print(f"{m['documentos']} documentos / {m['grupos']} PNR en {m['total_s']:.1f} s "
+          f"({m['docs_por_minuto']:.0f} docs/min, {m['desde_cache']} desde caché, {m['errores']} errores)")
+    if args.insertar and filas:
+        try:
+            print(f"{insertar_filas(filas)} registros insertados.")
+        except reservas.ErrorReserva as e:
+            print("No se insertó nada:\n  " + "\n  ".join(e.errores), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
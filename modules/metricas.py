@@ -0,0 +1,108 @@
+from datetime import date
+from types import MappingProxyType
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+# Recortes exportables: máscara + orden de presentación
+_ORDEN_RECORTES = {
+    'activos': None,
+    'abiertos': ('Costo', False),
+    'cancelados': None,
+    'anual': None,
+    'proximos': ('Fecha', True),
+}
+
+
+class MetricasDashboard(NamedTuple):
+    """KPIs del dashboard ya calculados; la vista solo los muestra.
+
+    Los recortes completos (para Excel) no se copian al calcular: se guardan
+    las máscaras y `detalle()` arma el DataFrame solo cuando se pide.
+    """
+    fecha_corte: date
+    conteo_estado: MappingProxyType
+    costo_anual: float
+    costo_mes: float
+    n_proximos: int
+    top_proximos: pd.DataFrame
+    top_abiertos: pd.DataFrame
+    por_destino: pd.Series
+    base: pd.DataFrame
+    mascaras: MappingProxyType
+
+    @property
+    def n_activos(self):
+        return self.conteo_estado.get('Activo', 0)
+
+    @property
+    def n_abiertos(self):
+        return sum(n for estado, n in self.conteo_estado.items() if 'Abierto' in estado)
+
+    @property
+    def n_cancelados(self):
+        return self.conteo_estado.get('Cancelado', 0)
+
+    def detalle(self, nombre):
+        """Filas completas de un recorte ('activos', 'abiertos', 'cancelados', 'anual', 'proximos')."""
+        df = self.base[self.mascaras[nombre]]
+        orden = _ORDEN_RECORTES[nombre]
+        return df.sort_values(orden[0], ascending=orden[1], kind='stable') if orden else df
+
+
+def _solo_lectura(arreglo):
+    arreglo.setflags(write=False)
+    return arreglo
+
+# --- MOTOR DE MÉTRICAS (UNA SOLA PASADA VECTORIZADA) ---
+def calcular_metricas(df, hoy=None, top=5):
+    """Calcula todos los KPIs del dashboard a partir del DataFrame de vuelos.
+
+    La fecha se interpreta una vez y los totales por estado, año y mes salen
+    de un único `groupby` sobre columnas numéricas; las máscaras booleanas se
+    calculan una sola vez y se reutilizan para las tablas y exportaciones.
+    """
+    hoy = hoy or date.today()
+    fecha = pd.to_datetime(df['Fecha'], errors='coerce')
+    base = df.assign(Fecha=fecha)
+    estado = df['Estado'].astype(object).fillna('SIN ESTADO').astype(str).to_numpy()
+    # Costo puede venir en float32 desde el almacén; los totales se acumulan en float64
+    costo = pd.to_numeric(df['Costo'], errors='coerce').fillna(0.0).to_numpy(dtype='float64')
+
+    anios = fecha.dt.year.to_numpy()
+    en_anio = anios == hoy.year
+    en_mes = en_anio & (fecha.dt.month.to_numpy() == hoy.month)
+    proximo = (fecha >= pd.Timestamp(hoy)).to_numpy()
+
+    totales = pd.DataFrame({
+        'Estado': estado,
+        'n': 1,
+        'costo_anio': np.where(en_anio, costo, 0.0),
+        'costo_mes': np.where(en_mes, costo, 0.0),
+    }).groupby('Estado', sort=False).sum()
+
+    mascaras = {
+        'activos': estado == 'Activo',
+        'abiertos': pd.Series(estado).str.contains('Abierto', regex=False).to_numpy(),
+        'cancelados': estado == 'Cancelado',
+        'anual': en_anio,
+        'proximos': proximo,
+    }
+    # Las tablas en pantalla solo necesitan unas filas: se eligen por posición sin copiar el recorte
+    pos_proximos = np.flatnonzero(proximo)
+    pos_proximos = pos_proximos[np.argsort(fecha.to_numpy()[pos_proximos], kind='stable')[:top]]
+    pos_abiertos = np.flatnonzero(mascaras['abiertos'])
+    pos_abiertos = pos_abiertos[np.argsort(-costo[pos_abiertos], kind='stable')[:top]]
+
+    return MetricasDashboard(
+        fecha_corte=hoy,
+        conteo_estado=MappingProxyType({e: int(n) for e, n in totales['n'].items()}),
+        costo_anual=float(totales['costo_anio'].sum()),
+        costo_mes=float(totales['costo_mes'].sum()),
+        n_proximos=int(proximo.sum()),
+        top_proximos=base.iloc[pos_proximos],
+        top_abiertos=base.iloc[pos_abiertos],
+        por_destino=df['Destino'].value_counts().loc[lambda s: s > 0],  # sin categorías vacías
+        base=base,
+        mascaras=MappingProxyType({k: _solo_lectura(v) for k, v in mascaras.items()}),
+    )
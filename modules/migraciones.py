@@ -0,0 +1,354 @@
+import json
+import threading
+import time
+import logging
+from datetime import datetime
+from modules import adjuntos, db
+
+logger = logging.getLogger(__name__)
+
+# --- PASOS DE MIGRACIÓN (ORDENADOS, CADA UNO SE APLICA UNA SOLA VEZ) ---
+# Las bases creadas antes de este sistema ya tienen parte del esquema, por eso
+# cada paso revisa lo existente antes de alterar.
+
+def _columnas(cursor, tabla):
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return [columna[1] for columna in cursor.fetchall()]
+
+def _agregar_columnas(cursor, tabla, definiciones):
+    existentes = _columnas(cursor, tabla)
+    for col, definicion in definiciones.items():
+        if col not in existentes:
+            cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {col} {definicion}")
+
+def _m001_tablas_base(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vuelos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            Pasajero TEXT NOT NULL,
+            Origen TEXT,
+            Destino TEXT,
+            Estado TEXT,
+            Costo REAL,
+            PNR TEXT,
+            Equipaje TEXT,
+            Extra TEXT,
+            Fecha TEXT,
+            Soporte TEXT,
+            Usuario TEXT,
+            Hora TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS configuracion (
+            clave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+    ''')
+
+def _m002_columnas_operativas(cursor):
+    _agregar_columnas(cursor, 'vuelos', {
+        'Pais': 'TEXT DEFAULT "N/A"',
+        'deleted_at': 'TEXT DEFAULT NULL',
+        'Correo': 'TEXT DEFAULT ""',
+        'Telefono': 'TEXT DEFAULT ""',
+        'Aerolinea': 'TEXT DEFAULT "N/A"',
+        'Boleto_Ligado': 'TEXT DEFAULT ""',
+        'Motivo': 'TEXT DEFAULT "NO ESPECIFICADO"',
+        'Autoriza': 'TEXT DEFAULT "PENDIENTE"',
+        'Fecha_Regreso': 'TEXT DEFAULT ""',
+        'Tipo_Viaje': 'TEXT DEFAULT "Sencillo"',
+    })
+
+def _m003_no_vuelo(cursor):
+    # El registrador, la división de boletos y el modal de gestión ya escriben esta columna
+    _agregar_columnas(cursor, 'vuelos', {'No_Vuelo': 'TEXT DEFAULT "S/N"'})
+
+def _m004_cursor_cambios(cursor):
+    # Cada alta/edición recibe un `rev` creciente para la recarga incremental del almacén
+    if 'rev' not in _columnas(cursor, 'vuelos'):
+        cursor.execute("ALTER TABLE vuelos ADD COLUMN rev INTEGER DEFAULT NULL")
+        cursor.execute("UPDATE vuelos SET rev = id")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_rev ON vuelos(rev)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_vuelos_rev_ins AFTER INSERT ON vuelos
+        BEGIN
+            UPDATE vuelos SET rev = (SELECT COALESCE(MAX(rev), 0) + 1 FROM vuelos) WHERE id = NEW.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_vuelos_rev_upd AFTER UPDATE ON vuelos
+        WHEN NEW.rev IS OLD.rev
+        BEGIN
+            UPDATE vuelos SET rev = (SELECT COALESCE(MAX(rev), 0) + 1 FROM vuelos) WHERE id = NEW.id;
+        END
+    ''')
+
+def _m005_indices_filtros(cursor):
+    # Índices parciales sobre filas vivas: todas las consultas de la app llevan `deleted_at IS NULL`
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_vivos_fecha ON vuelos(Fecha) WHERE deleted_at IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_vivos_estado_fecha ON vuelos(Estado, Fecha) WHERE deleted_at IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_vivos_aerolinea ON vuelos(Aerolinea) WHERE deleted_at IS NULL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_pnr ON vuelos(PNR)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vuelos_pasajero ON vuelos(Pasajero)")
+    cursor.execute("ANALYZE vuelos")
+
+def _m006_cache_extraccion_ia(cursor):
+    # Resultados del asistente IA por huella de los PDF subidos (ver modules/extraccion.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_extraccion_ia (
+            clave TEXT PRIMARY KEY,
+            texto TEXT,
+            datos_json TEXT,
+            tamano INTEGER,
+            creado_en TEXT,
+            ultimo_uso TEXT,
+            usos INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cache_ia_uso ON cache_extraccion_ia(ultimo_uso)")
+
+# Campos que cubre el buscador del inventario
+COLUMNAS_BUSQUEDA = ['Pasajero', 'PNR', 'Aerolinea', 'No_Vuelo', 'Origen', 'Destino', 'Motivo', 'Autoriza']
+
+def _m007_busqueda_texto(cursor):
+    # Índice FTS5 de contenido externo: el texto vive en `vuelos`, aquí solo el índice.
+    # unicode61 con remove_diacritics 2 ignora mayúsculas y acentos ("JOSÉ" == "jose").
+    columnas = ", ".join(COLUMNAS_BUSQUEDA)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS vuelos_fts USING fts5(
+            {columnas}, content='vuelos', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    nuevos = ", ".join(f"new.{c}" for c in COLUMNAS_BUSQUEDA)
+    viejos = ", ".join(f"old.{c}" for c in COLUMNAS_BUSQUEDA)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_vuelos_fts_ins AFTER INSERT ON vuelos BEGIN
+            INSERT INTO vuelos_fts(rowid, {columnas}) VALUES (new.id, {nuevos});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_vuelos_fts_del AFTER DELETE ON vuelos BEGIN
+            INSERT INTO vuelos_fts(vuelos_fts, rowid, {columnas}) VALUES ('delete', old.id, {viejos});
+        END
+    """)
+    # Solo al cambiar columnas indexadas: el bump de `rev` no reindexa la fila
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_vuelos_fts_upd AFTER UPDATE OF {columnas} ON vuelos BEGIN
+            INSERT INTO vuelos_fts(vuelos_fts, rowid, {columnas}) VALUES ('delete', old.id, {viejos});
+            INSERT INTO vuelos_fts(rowid, {columnas}) VALUES (new.id, {nuevos});
+        END
+    """)
+    cursor.execute("INSERT INTO vuelos_fts(vuelos_fts) VALUES ('rebuild')")
+
+# Resúmenes del centro BI y sus dimensiones; el día sale de los primeros 10 caracteres de Fecha.
+# El diario no lleva pasajero ni número de vuelo (con ellos sería casi una fila por boleto):
+# el top de viajeros sale de su propio resumen día x pasajero.
+DIMENSIONES_ROLLUP = ['Aerolinea', 'Origen', 'Destino', 'Estado']
+DIMENSIONES_PASAJERO = ['Pasajero']
+ROLLUPS = {'rollup_diario': DIMENSIONES_ROLLUP, 'rollup_pasajero': DIMENSIONES_PASAJERO}
+
+def _llave_rollup(fila, dimensiones):
+    # Los NULL se guardan como '' para que la llave primaria sea única (SQLite admite NULL repetidos en PK)
+    return [f"COALESCE(substr({fila}.Fecha, 1, 10), '')"] + [f"COALESCE({fila}.{d}, '')" for d in dimensiones]
+
+def _sql_sumar_rollup(fila):
+    sentencias = []
+    for tabla, dimensiones in ROLLUPS.items():
+        columnas = ", ".join(['Dia'] + dimensiones)
+        sentencias.append(f"""
+        INSERT INTO {tabla} ({columnas}, Vuelos, Costo)
+        SELECT {", ".join(_llave_rollup(fila, dimensiones))}, 1, COALESCE({fila}.Costo, 0)
+        WHERE {fila}.deleted_at IS NULL
+        ON CONFLICT({columnas}) DO UPDATE SET Vuelos = Vuelos + 1, Costo = Costo + excluded.Costo;
+        """)
+    return "".join(sentencias)
+
+def _sql_restar_rollup(fila):
+    sentencias = []
+    for tabla, dimensiones in ROLLUPS.items():
+        llave = " AND ".join(f"{c} = {v}" for c, v in zip(['Dia'] + dimensiones, _llave_rollup(fila, dimensiones)))
+        sentencias.append(f"""
+        UPDATE {tabla} SET Vuelos = Vuelos - 1, Costo = Costo - COALESCE({fila}.Costo, 0)
+        WHERE {fila}.deleted_at IS NULL AND {llave};
+        DELETE FROM {tabla} WHERE Vuelos <= 0 AND {llave};
+        """)
+    return "".join(sentencias)
+
+def sql_tabla_rollup(esquema="main", tabla="rollup_diario"):
+    """CREATE TABLE de un resumen (también lo usa la base de archivo)."""
+    dimensiones = ROLLUPS[tabla]
+    columnas = ", ".join(['Dia'] + dimensiones)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {esquema}.{tabla} (
+            Dia TEXT NOT NULL,
+            {", ".join(f"{d} TEXT NOT NULL" for d in dimensiones)},
+            Vuelos INTEGER NOT NULL,
+            Costo REAL NOT NULL,
+            PRIMARY KEY ({columnas})
+        ) WITHOUT ROWID
+    """
+
+def _crear_rollups(cursor):
+    # Los triggers mantienen todos los resúmenes al insertar, editar, dar de baja lógica o borrar vuelos
+    for tabla in ROLLUPS:
+        cursor.execute(sql_tabla_rollup(tabla=tabla))
+    dimensiones = list(dict.fromkeys(d for dims in ROLLUPS.values() for d in dims))
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollup_ins AFTER INSERT ON vuelos BEGIN {_sql_sumar_rollup('new')} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_rollup_del AFTER DELETE ON vuelos BEGIN {_sql_restar_rollup('old')} END")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_upd
+        AFTER UPDATE OF Fecha, {", ".join(dimensiones)}, Costo, deleted_at ON vuelos
+        BEGIN {_sql_restar_rollup('old')} {_sql_sumar_rollup('new')} END
+    """)
+    reconstruir_rollup(cursor)
+
+def _m008_rollup_diario(cursor):
+    # Resúmenes materializados para el centro BI: una fila por día x combinación de dimensiones
+    _crear_rollups(cursor)
+
+def reconstruir_rollup(cursor, esquema="main", dias=None, tablas=None):
+    """Recalcula los resúmenes desde `vuelos` del mismo esquema (carga inicial o reparación).
+
+    Con `dias` (lista de 'AAAA-MM-DD') solo se rehacen esos días; con `tablas`, solo esos resúmenes.
+    """
+    for tabla in tablas or ROLLUPS:
+        dimensiones = ROLLUPS[tabla]
+        llave = _llave_rollup('vuelos', dimensiones)
+        filtro, params = "", ()
+        if dias is not None:
+            filtro, params = "AND substr(Fecha, 1, 10) IN (SELECT value FROM json_each(?))", (json.dumps(list(dias)),)
+            cursor.execute(f"DELETE FROM {esquema}.{tabla} WHERE Dia IN (SELECT value FROM json_each(?))", params)
+        else:
+            cursor.execute(f"DELETE FROM {esquema}.{tabla}")
+        cursor.execute(f"""
+            INSERT INTO {esquema}.{tabla} (Dia, {", ".join(dimensiones)}, Vuelos, Costo)
+            SELECT {", ".join(llave)}, COUNT(*), SUM(COALESCE(Costo, 0))
+            FROM {esquema}.vuelos WHERE deleted_at IS NULL {filtro}
+            GROUP BY {", ".join(llave)}
+        """, params)
+
+def _m009_adjuntos_por_contenido(cursor):
+    # Un blob por contenido (sha256) y una referencia por vuelo; reemplaza la cadena "a|b|c" de Soporte
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            tamano INTEGER NOT NULL,
+            creado_en TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS adjuntos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vuelo_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+            nombre TEXT NOT NULL,
+            creado_en TEXT,
+            UNIQUE (vuelo_id, sha256)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_adjuntos_sha256 ON adjuntos(sha256)")
+    r = adjuntos.migrar_soportes(cursor)
+    if r['archivos'] or r['faltantes']:
+        logger.info("Adjuntos migrados al almacén: %s archivos en %s blobs (%s no encontrados)",
+                    r['archivos'], r['blobs'], r['faltantes'])
+
+MIGRACIONES = [
+    (1, "Tablas base vuelos y configuracion", _m001_tablas_base),
+    (2, "Columnas operativas de vuelos (Pais ... Tipo_Viaje)", _m002_columnas_operativas),
+    (3, "Columna No_Vuelo", _m003_no_vuelo),
+    (4, "Cursor de cambios rev para el almacén incremental", _m004_cursor_cambios),
+    (5, "Índices para filtros de fecha, estado, PNR, pasajero y aerolínea", _m005_indices_filtros),
+    (6, "Caché persistente de extracción IA", _m006_cache_extraccion_ia),
+    (7, "Búsqueda de texto completo (FTS5) sobre vuelos", _m007_busqueda_texto),
+    (8, "Resúmenes materializados (diario y día x pasajero) para el centro BI", _m008_rollup_diario),
+    (9, "Adjuntos direccionados por contenido (blobs + referencias)", _m009_adjuntos_por_contenido),
+]
+
+# --- MOTOR DE MIGRACIONES ---
+def version_actual(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT,
+            aplicada_en TEXT
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def migrar(conn):
+    """Aplica en orden los pasos pendientes; cada paso va en su propia transacción.
+
+    Cada transacción toma el candado de escritura (`BEGIN IMMEDIATE`) y vuelve a
+    leer la versión: si otro proceso ya aplicó el paso mientras se esperaba, se omite.
+    """
+    aplicadas = []
+    actual = version_actual(conn)
+    for version, descripcion, paso in MIGRACIONES:
+        if version <= actual:
+            continue
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            actual = cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+            if version <= actual:
+                cursor.execute("COMMIT")
+                continue
+            paso(cursor)
+            cursor.execute("INSERT INTO schema_version (version, descripcion, aplicada_en) VALUES (?, ?, ?)",
+                           (version, descripcion, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        aplicadas.append(version)
+    return aplicadas
+
+def sembrar_demo(conn):
+    """Inserta los datos demo solo si la tabla está vacía."""
+    if conn.execute("SELECT COUNT(*) FROM vuelos").fetchone()[0] == 0:
+        vuelos_demo = [
+            ("ALEXANDER PIERCE", "JFK", "LHR", "Activo", 2450.0, "XP-992", "FULL", "NO", "2024-05-10", "", "ADMIN", "22:15", "ESTADOS UNIDOS", "528100000000", "DELTA", ""),
+            ("SARAH JENKINS", "MEX", "CDG", "Abierto (Disponible)", 1800.0, "FR-112", "MANO", "SÍ", "2024-05-15", "", "ADMIN", "11:00", "MÉXICO", "", "AEROMEXICO", "")
+        ]
+        conn.execute("BEGIN")
+        conn.executemany('''
+            INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Equipaje, Extra, Fecha, Soporte, Usuario, Hora, Pais, Telefono, Aerolinea, Boleto_Ligado)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', vuelos_demo)
+        conn.execute("COMMIT")
+
+# --- EJECUCIÓN ÚNICA POR PROCESO ---
+_lock = threading.Lock()
+_arranque = None
+
+def preparar_base(ruta_db=db.DB_PATH):
+    """Migra y siembra la base la primera vez que se llama en el proceso.
+
+    Las llamadas posteriores (cada rerun de Streamlit) regresan de inmediato con
+    las estadísticas del arranque original.
+    """
+    global _arranque
+    if _arranque is not None:
+        return _arranque
+    with _lock:
+        if _arranque is not None:
+            return _arranque
+        inicio = time.perf_counter()
+        with db.conexion(ruta_db) as conn:
+            aplicadas = migrar(conn)
+            sembrar_demo(conn)
+            version = version_actual(conn)
+        _arranque = {
+            'version': version,
+            'aplicadas': aplicadas,
+            'duracion_ms': (time.perf_counter() - inicio) * 1000,
+        }
+        logger.info("Esquema v%s listo en %.1f ms (migraciones aplicadas: %s)",
+                    version, _arranque['duracion_ms'], aplicadas or "ninguna")
+        return _arranque
+
+def estado_arranque():
+    """Estadísticas del arranque (None si la base aún no se ha preparado)."""
+    return _arranque
@@ -0,0 +1,58 @@
+"""Enrutador de vistas: en cada rerun solo se ejecuta la vista seleccionada.
+
+Cada vista es además un `st.fragment`: un widget dentro de ella solo vuelve a
+correr esa vista (no la barra superior, ni la sincronización de datos, ni las
+demás pantallas). Su tiempo de render queda en la sesión para el panel admin.
+"""
+import importlib
+import sys
+from functools import wraps
+import streamlit as st
+from modules import instrumentacion
+
+PARAMETRO_URL = "vista"
+
+
+def vista(nombre):
+    """Decorador: convierte el render en un fragmento cronometrado con lectura de tiempo al pie."""
+    def decorador(render):
+        @st.fragment
+        @wraps(render)
+        def envoltura(*args, **kwargs):
+            with instrumentacion.tramo(f"vista.{nombre}") as t:
+                resultado = render(*args, **kwargs)
+            registrar_tiempo(nombre, t.ms)
+            st.caption(f"⏱ {nombre} // RENDER {t.ms:.0f} ms · {t.sql} SQL ({t.sql_ms:.0f} ms)")
+            return resultado
+        return envoltura
+    return decorador
+
+def registrar_tiempo(nombre, ms):
+    tiempos = st.session_state.setdefault('tiempos_vista', {})
+    previo = tiempos.get(nombre, {'n': 0, 'max_ms': 0.0})
+    tiempos[nombre] = {'ultimo_ms': ms, 'n': previo['n'] + 1, 'max_ms': max(previo['max_ms'], ms)}
+
+def tiempos():
+    return st.session_state.get('tiempos_vista', {})
+
+# --- SELECTOR DE VISTA (SE CONSERVA EN LA URL) ---
+def seleccionar(vistas, key="vista_activa"):
+    """Muestra el menú principal y regresa el nombre de la vista elegida."""
+    nombres = list(vistas)
+    if key not in st.session_state:
+        desde_url = st.query_params.get(PARAMETRO_URL)
+        st.session_state[key] = desde_url if desde_url in vistas else nombres[0]
+    elegida = st.radio("MENÚ", nombres, horizontal=True, key=key, label_visibility="collapsed")
+    st.query_params[PARAMETRO_URL] = elegida
+    return elegida
+
+def ejecutar(vistas, key="vista_activa"):
+    """Router: importa (la primera vez) y llama solo al render de la vista activa.
+
+    `vistas` mapea etiqueta -> ruta del módulo, p. ej. "modules.dashboard".
+    """
+    ruta = vistas[seleccionar(vistas, key)]
+    if ruta not in sys.modules:
+        with instrumentacion.tramo(f"importar.{ruta}"):
+            importlib.import_module(ruta)
+    sys.modules[ruta].render()
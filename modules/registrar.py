@@ -1,37 +1,15 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date
-import sqlite3
-import os
+from modules import almacen, db, extraccion, importacion, lote, navegacion, reservas
 import time
-import pdfplumber
-import google.generativeai as genai
-import json
-import PyPDF2
-from io import BytesIO
+from io import BytesIO, StringIO
 
 # --- FUNCIONES TÉCNICAS (IA Y PDF) ---
-def obtener_config(clave):
-    try:
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT valor FROM configuracion WHERE clave=?", (clave,))
-        res = cursor.fetchone()
-        conn.close()
-        return res[0] if res else ""
-    except: return ""
-
-def extraer_texto_pdf(archivos):
-    texto_total = ""
-    for archivo in archivos:
-        try:
-            with pdfplumber.open(archivo) as pdf:
-                for pagina in pdf.pages:
-                    texto_total += (pagina.extract_text() or "") + "\n"
-        except: pass
-    return texto_total
+extraer_texto_pdf = extraccion.extraer_texto_pdf
 
 def unir_archivos_en_pdf(lista_archivos):
+    import PyPDF2
     merger = PyPDF2.PdfMerger()
     for archivo in lista_archivos:
         archivo.seek(0)
@@ -43,60 +21,27 @@ def unir_archivos_en_pdf(lista_archivos):
 
 def procesar_con_ia(texto):
     try:
-        api_key = st.secrets.get("GEMINI_API_KEY") or obtener_config("gemini_api_key")
+        api_key = st.secrets.get("GEMINI_API_KEY") or db.obtener_config("gemini_api_key")
         if not api_key: return None
-        genai.configure(api_key=api_key)
-        
-        # Selección dinámica de modelo para evitar Error 404
-        modelo_final = "models/gemini-1.5-flash"
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                if 'flash' in m.name:
-                    modelo_final = m.name
-                    break
-        
-        model = genai.GenerativeModel(modelo_final)
-        
-        # PROMPT MEJORADO PARA MÚLTIPLES PASAJEROS Y FECHAS
-        prompt = f"""
-            Extrae los datos de viaje del siguiente texto y entrégalos en un JSON estricto.
-
-            ### ESTRUCTURA JSON OBLIGATORIA:
-            {{
-            "pasajeros": ["Nombre completo 1", "Nombre completo 2"], 
-            "pnr": "Código de 6 caracteres",
-            "origen": "Ciudad origen",
-            "destino": "Ciudad destino",
-            "aerolinea": "Nombre aerolínea",
-            "fecha_salida": "YYYY-MM-DD",
-            "fecha_regreso": "YYYY-MM-DD",
-            "costo": 0.0,
-            "no_vuelo": "Número de vuelo",
-            "autoriza": "Persona que aprueba",
-            "motivo": "Razón del viaje"
-            }}
-
-            ### REGLAS DE ORO:
-            1. "pasajeros" DEBE ser una lista (array) de nombres, incluso si es solo una persona (ej: ["Juan Perez"]).
-            2. FECHAS: Identifica el año principal del documento (ej. 2026). Si el mes viene en palabras, conviértelo a número. Formato final: YYYY-MM-DD.
-            3. Si no encuentras una fecha de regreso clara o es vuelo "Sencillo", deja "fecha_regreso" como "".
-            4. El costo debe ser un número decimal, el valor total a pagar (busca en la Factura si existe).
-            5. Si hay varios archivos mezclados, únelos lógicamente usando el PNR como guía.
-
-            Texto a analizar:
-            {texto}
-            """
-        response = model.generate_content(prompt)
-        res_text = response.text.replace('```json', '').replace('```', '').strip()
-        datos = json.loads(res_text)
-        
-        # Si la IA envuelve el JSON en una lista, extraemos el primer elemento
-        if isinstance(datos, list) and len(datos) > 0: datos = datos[0]
-        return datos
+        return extraccion.extraer_datos(texto, api_key)
     except Exception as e:
         st.error(f"Error IA: {e}")
         return None
 
+def escanear_documentos(archivos):
+    """Texto + IA con caché por contenido: re-subir los mismos PDF no vuelve a llamar a Gemini."""
+    clave = extraccion.clave_documentos([a.getvalue() for a in archivos])
+    en_cache = extraccion.buscar_en_cache(clave)
+    if en_cache:
+        st.toast("⚡ Documentos ya procesados: datos recuperados de la caché.")
+        return en_cache['datos']
+    texto = extraer_texto_pdf(archivos)
+    datos = procesar_con_ia(texto)
+    if datos:
+        extraccion.guardar_en_cache(clave, texto, datos)
+    return datos
+
+@navegacion.vista("REGISTRO")
 def render():
     st.markdown("<h4 style='letter-spacing:3px; font-weight:300; color:#00d4ff;'>ENTRADA DE NUEVO VUELO</h4>", unsafe_allow_html=True)
     st.info("💡 **Tip de búsqueda:** Da clic en las cajas que tienen la lupa (🔍) y empieza a teclear para filtrar las opciones al instante.")
@@ -113,11 +58,12 @@ def render():
     with st.expander("🤖 ASISTENTE IA: ESCANEAR Y UNIFICAR DOCUMENTOS", expanded=True):
         c_ia1, c_ia2 = st.columns([3, 1])
         archivos_ia = c_ia1.file_uploader("Sube Confirmación, Factura y Correo (PDF)", type=['pdf'], accept_multiple_files=True, key=f"ia_files_{rk}")
+        stats_ia = extraccion.estadisticas_cache()
+        c_ia2.caption(f"Caché IA: {stats_ia['aciertos']} aciertos · {stats_ia['fallos']} fallos · {stats_ia['entradas']} docs")
         if c_ia2.button("🪄 PROCESAR IA", use_container_width=True):
             if archivos_ia:
                 with st.spinner("La IA está leyendo y procesando los documentos..."):
-                    texto = extraer_texto_pdf(archivos_ia)
-                    datos = procesar_con_ia(texto)
+                    datos = escanear_documentos(archivos_ia)
                     if datos:
                         # 1. Unir nombres si hay varios
                         nombres = datos.get('pasajeros', [])
@@ -153,6 +99,79 @@ def render():
                         time.sleep(0.5)
                         st.rerun()
 
+    # --- INGESTA POR LOTE (VARIOS PNR A LA VEZ) ---
+    with st.expander("📥 INGESTA POR LOTE: VARIAS CONFIRMACIONES A LA VEZ", expanded=False):
+        archivos_lote = st.file_uploader("Sube todas las confirmaciones y facturas del día (PDF)", type=['pdf'], accept_multiple_files=True, key=f"lote_files_{rk}")
+        if st.button("⚙️ PROCESAR LOTE", use_container_width=True, disabled=not archivos_lote, key=f"btn_lote_{rk}"):
+            api_key = st.secrets.get("GEMINI_API_KEY") or db.obtener_config("gemini_api_key")
+            if not api_key:
+                st.error("❌ Configura la API Key de Gemini para procesar el lote.")
+            else:
+                with st.spinner(f"Procesando {len(archivos_lote)} documentos en paralelo..."):
+                    usuario_lote = st.session_state.usuario['nombre'] if st.session_state.get('usuario') else "SISTEMA"
+                    documentos = [(a.name, a.getvalue()) for a in archivos_lote]
+                    filas, resultados, metricas = lote.procesar_lote(documentos, api_key, usuario_lote)
+                st.session_state['lote_propuestas'] = pd.DataFrame(filas)
+                st.session_state['lote_metricas'] = metricas
+                st.session_state['lote_errores'] = [r for r in resultados if r['error']]
+
+        if 'lote_propuestas' in st.session_state:
+            m = st.session_state['lote_metricas']
+            st.caption(f"{m['documentos']} documentos → {m['grupos']} PNR en {m['total_s']:.1f} s "
+                       f"({m['docs_por_minuto']:.0f} docs/min · {m['desde_cache']} desde caché · {m['errores']} errores)")
+            for r in st.session_state['lote_errores']:
+                st.warning(f"⚠️ {', '.join(r['archivos'])}: {r['error']}")
+
+            df_lote = st.session_state['lote_propuestas']
+            if not df_lote.empty:
+                st.markdown("<small>Revisa y corrige antes de guardar; desmarca las filas que no quieras registrar.</small>", unsafe_allow_html=True)
+                editado = st.data_editor(df_lote.assign(Incluir=True), hide_index=True, use_container_width=True, key=f"editor_lote_{rk}",
+                                         disabled=['Archivos', 'Usuario', 'Hora'])
+                aprobadas = editado[editado['Incluir']].drop(columns=['Incluir', 'Archivos'])
+                if st.button(f"💾 INSERTAR {len(aprobadas)} REGISTROS", type="primary", use_container_width=True, disabled=aprobadas.empty, key=f"btn_ins_lote_{rk}"):
+                    try:
+                        insertados = lote.insertar_filas(aprobadas.to_dict('records'))
+                    except reservas.ErrorReserva as e:
+                        st.error("❌ No se guardó ningún registro del lote:\n\n" + "\n".join(f"- {x}" for x in e.errores))
+                    else:
+                        for llave in ('lote_propuestas', 'lote_metricas', 'lote_errores'):
+                            del st.session_state[llave]
+                        st.toast(f"✅ {insertados} vuelo(s) del lote registrados en una sola transacción.", icon="✅")
+                        st.rerun()
+
+    # --- IMPORTACIÓN DE HISTÓRICOS (CSV / EXCEL) ---
+    with st.expander("📂 IMPORTAR HISTÓRICO (CSV / EXCEL)", expanded=False):
+        archivo_hist = st.file_uploader("Archivo con columnas de vuelos (Pasajero, PNR, Fecha, Costo, Estado...)", type=['csv', 'xlsx'], key=f"hist_file_{rk}")
+        c_h1, c_h2 = st.columns([1, 3])
+        simular = c_h1.checkbox("Solo validar", key=f"hist_sim_{rk}")
+        if c_h2.button("⬆️ IMPORTAR ARCHIVO", use_container_width=True, disabled=archivo_hist is None, key=f"btn_hist_{rk}"):
+            barra = st.progress(0.0, text="Importando...")
+            total_aprox = max(1, archivo_hist.size)
+            def avanzar(p):
+                # Avance aproximado por bytes leídos (~tamaño promedio de fila)
+                barra.progress(min(1.0, p['leidas'] * 120 / total_aprox), text=f"{p['leidas']:,} filas · {p['filas_por_s']:,.0f} filas/s")
+            rechazos = StringIO()
+            try:
+                usuario_hist = st.session_state.usuario['nombre'] if st.session_state.get('usuario') else "IMPORTACION"
+                m_hist = importacion.importar(archivo_hist, archivo_hist.name, rechazos, usuario=usuario_hist, simular=simular, progreso=avanzar)
+            except ValueError as e:
+                barra.empty()
+                st.error(f"❌ {e}")
+            else:
+                barra.progress(1.0, text="Listo")
+                st.session_state['hist_resultado'] = (m_hist, rechazos.getvalue().encode('utf-8-sig'), simular)
+
+        if 'hist_resultado' in st.session_state:
+            m_hist, rechazos_csv, fue_simulacion = st.session_state['hist_resultado']
+            st.caption(f"{m_hist['leidas']:,} filas leídas · {m_hist['insertadas']:,} {'válidas (sin guardar)' if fue_simulacion else 'insertadas'} · "
+                       f"{m_hist['duplicadas']:,} duplicadas · {m_hist['rechazadas']:,} rechazadas · {m_hist['filas_por_s']:,.0f} filas/s")
+            if m_hist['columnas_ignoradas']:
+                st.caption(f"Columnas ignoradas: {', '.join(map(str, m_hist['columnas_ignoradas']))}")
+            if m_hist.get('adjuntos') or m_hist.get('adjuntos_faltantes'):
+                st.caption(f"Adjuntos: {m_hist['adjuntos']:,} pasados al almacén · {m_hist['adjuntos_faltantes']:,} no encontrados en disco")
+            if m_hist['rechazadas'] or m_hist['duplicadas']:
+                st.download_button("⚠️ DESCARGAR FILAS RECHAZADAS", rechazos_csv, file_name="importacion_rechazos.csv", mime="text/csv", key=f"dl_hist_{rk}")
+
     # --- PREVENCIÓN DE ERRORES DE COLUMNAS ---
     if 'Motivo' not in df.columns: df['Motivo'] = 'NO ESPECIFICADO'
     if 'Autoriza' not in df.columns: df['Autoriza'] = 'PENDIENTE'
@@ -163,12 +182,13 @@ def render():
     aero_conocidas = [str(x).upper().strip() for x in df['Aerolinea'].dropna().unique() if str(x).strip() and x != 'N/A']
 
     # --- SISTEMA DE CANJE ---
-    df_abiertos = df[df['Estado'] == 'Abierto (Disponible)'] if 'Estado' in df.columns else pd.DataFrame()
     id_abierto_seleccionado = None
     pnr_ligado = ""
     with st.container(border=True):
         usar_saldo = st.toggle("🎟️ REUTILIZAR BOLETO ABIERTO (CANJE)", help="Vincula este nuevo vuelo a un saldo a favor anterior.", key=f"tgl_{rk}")
         if usar_saldo:
+            # Solo se consulta con el canje activo: el formulario se re-ejecuta con cada tecla
+            df_abiertos = almacen.consultar_vuelos(estados=['Abierto (Disponible)'])
             if not df_abiertos.empty:
                 opciones = df_abiertos.apply(lambda x: f"ID: {x['id']} | PNR: {x['PNR']} | {x['Pasajero']} | ${x.get('Costo', 0)}", axis=1).tolist()
                 seleccion = st.selectbox("Selecciona el boleto a canjear:", opciones, key=f"sel_canje_{rk}")
@@ -226,55 +246,32 @@ def render():
             st.error("❌ Pasajero(s) y PNR son obligatorios.")
             return
 
-        # Lógica de Expediente Unificado
-        ruta_soporte = ""
+        # Lógica de Expediente Unificado: los archivos van al almacén de adjuntos junto con el alta
+        archivos = []
         if archivos_ia:
-            if not os.path.exists("attachments"): os.makedirs("attachments")
-            pdf_unificado = unir_archivos_en_pdf(archivos_ia)
             nombre_exp = f"EXPEDIENTE_{pnr}_{datetime.now().strftime('%H%M%S')}.pdf"
-            ruta_soporte = os.path.join("attachments", nombre_exp)
-            with open(ruta_soporte, "wb") as f: f.write(pdf_unificado)
+            archivos.append((nombre_exp, unir_archivos_en_pdf(archivos_ia)))
         elif archivos_manuales:
-            rutas = []
-            if not os.path.exists("attachments"): os.makedirs("attachments")
-            for a in archivos_manuales:
-                r = os.path.join("attachments", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{a.name}")
-                with open(r, "wb") as f: f.write(a.getbuffer())
-                rutas.append(r)
-            ruta_soporte = "|".join(rutas)
+            archivos = [(a.name, a) for a in archivos_manuales]
 
         try:
-            conn = sqlite3.connect('logistics_v2.db')
-            cursor = conn.cursor()
-            
-            # --- SOLUCIÓN PROBLEMA 2: MULTIPLES PASAJEROS ---
-            # Separamos los nombres por coma y limpiamos espacios vacíos
-            lista_pasajeros = [p.strip() for p in pax_input.split(",") if p.strip()]
-            
-            # Dividimos el costo total entre la cantidad de pasajeros
-            costo_individual = cos / len(lista_pasajeros) if len(lista_pasajeros) > 0 else 0
-            
-            # Nombre de usuario fallback por si 'usuario' no está en session_state (evita error 500)
-            nombre_usuario = st.session_state.usuario['nombre'] if 'usuario' in st.session_state else "SISTEMA"
+            # Un registro por pasajero (costo repartido); todo el grupo y el canje van en una sola transacción
+            nombre_usuario = st.session_state.usuario['nombre'] if st.session_state.get('usuario') else "SISTEMA"
+            filas = reservas.filas_grupo(
+                pax_input.split(","), cos,
+                Origen=ori.strip(), Destino=des.strip(), Estado=est, PNR=pnr.strip(), Fecha=str(fec),
+                Fecha_Regreso=str(fec_reg) if fec_reg else "", Pais=pais, Equipaje=equ,
+                Usuario=nombre_usuario, Hora=datetime.now().strftime("%H:%M"), Telefono=tel.strip(), Aerolinea=aer.strip(),
+                No_Vuelo=nvv.strip(), Motivo=mot.strip() or "NO ESPECIFICADO", Autoriza=aut.strip() or "PENDIENTE",
+                Boleto_Ligado=pnr_ligado, Extra=ext)
+            ids = reservas.registrar_reserva(filas, id_canje=id_abierto_seleccionado if usar_saldo else None,
+                                             archivos=archivos)
 
-            # Guardamos un registro por CADA pasajero
-            for pax in lista_pasajeros:
-                cursor.execute('''
-                    INSERT INTO vuelos (Pasajero, Origen, Destino, Estado, Costo, PNR, Fecha, Fecha_Regreso, Pais, Soporte, Usuario, Hora, Telefono, Aerolinea, No_Vuelo, Motivo, Autoriza, Boleto_Ligado, Extra)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (pax, ori.strip(), des.strip(), est, costo_individual, pnr.strip(), str(fec), str(fec_reg) if fec_reg else "", pais, ruta_soporte, nombre_usuario, datetime.now().strftime("%H:%M"), tel.strip(), aer.strip(), nvv.strip(), mot.strip() or "NO ESPECIFICADO", aut.strip() or "PENDIENTE", pnr_ligado, ext))
-            
-            # Actualizamos estado si se usó un saldo a favor
-            if usar_saldo and id_abierto_seleccionado:
-                cursor.execute("UPDATE vuelos SET Estado='Canjeado' WHERE id=?", (id_abierto_seleccionado,))
-            
-            conn.commit()
-            st.session_state.db_vuelos = pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL", conn)
-            conn.close()
-            
-            st.toast(f"✅ {len(lista_pasajeros)} Vuelo(s) del PNR {pnr} registrado(s) correctamente.", icon="✅")
+            st.toast(f"✅ {len(ids)} Vuelo(s) del PNR {pnr} registrado(s) correctamente.", icon="✅")
             st.session_state['reg_key'] += 1 
             time.sleep(1) 
             st.rerun()
+        except reservas.ErrorReserva as e:
+            st.error("❌ No se guardó el registro:\n\n" + "\n".join(f"- {x}" for x in e.errores))
         except Exception as e: 
             st.error(f"Error DB: {e}")
\ No newline at end of file
@@ -4,40 +4,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import date, datetime
 from fpdf import FPDF
-import io
-import os
-import tempfile
-import sqlite3
-import matplotlib.pyplot as plt
-
-# --- INTENTAMOS IMPORTAR LA LIBRERÍA DE IA ---
-try:
-    import google.generativeai as genai
-    IA_DISPONIBLE = True
-except ImportError:
-    IA_DISPONIBLE = False
+import time
+import hashlib
+from modules import almacen, db, exportacion, ia, instrumentacion, navegacion, rollups
+from modules.cache import CacheLRU
 
 # --- FUNCIONES DE PERSISTENCIA EN BASE DE DATOS ---
-def obtener_config(clave):
-    try:
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
-        cursor.execute("SELECT valor FROM configuracion WHERE clave=?", (clave,))
-        res = cursor.fetchone()
-        conn.close()
-        return res[0] if res else ""
-    except:
-        return ""
-
-def guardar_config(clave, valor):
-    try:
-        conn = sqlite3.connect('logistics_v2.db')
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO configuracion (clave, valor) VALUES (?, ?)", (clave, valor))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        pass
+obtener_config = db.obtener_config
+guardar_config = db.guardar_config
 
 # --- FUNCIÓN SANITIZADORA PARA PDF ---
 def limpiar_texto_pdf(texto):
@@ -65,28 +39,20 @@ class ReporteEjecutivo(FPDF):
         self.set_text_color(120, 120, 120)
         self.cell(0, 10, f'Generado el {date.today().strftime("%d/%m/%Y")} | Documento Confidencial | Pagina {self.page_no()}', 0, 0, 'C')
 
+    def imagen_raster(self, raster, x, y, w):
+        # fpdf 1.7 solo sabe leer imágenes desde una ruta; registramos el raster
+        # RGB directamente como XObject para no pasar por archivos temporales.
+        if raster.nombre not in self.images:
+            self.images[raster.nombre] = {'i': len(self.images) + 1, 'w': raster.ancho, 'h': raster.alto,
+                                          'cs': 'DeviceRGB', 'bpc': 8, 'f': 'FlateDecode', 'data': raster.datos}
+        self.image(raster.nombre, x=x, y=y, w=w)
+
 # --- MOTOR DE INTELIGENCIA ARTIFICIAL ---
 def obtener_analisis_ia(df, m_total, m_recuperar, riesgo, ahorro, api_key):
-    if not IA_DISPONIBLE or not api_key:
+    if not ia.IA_DISPONIBLE or not api_key:
         return f"MODO OFFLINE: Configura tu API Key. El riesgo es del {riesgo:.1f}%. Has recuperado ${ahorro:,.2f} MX."
     
     try:
-        genai.configure(api_key=api_key)
-        modelo_elegido = None
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                if 'flash' in m.name or 'pro' in m.name:
-                    modelo_elegido = m.name
-                    break
-                    
-        if not modelo_elegido:
-            for m in genai.list_models():
-                if 'generateContent' in m.supported_generation_methods:
-                    modelo_elegido = m.name
-                    break
-
-        model = genai.GenerativeModel(modelo_elegido)
-        
         top_destinos = df['Destino'].value_counts().head(3).to_dict()
         top_pax_gasto = df.groupby('Pasajero')['Costo'].sum().nlargest(3).to_dict()
         top_aero = df['Aerolinea'].value_counts().head(3).to_dict()
@@ -105,41 +71,20 @@ def obtener_analisis_ia(df, m_total, m_recuperar, riesgo, ahorro, api_key):
         Párrafo 2: Dos recomendaciones estrictas para mitigar el riesgo de los boletos abiertos y negociar con aerolíneas.
         No uses markdown, asteriscos ni emojis. Texto plano y profesional.
         """
-        respuesta = model.generate_content(prompt)
-        return respuesta.text.replace('*', '').strip()
+        respuesta = ia.generar(api_key, prompt, preferencias=('flash', 'pro'))
+        return respuesta.replace('*', '').strip()
     except Exception as e:
         return f"Error conectando a la IA: {e}"
 
-# --- GENERADOR DE GRÁFICOS TEMPORALES PARA EL PDF ---
-def generar_graficos_temporales(df):
-    fd_pie1, ruta_pie_estado = tempfile.mkstemp(suffix=".png")
-    fd_pie2, ruta_pie_aero = tempfile.mkstemp(suffix=".png")
-    os.close(fd_pie1)
-    os.close(fd_pie2)
-    
-    # Gráfico 1: Estado de Cartera
-    plt.figure(figsize=(6, 4), dpi=150)
-    datos_estado = df.groupby('Estado')['Costo'].sum()
-    colores_est = {'Activo':'#00aeef', 'Abierto (Disponible)':'#FFCC00', 'Realizado':'#4CD964', 'Cancelado':'#FF3B30', 'Canjeado':'#888888'}
-    plt.pie(datos_estado, labels=datos_estado.index, autopct='%1.1f%%', startangle=140, colors=[colores_est.get(x, '#999') for x in datos_estado.index])
-    plt.title("SALUD DE CARTERA", fontweight='bold')
-    plt.savefig(ruta_pie_estado)
-    plt.close()
-
-    # Gráfico 2: Top 5 Aerolíneas
-    plt.figure(figsize=(6, 4), dpi=150)
-    datos_aero = df.groupby('Aerolinea')['Costo'].sum().sort_values(ascending=False).head(5)
-    plt.bar(datos_aero.index, datos_aero.values, color='#00d4ff')
-    plt.title("TOP 5 PROVEEDORES (AEROLINEAS)", fontweight='bold')
-    plt.xticks(rotation=15, fontsize=8)
-    plt.tight_layout()
-    plt.savefig(ruta_pie_aero)
-    plt.close()
-    
-    return ruta_pie_estado, ruta_pie_aero
+# --- GRÁFICOS EN MEMORIA PARA EL PDF ---
+def generar_graficos_pdf(df):
+    from modules import graficos  # matplotlib (~0.5 s de importación) solo cuando se arma un PDF
+    return graficos.grafico_estado_cartera(df), graficos.grafico_top_aerolineas(df)
 
 # --- CREADOR DE PDF DIRECTIVO ---
-def generar_pdf_pro(df, m_total, m_recuperar, riesgo, ahorro, texto_ia):
+def generar_pdf_pro(df, m_total, m_recuperar, riesgo, ahorro, texto_ia, tiempos=None):
+    tiempos = {} if tiempos is None else tiempos
+    t_inicio = time.perf_counter()
     pdf = ReporteEjecutivo()
     pdf.add_page()
     
@@ -183,6 +128,7 @@ def generar_pdf_pro(df, m_total, m_recuperar, riesgo, ahorro, texto_ia):
     pdf.ln(5)
 
     # SECCIÓN 3: GRÁFICOS
+    t_etapa = time.perf_counter()
     pdf.set_fill_color(240, 240, 240)
     pdf.set_font('Arial', 'B', 12)
     pdf.set_text_color(30, 30, 30)
@@ -190,17 +136,18 @@ def generar_pdf_pro(df, m_total, m_recuperar, riesgo, ahorro, texto_ia):
     pdf.ln(5)
 
     try:
-        r1, r2 = generar_graficos_temporales(df)
+        r1, r2 = generar_graficos_pdf(df)
         y_graficos = pdf.get_y()
-        pdf.image(r1, x=10, y=y_graficos, w=90)
-        pdf.image(r2, x=110, y=y_graficos, w=90)
+        pdf.imagen_raster(r1, x=10, y=y_graficos, w=90)
+        pdf.imagen_raster(r2, x=110, y=y_graficos, w=90)
         pdf.set_y(y_graficos + 65)
-        os.remove(r1)
-        os.remove(r2)
     except Exception as e:
         pdf.cell(0, 10, f"Error generando graficos visuales: {e}", 0, 1)
 
+    tiempos['graficos_ms'] = (time.perf_counter() - t_etapa) * 1000
+
     # SECCIÓN 4: AUDITORÍA (NUEVA TABLA CON NO. VUELO)
+    t_etapa = time.perf_counter()
     pdf.ln(5)
     if pdf.get_y() > 200: 
         pdf.add_page()
@@ -243,14 +190,41 @@ def generar_pdf_pro(df, m_total, m_recuperar, riesgo, ahorro, texto_ia):
         pdf.cell(anchos[8], 7, f"${f.get('Costo',0):,.2f}", 1, 0, 'R', True)
         pdf.ln()
 
-    return pdf.output(dest='S').encode('latin-1')
+    tiempos['tabla_ms'] = (time.perf_counter() - t_etapa) * 1000
 
-# --- EXPORTADOR EXCEL ---
-def generar_excel_bytes(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Data_Intelligence')
-    return output.getvalue()
+    t_etapa = time.perf_counter()
+    salida = pdf.output(dest='S').encode('latin-1')
+    tiempos['serializacion_ms'] = (time.perf_counter() - t_etapa) * 1000
+    tiempos['total_ms'] = (time.perf_counter() - t_inicio) * 1000
+    return salida
+
+# --- PDF BAJO DEMANDA CON MEMOIZACIÓN ---
+# Reportes ya construidos por (filtros, texto IA, versión de datos), compartidos entre sesiones
+_cache_pdf = CacheLRU(max_entradas=8, max_bytes=32 * 1024 * 1024)
+_ultimos_tiempos_pdf = {}
+
+def generar_pdf_diferido(df, m_total, m_recuperar, riesgo, ahorro, texto_ia, filtros):
+    """Callable para `st.download_button`: el PDF solo se arma al pedir la descarga.
+
+    `df` puede ser el DataFrame o la función que carga los boletos filtrados.
+    """
+    clave = (filtros, hashlib.sha256(texto_ia.encode('utf-8')).hexdigest(), almacen.version())
+
+    def construir():
+        tiempos = {}
+        with instrumentacion.tramo("reporte.pdf") as t:
+            boletos = df() if callable(df) else df
+            t.filas = len(boletos)
+            salida = generar_pdf_pro(boletos, m_total, m_recuperar, riesgo, ahorro, texto_ia, tiempos)
+        _ultimos_tiempos_pdf.clear()
+        _ultimos_tiempos_pdf.update(tiempos)
+        return salida
+
+    return lambda: _cache_pdf.obtener_o_generar(clave, construir)
+
+# --- EXPORTADOR EXCEL (DIFERIDO HASTA EL CLIC) ---
+def generar_excel_bytes(df, filtros):
+    return exportacion.excel_diferido(df, 'Data_Intelligence', filtros)
 
 # ==========================================
 # VISTA PRINCIPAL (STREAMLIT RENDER)
@@ -265,47 +239,53 @@ def render():
         if nueva_api != api_actual:
             guardar_config("gemini_api_key", nueva_api)
             st.success("API Key vinculada al sistema.")
+        m_ia = ia.metricas()
+        if m_ia['generaciones']:
+            st.caption(f"Descubrimiento de modelo: {m_ia['descubrimientos']}x · {m_ia['descubrimiento_prom_ms']:.0f} ms prom. // "
+                       f"Generación: {m_ia['generaciones']}x · {m_ia['generacion_prom_ms']:.0f} ms prom. // Caché: {m_ia['aciertos_cache']} aciertos")
 
-    df_f = st.session_state.db_vuelos.copy()
-    
-    # --- PREVENCIÓN DE ERRORES DE COLUMNAS ---
-    if 'No_Vuelo' not in df_f.columns:
-        df_f['No_Vuelo'] = 'S/N'
-    if 'Aerolinea' not in df_f.columns:
-        df_f['Aerolinea'] = 'N/A'
-    if 'Boleto_Ligado' not in df_f.columns:
-        df_f['Boleto_Ligado'] = ''
+    _tablero(nueva_api)
 
+# La barra lateral queda fuera: un fragmento solo puede escribir en su propio contenedor
+@navegacion.vista("INTELIGENCIA")
+def _tablero(nueva_api):
     # --- FILTROS GLOBALES ---
     with st.container(border=True):
         f1, f2, f3, f4 = st.columns(4)
         inicio = f1.date_input("DESDE", date(2024, 1, 1))
         fin = f2.date_input("HASTA", date(2026, 12, 31))
         
-        df_f['Fecha_DT'] = pd.to_datetime(df_f['Fecha']).dt.date
-        df_f = df_f[(df_f['Fecha_DT'] >= inicio) & (df_f['Fecha_DT'] <= fin)]
+        # Gráficos y KPIs salen de los resúmenes (diario y día x pasajero), no de los boletos individuales
+        # (incluye el archivo histórico cuando DESDE cae antes del último día archivado)
+        df_r = rollups.consultar(inicio, fin)
+        df_p = rollups.consultar_pasajeros(inicio, fin)
         
-        pax_lista = df_f['Pasajero'].unique().tolist()
-        aero_lista = df_f['Aerolinea'].unique().tolist()
+        pax_lista = df_p['Pasajero'].dropna().unique().tolist()
+        aero_lista = df_r['Aerolinea'].dropna().unique().tolist()
         
         filtro_pax = f3.multiselect("PASAJEROS", pax_lista)
         filtro_aero = f4.multiselect("AEROLÍNEAS", aero_lista)
         
-        if filtro_pax: 
-            df_f = df_f[df_f['Pasajero'].isin(filtro_pax)]
-        if filtro_aero: 
-            df_f = df_f[df_f['Aerolinea'].isin(filtro_aero)]
+        # Cada resumen solo tiene una de las dos dimensiones: con filtros se piden de nuevo
+        if filtro_pax or filtro_aero:
+            df_r = rollups.consultar(inicio, fin, pasajeros=filtro_pax or None, aerolineas=filtro_aero or None)
+            df_p = rollups.consultar_pasajeros(inicio, fin, pasajeros=filtro_pax or None, aerolineas=filtro_aero or None)
+
+    # Los boletos individuales solo se leen para IA, PDF y Excel, al pedirlos
+    def cargar_boletos():
+        return almacen.consultar_vuelos(inicio, fin, pasajeros=filtro_pax or None, aerolineas=filtro_aero or None,
+                                        incluir_archivo=True)
 
-    if df_f.empty:
+    if df_r.empty:
         st.warning("No hay registros que coincidan con los filtros de búsqueda.")
         return
 
     # --- CÁLCULO DE MACROMÉTRICAS ---
-    m_total = df_f['Costo'].sum()
-    abiertos = df_f[df_f['Estado'] == 'Abierto (Disponible)']
-    m_riesgo = abiertos['Costo'].sum()
+    por_estado = df_r.groupby('Estado')['Costo'].sum()
+    m_total = df_r['Costo'].sum()
+    m_riesgo = por_estado.get('Abierto (Disponible)', 0.0)
     riesgo_p = (m_riesgo / m_total * 100) if m_total > 0 else 0
-    ahorro = df_f[df_f['Estado'] == 'Canjeado']['Costo'].sum()
+    ahorro = por_estado.get('Canjeado', 0.0)
 
     # --- KPI BANNER ---
     st.markdown("<br>", unsafe_allow_html=True)
@@ -313,8 +293,8 @@ def render():
     k1.metric("GASTO ACUMULADO", f"${m_total:,.0f}")
     k2.metric("CAPITAL EN RIESGO", f"${m_riesgo:,.0f}", f"{riesgo_p:.1f}%", delta_color="inverse")
     k3.metric("EFICIENCIA (AHORRO)", f"${ahorro:,.0f}", "Canjes Logrados", delta_color="normal")
-    k4.metric("TOTAL BOLETOS", len(df_f))
-    k5.metric("AEROLÍNEAS ACTIVAS", df_f['Aerolinea'].nunique())
+    k4.metric("TOTAL BOLETOS", int(df_r['Vuelos'].sum()))
+    k5.metric("AEROLÍNEAS ACTIVAS", df_r['Aerolinea'].nunique())
 
     # --- BOTONERA DE ACCIÓN ---
     st.markdown("<hr style='margin: 10px 0; border-color: #333;'>", unsafe_allow_html=True)
@@ -322,14 +302,18 @@ def render():
     
     if b1.button("🧠 EJECUTAR DIAGNÓSTICO IA", use_container_width=True, type="primary"):
         with st.spinner("Motor neuronal analizando tendencias..."):
-            st.session_state['texto_ia'] = obtener_analisis_ia(df_f, m_total, m_riesgo, riesgo_p, ahorro, nueva_api)
+            st.session_state['texto_ia'] = obtener_analisis_ia(cargar_boletos(), m_total, m_riesgo, riesgo_p, ahorro, nueva_api)
 
     texto_ia = st.session_state.get('texto_ia', "El análisis predictivo no ha sido generado.")
     
-    pdf_data = generar_pdf_pro(df_f, m_total, m_riesgo, riesgo_p, ahorro, texto_ia)
+    filtros = (inicio, fin, tuple(filtro_pax), tuple(filtro_aero))
+    pdf_data = generar_pdf_diferido(cargar_boletos, m_total, m_riesgo, riesgo_p, ahorro, texto_ia, filtros)
     b2.download_button("📄 EXPORTAR PDF DIRECTIVO", data=pdf_data, file_name=f"BI_Report_{date.today()}.pdf", use_container_width=True)
+    if _ultimos_tiempos_pdf:
+        t = _ultimos_tiempos_pdf
+        b2.caption(f"Último PDF: gráficos {t['graficos_ms']:.0f} ms · tabla {t['tabla_ms']:.0f} ms · serialización {t['serializacion_ms']:.0f} ms")
     
-    excel_data = generar_excel_bytes(df_f)
+    excel_data = generar_excel_bytes(cargar_boletos, filtros)
     b3.download_button("📊 EXPORTAR RAW DATA (EXCEL)", data=excel_data, file_name=f"RawData_{date.today()}.xlsx", use_container_width=True)
 
     if st.session_state.get('texto_ia'):
@@ -346,8 +330,7 @@ def render():
     st.markdown("<br><h4 style='color:#777; font-weight:300;'>VISUALIZACIÓN DE DATOS</h4>", unsafe_allow_html=True)
 
     # FILA 1: Timeline a lo ancho completo
-    df_f['Mes_Anio'] = pd.to_datetime(df_f['Fecha']).dt.to_period('M').astype(str)
-    df_time = df_f.groupby('Mes_Anio')['Costo'].sum().reset_index()
+    df_time = df_r.groupby(df_r['Dia'].str[:7].rename('Mes_Anio'))['Costo'].sum().reset_index()
     fig_time = px.area(df_time, x='Mes_Anio', y='Costo', title="TENDENCIA DE GASTO EN EL TIEMPO", template="plotly_dark", color_discrete_sequence=['#00d4ff'])
     fig_time.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=350)
     st.plotly_chart(fig_time, use_container_width=True)
@@ -358,14 +341,14 @@ def render():
     
     with c_p1:
         # Top 10 Pasajeros por Gasto
-        df_pax_gasto = df_f.groupby('Pasajero')['Costo'].sum().sort_values(ascending=True).tail(10).reset_index()
+        df_pax_gasto = df_p.groupby('Pasajero')['Costo'].sum().sort_values(ascending=True).tail(10).reset_index()
         fig_pax_gasto = px.bar(df_pax_gasto, x='Costo', y='Pasajero', orientation='h', title="TOP 10 VIAJEROS (MAYOR INVERSIÓN MX)", template="plotly_dark", color='Costo', color_continuous_scale='Blues')
         fig_pax_gasto.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', coloraxis_showscale=False, height=350)
         st.plotly_chart(fig_pax_gasto, use_container_width=True)
 
     with c_p2:
         # Top 10 Pasajeros por Cantidad de Vuelos
-        df_pax_vol = df_f.groupby('Pasajero').size().reset_index(name='Vuelos').sort_values(by='Vuelos', ascending=True).tail(10)
+        df_pax_vol = df_p.groupby('Pasajero')['Vuelos'].sum().reset_index().sort_values(by='Vuelos', ascending=True).tail(10)
         fig_pax_vol = px.bar(df_pax_vol, x='Vuelos', y='Pasajero', orientation='h', title="TOP 10 VIAJEROS (MAYOR CANTIDAD DE VUELOS)", template="plotly_dark", color='Vuelos', color_continuous_scale='Purples')
         fig_pax_vol.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', coloraxis_showscale=False, height=350)
         st.plotly_chart(fig_pax_vol, use_container_width=True)
@@ -376,14 +359,14 @@ def render():
     
     with c_g3:
         # Frecuencia de Vuelos por Destino
-        df_dest = df_f.groupby('Destino').agg(Vuelos=('id', 'count'), Costo_Total=('Costo', 'sum')).reset_index().sort_values('Vuelos', ascending=False).head(15)
+        df_dest = df_r.groupby('Destino').agg(Vuelos=('Vuelos', 'sum'), Costo_Total=('Costo', 'sum')).reset_index().sort_values('Vuelos', ascending=False).head(15)
         fig_dest = px.bar(df_dest, x='Destino', y='Vuelos', text='Vuelos', hover_data=['Costo_Total'], title="VOLUMEN DE VUELOS POR DESTINO", template="plotly_dark", color='Costo_Total', color_continuous_scale='Teal')
         fig_dest.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
         st.plotly_chart(fig_dest, use_container_width=True)
         
     with c_g4:
         # Pastel de Estados
-        fig_est = px.pie(df_f, names="Estado", values="Costo", hole=0.7, title="SALUD DE CARTERA",
+        fig_est = px.pie(por_estado.reset_index(), names="Estado", values="Costo", hole=0.7, title="SALUD DE CARTERA",
                          color_discrete_map={"Abierto (Disponible)":"#FFCC00", "Activo":"#00aeef", "Realizado":"#4CD964", "Cancelado":"#FF3B30", "Canjeado":"#888888"}, template="plotly_dark")
         fig_est.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', showlegend=False)
         fig_est.update_traces(textposition='inside', textinfo='percent+label')
@@ -391,7 +374,7 @@ def render():
         
     with c_g5:
         # Pastel de Aerolíneas
-        fig_aero = px.pie(df_f, names="Aerolinea", values="Costo", hole=0.4, title="MARKET SHARE (AEROLÍNEAS)", template="plotly_dark")
+        fig_aero = px.pie(df_r.groupby('Aerolinea')['Costo'].sum().reset_index(), names="Aerolinea", values="Costo", hole=0.4, title="MARKET SHARE (AEROLÍNEAS)", template="plotly_dark")
         fig_aero.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', showlegend=False)
         fig_aero.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig_aero, use_container_width=True)
@@ -404,16 +387,17 @@ def render():
     
     with t1:
         st.markdown("<b style='color:#00d4ff'>📋 MATRIZ DE RUTAS OPERADAS</b>", unsafe_allow_html=True)
-        st.caption("Frecuencia y gasto agrupado por ruta y número de vuelo.")
-        df_rutas = df_f.groupby(['Aerolinea', 'No_Vuelo', 'Origen', 'Destino']).agg(
-            Viajes=('id', 'count'), Inversion=('Costo', 'sum')
+        st.caption("Frecuencia y gasto agrupado por aerolínea y ruta.")
+        df_rutas = df_r.groupby(['Aerolinea', 'Origen', 'Destino']).agg(
+            Viajes=('Vuelos', 'sum'), Inversion=('Costo', 'sum')
         ).reset_index().sort_values(by='Inversion', ascending=False)
         st.dataframe(df_rutas, use_container_width=True, hide_index=True, height=250)
         
     with t2:
         st.markdown("<b style='color:#4CD964'>🔄 TRAZABILIDAD DE CANJES (AHORROS)</b>", unsafe_allow_html=True)
         st.caption("Registro de nuevos PNR generados reciclando boletos viejos.")
-        df_canjes_realizados = df_f[df_f['Boleto_Ligado'].astype(str).str.strip() != '']
+        df_canjes_realizados = almacen.consultar_canjes(inicio, fin, pasajeros=filtro_pax or None, aerolineas=filtro_aero or None,
+                                                        incluir_archivo=True)
         if not df_canjes_realizados.empty:
             tabla_canjes = df_canjes_realizados[['Pasajero', 'PNR', 'Destino', 'Boleto_Ligado', 'Costo']].copy()
             tabla_canjes.columns = ['Pasajero', 'PNR NUEVO', 'Destino', 'PNR RECICLADO', 'Extra Pagado']
@@ -0,0 +1,105 @@
+"""Alta masiva de reservas: valida todo el grupo y lo inserta en una sola transacción."""
+import math
+from datetime import date, datetime
+from modules import adjuntos, almacen, db
+
+COLUMNAS = ['Pasajero', 'Origen', 'Destino', 'Estado', 'Costo', 'PNR', 'Fecha', 'Fecha_Regreso', 'Pais', 'Equipaje',
+            'Soporte', 'Usuario', 'Hora', 'Telefono', 'Aerolinea', 'No_Vuelo', 'Motivo', 'Autoriza', 'Boleto_Ligado', 'Extra']
+ESTADO_CANJEABLE = 'Abierto (Disponible)'
+
+_SQL_INSERT = f"INSERT INTO vuelos ({', '.join(COLUMNAS)}) VALUES ({', '.join('?' * len(COLUMNAS))})"
+
+
+class ErrorReserva(ValueError):
+    """La reserva no se guardó; `errores` trae un mensaje por problema encontrado."""
+
+    def __init__(self, errores):
+        self.errores = list(errores)
+        super().__init__("; ".join(self.errores))
+
+
+# --- ARMADO Y VALIDACIÓN ---
+def filas_grupo(pasajeros, costo_total, **campos):
+    """Una fila por pasajero con los campos comunes del PNR; el costo total se reparte parejo."""
+    nombres = [str(p).upper().strip() for p in pasajeros if str(p).strip()]
+    costo_individual = costo_total / len(nombres) if nombres else 0.0
+    return [dict(campos, Pasajero=nombre, Costo=costo_individual) for nombre in nombres]
+
+def _fecha_valida(valor):
+    if isinstance(valor, (date, datetime)):
+        return True
+    try:
+        datetime.fromisoformat(str(valor))
+        return True
+    except ValueError:
+        return False
+
+def validar(filas):
+    """Regresa la lista de errores del grupo completo (vacía si todo está bien)."""
+    if not filas:
+        return ["No hay pasajeros que registrar."]
+    errores = []
+    vistos = set()
+    for n, fila in enumerate(filas, start=1):
+        pasajero = str(fila.get('Pasajero') or '').strip()
+        etiqueta = f"Fila {n} ({pasajero or 'sin nombre'})"
+        if not pasajero:
+            errores.append(f"{etiqueta}: falta el nombre del pasajero.")
+        if not str(fila.get('PNR') or '').strip():
+            errores.append(f"{etiqueta}: falta el PNR.")
+        try:
+            costo = float(fila.get('Costo') or 0.0)
+            if not math.isfinite(costo) or costo < 0:
+                errores.append(f"{etiqueta}: costo inválido ({fila.get('Costo')}).")
+        except (TypeError, ValueError):
+            errores.append(f"{etiqueta}: costo inválido ({fila.get('Costo')}).")
+        if fila.get('Fecha') and not _fecha_valida(fila['Fecha']):
+            errores.append(f"{etiqueta}: fecha de salida inválida ({fila['Fecha']}).")
+        llave = (pasajero.upper(), str(fila.get('PNR') or '').upper().strip(), str(fila.get('Fecha') or ''))
+        if pasajero and llave in vistos:
+            errores.append(f"{etiqueta}: pasajero repetido en el mismo PNR y fecha.")
+        vistos.add(llave)
+    return errores
+
+def _valores(fila):
+    valores = []
+    for columna in COLUMNAS:
+        valor = fila.get(columna, '')
+        if columna == 'Costo':
+            valor = float(valor or 0.0)
+        elif isinstance(valor, (date, datetime)):
+            valor = valor.isoformat()
+        elif valor is None:
+            valor = ''
+        valores.append(valor)
+    return tuple(valores)
+
+# --- ALTA EN UNA SOLA TRANSACCIÓN ---
+def registrar_reserva(filas, id_canje=None, archivos=(), ruta_db=db.DB_PATH):
+    """Valida e inserta todas las filas con `executemany` y, si aplica, marca el boleto canjeado.
+
+    Todo ocurre dentro del mismo BEGIN IMMEDIATE: si el boleto a canjear ya no
+    está disponible o algo falla, no se guarda ningún pasajero. `archivos`
+    [(nombre, bytes)] se ligan a todos los pasajeros en esa misma transacción
+    (un solo blob por archivo). Regresa los ids nuevos.
+    """
+    errores = validar(filas)
+    if errores:
+        raise ErrorReserva(errores)
+    with db.transaccion(ruta_db) as conn:
+        # Con el candado de escritura tomado nadie más inserta: los ids nuevos son los mayores a este
+        ultimo_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM vuelos").fetchone()[0]
+        conn.executemany(_SQL_INSERT, [_valores(f) for f in filas])
+        if id_canje is not None:
+            canjeado = conn.execute(
+                "UPDATE vuelos SET Estado='Canjeado' WHERE id=? AND Estado=? AND deleted_at IS NULL",
+                (int(id_canje), ESTADO_CANJEABLE)).rowcount
+            if not canjeado:
+                raise ErrorReserva([f"El boleto {id_canje} ya no está disponible para canje."])
+        ids = [fila[0] for fila in conn.execute("SELECT id FROM vuelos WHERE id > ? ORDER BY id", (ultimo_id,))]
+        if archivos:
+            adjuntos.adjuntar(ids, archivos, conn=conn)
+    # El almacén en memoria aplica solo estas filas (por `rev`) en la próxima sincronización
+    if ruta_db == db.DB_PATH:
+        almacen.marcar_cambio()
+    return ids
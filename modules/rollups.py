@@ -0,0 +1,77 @@
+from datetime import timedelta
+from modules import archivo, db
+from modules.migraciones import DIMENSIONES_PASAJERO, DIMENSIONES_ROLLUP
+
+# --- CONSULTAS SOBRE LOS RESÚMENES (rollup_diario y rollup_pasajero, mantenidos por triggers) ---
+def consultar(inicio=None, fin=None, pasajeros=None, aerolineas=None, ruta_db=db.DB_PATH):
+    """Filas del resumen diario en el rango: una por día x aerolínea x ruta x estado
+    (y por base cuando el rango alcanza el archivo histórico).
+
+    El tamaño está acotado por los días y las combinaciones de esas dimensiones que
+    se vuelan cada día: los boletos repetidos comparten fila, así que deja de crecer
+    con el volumen. Los gráficos del centro BI agregan sobre este marco.
+    El resumen no lleva pasajero: filtrar por pasajeros agrega sus boletos directamente.
+    """
+    if pasajeros:
+        return _desde_vuelos(DIMENSIONES_ROLLUP, inicio, fin, pasajeros, aerolineas, ruta_db)
+    return _desde_resumen('rollup_diario', DIMENSIONES_ROLLUP, inicio, fin, None, aerolineas, ruta_db)
+
+def consultar_pasajeros(inicio=None, fin=None, pasajeros=None, aerolineas=None, ruta_db=db.DB_PATH):
+    """Filas del resumen día x pasajero en el rango (para el top de viajeros).
+
+    El resumen no lleva aerolínea: filtrar por aerolíneas agrega los boletos directamente.
+    """
+    if aerolineas:
+        return _desde_vuelos(DIMENSIONES_PASAJERO, inicio, fin, pasajeros, aerolineas, ruta_db)
+    return _desde_resumen('rollup_pasajero', DIMENSIONES_PASAJERO, inicio, fin, pasajeros, None, ruta_db)
+
+def _filtros(pasajeros, aerolineas):
+    condiciones, params = [], []
+    for columna, valores in (("Pasajero", pasajeros), ("Aerolinea", aerolineas)):
+        if valores:
+            condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+            params.extend(valores)
+    return condiciones, params
+
+def _desde_resumen(tabla, dimensiones, inicio, fin, pasajeros, aerolineas, ruta_db):
+    condiciones, params = [], []
+    if inicio:
+        condiciones.append("Dia >= ?")
+        params.append(str(inicio))
+    if fin:
+        condiciones.append("Dia <= ?")
+        params.append(str(fin))
+    extra, extra_params = _filtros(pasajeros, aerolineas)
+    where = f"WHERE {' AND '.join(condiciones + extra)}" if condiciones + extra else ""
+    params += extra_params
+    # '' vuelve a NULL para que los agrupamientos de pandas lo traten igual que en `vuelos`
+    columnas = ", ".join(f"NULLIF({d}, '') AS {d}" for d in dimensiones)
+    if not archivo.necesario(inicio, ruta_db):
+        return db.consultar_df(f"SELECT Dia, {columnas}, Vuelos, Costo FROM {tabla} {where}", params, ruta_db=ruta_db)
+    # El rango llega al archivo: se leen ambos resúmenes. Una combinación puede salir una vez
+    # por base; no se reagrupa en SQL porque todo lo que se calcula encima son sumas.
+    llave = ", ".join(['Dia'] + dimensiones)
+    union = (f"SELECT {llave}, Vuelos, Costo FROM main.{tabla} "
+             f"UNION ALL SELECT {llave}, Vuelos, Costo FROM {archivo.ALIAS}.{tabla}")
+    return db.consultar_df(f"SELECT Dia, {columnas}, Vuelos, Costo FROM ({union}) {where}",
+                           params, ruta_db=ruta_db, adjuntas=archivo.adjuntas(ruta_db))
+
+def _desde_vuelos(dimensiones, inicio, fin, pasajeros, aerolineas, ruta_db):
+    # Mismo marco que el resumen, agrupado en SQL sobre los boletos que cumplen el filtro
+    # (los índices de pasajero y aerolínea acotan la lectura a esos boletos)
+    condiciones, params = ["deleted_at IS NULL"], []
+    if inicio:
+        condiciones.append("Fecha >= ?")
+        params.append(str(inicio))
+    if fin:
+        condiciones.append("Fecha < ?")
+        params.append(str(fin + timedelta(days=1)))
+    extra, extra_params = _filtros(pasajeros, aerolineas)
+    params += extra_params
+    llave = ["substr(Fecha, 1, 10)"] + dimensiones
+    columnas = ", ".join(f"NULLIF({d}, '') AS {d}" for d in dimensiones)
+    tabla, adjuntas = archivo.origen_vuelos(inicio, ruta_db)
+    return db.consultar_df(f"SELECT substr(Fecha, 1, 10) AS Dia, {columnas}, COUNT(*) AS Vuelos, "
+                           f"SUM(COALESCE(Costo, 0)) AS Costo FROM {tabla} "
+                           f"WHERE {' AND '.join(condiciones + extra)} GROUP BY {', '.join(llave)}",
+                           params, ruta_db=ruta_db, adjuntas=adjuntas)
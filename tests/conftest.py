@@ -0,0 +1,31 @@
+import sqlite3
+
+import pytest
+
+from modules import db, migraciones
+
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    """Ruta de una base migrada y vacía; el directorio de trabajo (adjuntos, logs) también es temporal."""
+    monkeypatch.chdir(tmp_path)
+    ruta = str(tmp_path / "vuelos.db")
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    migraciones.migrar(conn)
+    conn.close()
+    yield ruta
+    db.pool(ruta).cerrar()
+
+
+@pytest.fixture
+def insertar(base):
+    """insertar(**campos) -> id; los campos que falten toman valores de un boleto típico."""
+    def _insertar(**campos):
+        fila = dict(Pasajero="JUAN PEREZ", PNR="ABC123", Fecha="2024-05-10", Costo=1000.0, Estado="Activo",
+                    Origen="MEX", Destino="CUN", Aerolinea="AEROMEXICO")
+        fila.update(campos)
+        columnas = ", ".join(fila)
+        with db.transaccion(base) as conn:
+            return conn.execute(f"INSERT INTO vuelos ({columnas}) VALUES ({', '.join('?' * len(fila))})",
+                                list(fila.values())).lastrowid
+    return _insertar
@@ -0,0 +1,37 @@
+"""Doble local de `google.generativeai` para probar `ClienteIA` sin red ni llave."""
+from types import SimpleNamespace
+
+
+class _Modelo:
+    def __init__(self, api, nombre):
+        self._api = api
+        self.model_name = nombre
+
+    def generate_content(self, prompt):
+        self._api.generaciones.append((self.model_name, prompt))
+        return SimpleNamespace(text=f"[{self.model_name}] {prompt}")
+
+
+class FakeGenai:
+    """Expone `configure`, `list_models` y `GenerativeModel`, y registra cada llamada."""
+
+    def __init__(self, modelos=(("models/gemini-pro", ["generateContent"]),
+                                ("models/embedding-001", ["embedContent"]),
+                                ("models/gemini-1.5-flash", ["generateContent"]))):
+        self._modelos = [SimpleNamespace(name=n, supported_generation_methods=m) for n, m in modelos]
+        self.configuraciones = []
+        self.listados = 0
+        self.instancias = []
+        self.generaciones = []
+
+    def configure(self, api_key):
+        self.configuraciones.append(api_key)
+
+    def list_models(self):
+        self.listados += 1
+        return iter(self._modelos)
+
+    def GenerativeModel(self, nombre):
+        modelo = _Modelo(self, nombre)
+        self.instancias.append(modelo)
+        return modelo
@@ -0,0 +1,62 @@
+import os
+
+from modules import adjuntos, db
+
+
+def _envejecer(ruta, segundos=7200):
+    viejo = os.path.getmtime(ruta) - segundos
+    os.utime(ruta, (viejo, viejo))
+
+
+def test_gc_respeta_referencias_y_periodo_de_gracia(base, insertar):
+    vuelo = insertar()
+    ligado, suelto = adjuntos.adjuntar([vuelo], [("boleto.pdf", b"ligado"), ("viejo.pdf", b"suelto")], ruta_db=base)
+    with db.transaccion(base) as conn:
+        conn.execute("DELETE FROM adjuntos WHERE sha256=?", (suelto,))
+    huerfano_viejo, _ = adjuntos.guardar_blob(b"huerfano viejo")
+    huerfano_nuevo, _ = adjuntos.guardar_blob(b"huerfano nuevo")
+    for sha in (ligado, suelto, huerfano_viejo):
+        _envejecer(adjuntos.ruta_blob(sha))
+
+    r = adjuntos.recolectar_basura(ruta_db=base)
+
+    assert (r['blobs_sin_referencia'], r['archivos_borrados']) == (1, 2)
+    assert r['bytes_liberados'] == len(b"suelto") + len(b"huerfano viejo")
+    assert os.path.exists(adjuntos.ruta_blob(ligado))
+    assert os.path.exists(adjuntos.ruta_blob(huerfano_nuevo))
+    assert not os.path.exists(adjuntos.ruta_blob(suelto))
+    assert not os.path.exists(adjuntos.ruta_blob(huerfano_viejo))
+
+
+def test_gc_no_borra_un_blob_que_se_reutiliza_antes_del_borrado(base, insertar, monkeypatch):
+    vuelo = insertar()
+    sha, = adjuntos.adjuntar([vuelo], [("boleto.pdf", b"contenido")], ruta_db=base)
+    with db.transaccion(base) as conn:
+        conn.execute("DELETE FROM adjuntos WHERE sha256=?", (sha,))
+    _envejecer(adjuntos.ruta_blob(sha))
+
+    # Una subida del mismo contenido se liga justo después de que el GC armó su lista
+    consultar_uno = db.consultar_uno
+    def subida_concurrente(*args, **kwargs):
+        adjuntos.adjuntar([vuelo], [("boleto.pdf", b"contenido")], ruta_db=base)
+        _envejecer(adjuntos.ruta_blob(sha))
+        return consultar_uno(*args, **kwargs)
+    monkeypatch.setattr(db, "consultar_uno", subida_concurrente)
+
+    r = adjuntos.recolectar_basura(ruta_db=base)
+
+    assert (r['blobs_sin_referencia'], r['archivos_borrados']) == (1, 0)
+    assert adjuntos.leer(sha) == b"contenido"
+    assert [d['sha256'] for d in adjuntos.listar(vuelo, ruta_db=base)] == [sha]
+
+
+def test_gc_limpia_temporales_de_subidas_abandonadas(base):
+    os.makedirs(adjuntos.DIR_BLOBS)
+    temporal = os.path.join(adjuntos.DIR_BLOBS, ".subida_abc")
+    with open(temporal, "wb") as f:
+        f.write(b"a medias")
+    adjuntos.recolectar_basura(ruta_db=base)
+    assert os.path.exists(temporal)
+    _envejecer(temporal)
+    assert adjuntos.recolectar_basura(ruta_db=base)['archivos_borrados'] == 1
+    assert not os.path.exists(temporal)
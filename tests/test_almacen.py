@@ -0,0 +1,76 @@
+import random
+
+import pandas as pd
+
+from modules import almacen, db
+
+
+def _recarga(ruta):
+    with db.conexion(ruta) as conn:
+        return almacen.tipar(pd.read_sql_query("SELECT * FROM vuelos WHERE deleted_at IS NULL ORDER BY id", conn))
+
+
+def _mismos_datos(incremental, recarga):
+    """Mismas filas y valores; los dtypes pueden diferir (categorías extra, enteros más anchos)."""
+    assert list(incremental.columns) == list(recarga.columns)
+    assert incremental['id'].is_monotonic_increasing
+    assert incremental.index.equals(pd.RangeIndex(len(incremental)))
+    for columna in recarga.columns:
+        a = incremental[columna].reset_index(drop=True)
+        b = recarga[columna].reset_index(drop=True)
+        if isinstance(b.dtype, pd.CategoricalDtype) or isinstance(a.dtype, pd.CategoricalDtype):
+            a, b = a.astype(object), b.astype(object)
+        assert (a.isna() == b.isna()).all(), columna
+        if columna == 'Costo':
+            assert ((a - b).abs()[b.notna()] < 0.006).all(), columna
+        else:
+            assert (a[a.notna()] == b[b.notna()]).all(), columna
+
+
+def test_delta_equivale_a_recarga(base, insertar):
+    rnd = random.Random(7)
+    for i in range(200):
+        insertar(Pasajero=f"PAX {i % 30}", PNR=f"P{i:05d}", Fecha=f"2024-0{1 + i % 9}-1{i % 10}",
+                 Costo=round(rnd.uniform(100, 9000), 2), Estado=rnd.choice(["Activo", "Realizado"]))
+    tienda = almacen.AlmacenVuelos(base)
+    tienda.sincronizar()
+    cargas = []
+    original = tienda._carga_completa
+    tienda._carga_completa = lambda conn: (cargas.append(1), original(conn))
+
+    for ronda in range(15):
+        with db.transaccion(base) as conn:
+            ids = [r[0] for r in conn.execute("SELECT id FROM vuelos")]
+            for _ in range(rnd.randint(1, 12)):
+                i, op = rnd.choice(ids), rnd.random()
+                if op < 0.3:   # edición con categoría nueva
+                    conn.execute("UPDATE vuelos SET Estado=?, Aerolinea=? WHERE id=?", ("Canjeado", f"NUEVA {ronda}", i))
+                elif op < 0.45:
+                    conn.execute("UPDATE vuelos SET deleted_at='2024-12-01 00:00:00' WHERE id=?", (i,))
+                elif op < 0.55:   # baja revertida: regresa con un id intermedio
+                    conn.execute("UPDATE vuelos SET deleted_at=NULL WHERE id=?", (i,))
+                elif op < 0.65:   # importe que ya no cabe en float32 sin perder centavos
+                    conn.execute("UPDATE vuelos SET Costo=123456789.01 WHERE id=?", (i,))
+                else:
+                    conn.execute("INSERT INTO vuelos (Pasajero, PNR, Fecha, Costo, Estado) VALUES (?, ?, ?, ?, ?)",
+                                 (f"NUEVO {ronda}", f"N{ronda:05d}", "2024-06-01", 50.5, "Activo"))
+        tienda.marcar_cambio()
+        _mismos_datos(tienda.sincronizar(), _recarga(base))
+
+    assert cargas == []   # todo se aplicó como delta
+
+
+def test_vista_de_sesion_no_cambia_con_el_delta(base, insertar):
+    id_vuelo = insertar(Estado="Activo")
+    tienda = almacen.AlmacenVuelos(base)
+    version, vista = tienda.instantanea()
+    copia = vista.copy(deep=True)
+
+    db.ejecutar("UPDATE vuelos SET Estado='Realizado', Costo=1 WHERE id=?", (id_vuelo,), ruta_db=base)
+    insertar(PNR="XYZ789")
+    tienda.marcar_cambio()
+    nueva_version, nueva = tienda.instantanea(version)
+
+    assert nueva_version == version + 1
+    assert list(nueva['Estado'].astype(str)) == ["Realizado", "Activo"]
+    pd.testing.assert_frame_equal(vista, copia)
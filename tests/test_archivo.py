@@ -0,0 +1,73 @@
+from datetime import date
+
+from modules import almacen, archivo, db, rollups
+
+HOY = date(2026, 1, 1)
+RANGO = (date(2020, 1, 1), date(2026, 12, 31))
+
+
+def _poblar(insertar):
+    viejos = [insertar(Pasajero=f"VIEJO {i}", PNR=f"OLD{i:03d}", Fecha=f"2023-0{1 + i % 9}-15", Estado="Realizado",
+                       Costo=100 + i) for i in range(7)]
+    insertar(Pasajero="VIEJO ABIERTO", PNR="OPEN01", Fecha="2023-02-01", Estado="Abierto (Disponible)", Costo=50)
+    insertar(Pasajero="CANJE VIEJO", PNR="CNJ001", Fecha="2023-03-01", Estado="Realizado", Boleto_Ligado="OLD001", Costo=25)
+    insertar(Pasajero="RECIENTE", PNR="NEW001", Fecha="2025-11-01", Estado="Realizado", Costo=300)
+    insertar(Pasajero="BAJA VENCIDA", PNR="DEL001", Fecha="2025-06-01", deleted_at="2025-01-01 00:00:00")
+    return viejos
+
+
+def _totales(base):
+    diario = rollups.consultar(*RANGO, ruta_db=base)
+    pasajeros = rollups.consultar_pasajeros(*RANGO, ruta_db=base)
+    return (int(diario['Vuelos'].sum()), round(float(diario['Costo'].sum()), 2),
+            int(pasajeros['Vuelos'].sum()), round(float(pasajeros['Costo'].sum()), 2))
+
+
+def test_ida_y_vuelta_por_el_archivo(base, insertar):
+    viejos = _poblar(insertar)
+    antes = _totales(base)
+    vivos_antes = set(almacen.consultar_vuelos(*RANGO, ruta_db=base)['id'])
+    generacion = db.consultar_uno("SELECT valor FROM configuracion WHERE clave=?", (archivo.CLAVE_GENERACION,), ruta_db=base)
+
+    r = archivo.archivar(horizonte_dias=365, retencion_dias=90, hoy=HOY, lote=3, ruta_db=base)
+
+    assert (r['cerrados'], r['bajas'], r['lotes']) == (8, 1, 3)
+    assert r['hasta'] == "2023-07-15" == archivo.limite(base)
+    calientes = set(almacen.consultar_vuelos(*RANGO, ruta_db=base)['id'])
+    assert calientes.isdisjoint(viejos) and len(calientes) == 2
+    # Los archivados siguen en los resúmenes y en las consultas que incluyen el archivo
+    assert _totales(base) == antes
+    assert set(almacen.consultar_vuelos(*RANGO, incluir_archivo=True, ruta_db=base)['id']) == vivos_antes
+    assert list(almacen.consultar_canjes(*RANGO, incluir_archivo=True, ruta_db=base)['PNR']) == ["CNJ001"]
+    assert almacen.consultar_canjes(*RANGO, ruta_db=base).empty
+    assert db.consultar_uno("SELECT valor FROM configuracion WHERE clave=?", (archivo.CLAVE_GENERACION,),
+                            ruta_db=base) != generacion
+    # Un rango que empieza después del archivo no lo adjunta
+    assert archivo.origen_vuelos(date(2024, 1, 1), base) == ("vuelos", ())
+
+
+def test_archivo_no_queda_adjunto_en_el_pool(base, insertar):
+    _poblar(insertar)
+    archivo.archivar(horizonte_dias=365, hoy=HOY, ruta_db=base)
+    almacen.consultar_vuelos(*RANGO, incluir_archivo=True, ruta_db=base)
+    rollups.consultar(*RANGO, ruta_db=base)
+
+    with db.conexion(base) as conn:
+        assert archivo.ALIAS not in [f[1] for f in conn.execute("PRAGMA database_list")]
+
+
+def test_reparar_quita_duplicados_de_una_corrida_interrumpida(base, insertar):
+    _poblar(insertar)
+    archivo.archivar(horizonte_dias=365, hoy=HOY, ruta_db=base)
+    # Simula una corrida que copió al archivo pero no alcanzó a borrar de la tabla caliente
+    reciente = db.consultar_uno("SELECT id FROM vuelos WHERE PNR='NEW001'", ruta_db=base)[0]
+    with db.conexion(base) as conn, db.con_adjuntas(conn, archivo.adjuntas(base)):
+        columnas = ", ".join(c[1] for c in conn.execute("PRAGMA main.table_info(vuelos)"))
+        conn.execute(f"INSERT INTO {archivo.ALIAS}.vuelos ({columnas}) SELECT {columnas} FROM main.vuelos WHERE id=?",
+                     (reciente,))
+
+    r = archivo.archivar(horizonte_dias=365, hoy=HOY, ruta_db=base)
+
+    assert r['reparadas'] == 1 and r['lotes'] == 0
+    ids = almacen.consultar_vuelos(*RANGO, incluir_archivo=True, ruta_db=base)['id']
+    assert list(ids).count(reciente) == 1
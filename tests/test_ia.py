@@ -0,0 +1,64 @@
+from modules import ia
+from tests.fake_genai import FakeGenai
+
+
+def test_descubre_una_vez_por_llave():
+    api = FakeGenai()
+    cliente = ia.ClienteIA(api=api)
+
+    primero = cliente.modelo("llave-a")
+    assert cliente.modelo("llave-a") is primero
+    assert primero.model_name == "models/gemini-1.5-flash"
+    assert api.listados == 1
+    assert api.configuraciones == ["llave-a"]
+
+    cliente.modelo("llave-b")
+    assert api.listados == 2
+    assert api.configuraciones == ["llave-a", "llave-b"]
+
+    m = cliente.metricas()
+    assert m['descubrimientos'] == 2
+    assert m['aciertos_cache'] == 1
+
+
+def test_ttl_vencido_vuelve_a_descubrir(monkeypatch):
+    reloj = [1000.0]
+    monkeypatch.setattr(ia.time, "monotonic", lambda: reloj[0])
+    api = FakeGenai()
+    cliente = ia.ClienteIA(api=api, ttl_s=60)
+
+    primero = cliente.modelo("llave-a")
+    reloj[0] += 59
+    assert cliente.modelo("llave-a") is primero
+    assert api.listados == 1
+
+    reloj[0] += 2
+    segundo = cliente.modelo("llave-a")
+    assert segundo is not primero
+    assert api.listados == 2
+    assert cliente.metricas()['descubrimientos'] == 2
+
+
+def test_metricas_de_descubrimiento_y_generacion():
+    api = FakeGenai()
+    cliente = ia.ClienteIA(api=api)
+
+    assert cliente.generar("llave-a", "hola") == "[models/gemini-1.5-flash] hola"
+    assert cliente.generar("llave-a", "otra", preferencias=('pro',)) == "[models/gemini-pro] otra"
+    cliente.generar("llave-a", "de nuevo")
+
+    m = cliente.metricas()
+    assert m['descubrimientos'] == 2
+    assert m['generaciones'] == 3
+    assert m['aciertos_cache'] == 1
+    assert m['descubrimiento_ms'] >= 0 and m['generacion_ms'] >= 0
+    assert m['generacion_prom_ms'] == m['generacion_ms'] / 3
+    assert len(api.generaciones) == 3
+
+
+def test_respaldo_si_no_hay_preferido():
+    api = FakeGenai(modelos=(("models/embedding-001", ["embedContent"]),
+                             ("models/gemini-pro", ["generateContent"])))
+    cliente = ia.ClienteIA(api=api)
+    assert cliente.modelo("llave-a").model_name == "models/gemini-pro"
+    assert cliente.modelo("llave-b", respaldo="models/fijo").model_name == "models/fijo"
@@ -0,0 +1,54 @@
+import io
+
+from modules import adjuntos, db, importacion
+
+
+def _importar(base, texto, **kw):
+    errores = io.StringIO()
+    m = importacion.importar(io.StringIO(texto), "historico.csv", errores, ruta_db=base, **kw)
+    return m, errores.getvalue()
+
+
+def test_duplicados_contra_la_base_con_acentos_y_enie(base, insertar):
+    insertar(Pasajero="José Peña", PNR="BBB111", Fecha="2024-01-02")
+    m, errores = _importar(base, "Pasajero,PNR,Fecha,Costo\n"
+                                 "JOSÉ PEÑA,BBB111,2024-01-02,10\n"
+                                 "josé peña,BBB111,2024-01-03,10\n")
+
+    assert (m['insertadas'], m['duplicadas']) == (1, 1)
+    assert "duplicado" in errores
+
+
+def test_duplicados_dentro_del_archivo_y_entre_bloques(base):
+    filas = "".join(f"Ñandú {i % 3},PNR{i % 3:03d},2024-02-01,{i}\n" for i in range(7))
+    m, _ = _importar(base, "Pasajero,PNR,Fecha,Costo\n" + filas, tamano=2)
+
+    assert (m['insertadas'], m['duplicadas'], m['bloques']) == (3, 4, 4)
+    assert db.consultar_uno("SELECT COUNT(*) FROM vuelos", ruta_db=base)[0] == 3
+
+
+def test_rechazos_no_cuentan_como_duplicados(base):
+    m, errores = _importar(base, "Pasajero,PNR,Fecha,Costo,Estado\n"
+                                 ",AAA111,2024-01-02,10,Activo\n"
+                                 "ANA,AAA112,02/13/2024,10,Activo\n"
+                                 "ANA,AAA113,2024-01-02,abc,Volando\n"
+                                 "ANA,AAA114,15/01/2024,10,abierto\n")
+
+    assert (m['insertadas'], m['rechazadas'], m['duplicadas']) == (1, 3, 0)
+    assert "falta Pasajero" in errores and "Fecha inválida" in errores and "Estado desconocido" in errores
+    assert db.consultar_uno("SELECT Estado, Fecha FROM vuelos", ruta_db=base) == ("Abierto (Disponible)", "2024-01-15")
+
+
+def test_soporte_pasa_al_almacen_de_adjuntos(base, tmp_path):
+    (tmp_path / "attachments").mkdir()
+    (tmp_path / "attachments" / "3_remision.pdf").write_bytes(b"%PDF-remision")
+    m, _ = _importar(base, "Pasajero,PNR,Fecha,Costo,Soporte\n"
+                           "JUAN,AAA111,2024-01-02,10,attachments\\3_remision.pdf\n"
+                           "ANA,AAA112,2024-01-03,10,attachments/no_existe.pdf\n")
+
+    assert (m['insertadas'], m['adjuntos'], m['adjuntos_faltantes']) == (2, 1, 1)
+    filas = db.consultar_df("SELECT id, Soporte FROM vuelos ORDER BY id", ruta_db=base)
+    assert filas['Soporte'].tolist() == ["", "attachments/no_existe.pdf"]
+    documentos = adjuntos.listar(int(filas['id'][0]), ruta_db=base)
+    assert [d['nombre'] for d in documentos] == ["remision.pdf"]
+    assert adjuntos.leer(documentos[0]['sha256']) == b"%PDF-remision"
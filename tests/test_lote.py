@@ -0,0 +1,36 @@
+import pytest
+
+from modules import lote
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("PNR: ABC123", "ABC123"),
+    ("Confirmation number: ABC123", "ABC123"),
+    ("Booking Reference Number XYZ789", "XYZ789"),
+    ("Localizador de reserva: K9J8H7", "K9J8H7"),
+    ("CLAVE DE RESERVACIÓN QWERTY", "QWERTY"),
+    ("Código de reservación:\n  HJK4LM", "HJK4LM"),
+    ("CONFIRMATION NUMBER: ABC123", "ABC123"),
+])
+def test_detecta_pnr(texto, esperado):
+    assert lote.detectar_pnr(texto) == esperado
+
+
+@pytest.mark.parametrize("texto", [
+    "Confirmation number pending",
+    "Booking reference number will follow",
+    "CONFIRMATION NUMBER",
+    "Localizador de reserva: pendiente",
+    "",
+    None,
+])
+def test_no_toma_palabras_como_pnr(texto):
+    assert lote.detectar_pnr(texto) is None
+
+
+def test_agrupa_solo_mismo_pnr():
+    documentos = [("a.pdf", b"a"), ("b.pdf", b"b"), ("c.pdf", b"c"), ("d.pdf", b"d")]
+    textos = ["Confirmation number: ABC123", "Booking Reference Number XYZ789",
+              "Factura PNR ABC123", "Confirmation number pending"]
+    grupos = {g['pnr_detectado']: g['archivos'] for g in lote.agrupar_por_pnr(documentos, textos)}
+    assert grupos == {"ABC123": ["a.pdf", "c.pdf"], "XYZ789": ["b.pdf"], None: ["d.pdf"]}
@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from modules import migraciones
+
+
+def _conectar(ruta):
+    return sqlite3.connect(ruta, isolation_level=None)
+
+
+def test_segunda_corrida_no_aplica_nada(tmp_path):
+    ruta = str(tmp_path / "v.db")
+    ultima = migraciones.MIGRACIONES[-1][0]
+    assert migraciones.migrar(_conectar(ruta)) == [v for v, _, _ in migraciones.MIGRACIONES]
+    assert migraciones.migrar(_conectar(ruta)) == []
+    conn = _conectar(ruta)
+    assert conn.execute("SELECT COUNT(*), MAX(version) FROM schema_version").fetchone() == (ultima, ultima)
+
+
+def test_relee_la_version_dentro_de_la_transaccion(tmp_path, monkeypatch):
+    # Otro proceso terminó las migraciones después de que este leyó la versión:
+    # ningún paso debe volver a correr ni registrarse dos veces
+    ruta = str(tmp_path / "v.db")
+    migraciones.migrar(_conectar(ruta))
+    monkeypatch.setattr(migraciones, "version_actual", lambda conn: 0)
+    corridos = []
+    monkeypatch.setattr(migraciones, "MIGRACIONES",
+                        [(v, d, lambda cursor, v=v: corridos.append(v)) for v, d, _ in migraciones.MIGRACIONES])
+
+    assert migraciones.migrar(_conectar(ruta)) == []
+    assert corridos == []
+    assert _conectar(ruta).execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(migraciones.MIGRACIONES)
+
+
+def test_paso_fallido_revierte_y_no_se_registra(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "v.db")
+    pasos = migraciones.MIGRACIONES[:1] + [(2, "Falla a la mitad", lambda cursor: (
+        cursor.execute("CREATE TABLE a_medias (x)"), 1 / 0))]
+    monkeypatch.setattr(migraciones, "MIGRACIONES", pasos)
+
+    with pytest.raises(ZeroDivisionError):
+        migraciones.migrar(_conectar(ruta))
+    conn = _conectar(ruta)
+    assert conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name='a_medias'").fetchone()[0] == 0
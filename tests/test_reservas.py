@@ -0,0 +1,60 @@
+import pytest
+
+from modules import adjuntos, db, reservas
+
+
+def _grupo(pnr="GRP001"):
+    return reservas.filas_grupo(["ana lopez", "luis peña"], 3000.0, PNR=pnr, Fecha="2024-07-01", Origen="MEX",
+                                Destino="MAD", Estado="Activo", Usuario="TEST")
+
+
+def _cuenta(base):
+    return db.consultar_uno("SELECT COUNT(*) FROM vuelos", ruta_db=base)[0]
+
+
+def test_canje_marca_el_boleto_y_liga_el_grupo(base, insertar):
+    abierto = insertar(PNR="OLD001", Estado=reservas.ESTADO_CANJEABLE)
+    filas = [dict(f, Boleto_Ligado="OLD001") for f in _grupo()]
+
+    ids = reservas.registrar_reserva(filas, id_canje=abierto, archivos=[("conf.pdf", b"%PDF-1")], ruta_db=base)
+
+    assert len(ids) == 2
+    assert db.consultar_uno("SELECT Estado FROM vuelos WHERE id=?", (abierto,), ruta_db=base)[0] == "Canjeado"
+    nuevos = db.consultar_df("SELECT Pasajero, Costo, Boleto_Ligado FROM vuelos WHERE id > ? ORDER BY id", (abierto,),
+                             ruta_db=base)
+    assert nuevos.values.tolist() == [["ANA LOPEZ", 1500.0, "OLD001"], ["LUIS PEÑA", 1500.0, "OLD001"]]
+    assert [len(adjuntos.listar(i, ruta_db=base)) for i in ids] == [1, 1]
+
+
+@pytest.mark.parametrize("estado, borrado", [("Canjeado", None), ("Activo", None),
+                                             (reservas.ESTADO_CANJEABLE, "2024-01-01 00:00:00")])
+def test_canje_no_disponible_no_guarda_nada(base, insertar, estado, borrado):
+    boleto = insertar(PNR="OLD001", Estado=estado, deleted_at=borrado)
+    antes = _cuenta(base)
+
+    with pytest.raises(reservas.ErrorReserva, match="ya no está disponible"):
+        reservas.registrar_reserva(_grupo(), id_canje=boleto, archivos=[("conf.pdf", b"%PDF-1")], ruta_db=base)
+
+    assert _cuenta(base) == antes
+    assert db.consultar_uno("SELECT Estado FROM vuelos WHERE id=?", (boleto,), ruta_db=base)[0] == estado
+    assert db.consultar_uno("SELECT COUNT(*) FROM adjuntos", ruta_db=base)[0] == 0
+
+
+def test_canje_doble_solo_gana_uno(base, insertar):
+    abierto = insertar(PNR="OLD001", Estado=reservas.ESTADO_CANJEABLE)
+    reservas.registrar_reserva(_grupo("GRP001"), id_canje=abierto, ruta_db=base)
+    antes = _cuenta(base)
+
+    with pytest.raises(reservas.ErrorReserva):
+        reservas.registrar_reserva(_grupo("GRP002"), id_canje=abierto, ruta_db=base)
+    assert _cuenta(base) == antes
+
+
+def test_grupo_invalido_no_inserta_ninguna_fila(base):
+    filas = _grupo() + [dict(_grupo()[0], PNR="", Costo=-1)]
+
+    with pytest.raises(reservas.ErrorReserva) as error:
+        reservas.registrar_reserva(filas, ruta_db=base)
+
+    assert len(error.value.errores) == 2   # falta PNR y costo inválido
+    assert _cuenta(base) == 0
@@ -0,0 +1,58 @@
+import random
+from datetime import date
+
+from modules import db, migraciones, rollups
+
+RANGO = (date(2024, 1, 1), date(2024, 12, 31))
+
+
+def _directo(ruta, dimensiones):
+    llave = ", ".join(f"COALESCE({d}, '')" for d in dimensiones)
+    return sorted(db.consultar_df(
+        f"SELECT substr(Fecha, 1, 10) AS Dia, {llave}, COUNT(*), ROUND(SUM(COALESCE(Costo, 0)), 2) "
+        f"FROM vuelos WHERE deleted_at IS NULL GROUP BY 1, {llave}", ruta_db=ruta).itertuples(index=False, name=None))
+
+
+def _resumen(ruta, tabla, dimensiones):
+    return sorted(db.consultar_df(f"SELECT Dia, {', '.join(dimensiones)}, Vuelos, ROUND(Costo, 2) FROM {tabla}",
+                                  ruta_db=ruta).itertuples(index=False, name=None))
+
+
+def test_triggers_mantienen_ambos_resumenes(base, insertar):
+    rnd = random.Random(3)
+    for i in range(120):
+        insertar(Pasajero=f"PAX {i % 15}", Fecha=f"2024-03-{1 + i % 20:02d}", Costo=rnd.randint(1, 900),
+                 Aerolinea=rnd.choice(["VOLARIS", "AEROMEXICO", None]), Destino=rnd.choice(["CUN", "GDL"]))
+    with db.transaccion(base) as conn:
+        for _ in range(80):
+            i, op = rnd.randint(1, 120), rnd.random()
+            if op < 0.3:
+                conn.execute("UPDATE vuelos SET Pasajero=?, Costo=Costo+7 WHERE id=?", (f"PAX {rnd.randint(1, 20)}", i))
+            elif op < 0.5:
+                conn.execute("UPDATE vuelos SET Fecha='2024-04-02', Estado='Realizado' WHERE id=?", (i,))
+            elif op < 0.7:
+                conn.execute("UPDATE vuelos SET deleted_at='2024-05-01 00:00:00' WHERE id=?", (i,))
+            elif op < 0.8:
+                conn.execute("UPDATE vuelos SET deleted_at=NULL WHERE id=?", (i,))
+            else:
+                conn.execute("DELETE FROM vuelos WHERE id=?", (i,))
+
+    for tabla, dimensiones in migraciones.ROLLUPS.items():
+        assert _resumen(base, tabla, dimensiones) == _directo(base, dimensiones), tabla
+
+
+def test_filtros_que_el_resumen_no_cubre_se_agregan_de_vuelos(base, insertar):
+    insertar(Pasajero="ANA", Aerolinea="VOLARIS", Costo=100)
+    insertar(Pasajero="ANA", Aerolinea="AEROMEXICO", Costo=200)
+    insertar(Pasajero="LUIS", Aerolinea="VOLARIS", Costo=400)
+
+    por_pasajero = rollups.consultar(*RANGO, pasajeros=["ANA"], ruta_db=base)
+    assert por_pasajero['Vuelos'].sum() == 2 and por_pasajero['Costo'].sum() == 300
+    assert set(por_pasajero.columns) == {'Dia', *migraciones.DIMENSIONES_ROLLUP, 'Vuelos', 'Costo'}
+
+    por_aerolinea = rollups.consultar_pasajeros(*RANGO, aerolineas=["VOLARIS"], ruta_db=base)
+    assert dict(por_aerolinea.groupby('Pasajero')['Costo'].sum()) == {"ANA": 100, "LUIS": 400}
+
+    ambos = rollups.consultar(*RANGO, pasajeros=["ANA"], aerolineas=["VOLARIS"], ruta_db=base)
+    assert ambos['Costo'].sum() == 100
+    assert rollups.consultar_pasajeros(*RANGO, pasajeros=["LUIS"], ruta_db=base)['Costo'].sum() == 400